@@ -3,7 +3,11 @@
 import click
 
 from .add import cmd_group_add
+from .cache import cmd_group_cache
+from .diff_sysroot import cmd_diff_sysroot
 from .initrepo import cmd_init_repo
+from .rehash import cmd_rehash
+from .reindex import cmd_reindex_sysroot
 from .remove import cmd_group_remove
 from .show import cmd_group_show
 from .subrepo import cmd_sub_repo
@@ -19,7 +23,11 @@ def cmd_group_repo(ctx):
 
 
 cmd_group_repo.add_command(cmd_group_add, name="add")
+cmd_group_repo.add_command(cmd_group_cache, name="cache")
+cmd_group_repo.add_command(cmd_diff_sysroot, name="diff-sysroot")
 cmd_group_repo.add_command(cmd_group_remove, name="remove")
 cmd_group_repo.add_command(cmd_group_show, name="show")
 cmd_group_repo.add_command(cmd_init_repo, name="initrepo")
+cmd_group_repo.add_command(cmd_rehash, name="rehash")
+cmd_group_repo.add_command(cmd_reindex_sysroot, name="reindex-sysroot")
 cmd_group_repo.add_command(cmd_sub_repo, name="subrepo")
@@ -1,32 +1,75 @@
 #!/usr/bin/env python3
+import json
 import os
 import sys
 
 import click
 
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import STRACE_PARSERS, \
+    DEFAULT_STRACE_PARSER
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.trace_stats import TraceStats
 from ....libsimenv.app_manifest import update_manifest_fs_access, update_manifest_instret, verify_manifest_format
 from ....libsimenv.autocomplete import complete_app_names
+from ....libsimenv.digest import HASH_ALGOS
+from ....libsimenv.hash_cache import HashCache, get_hash_cache_path
+from ....libsimenv.hash_engine import DEFAULT_HASH_JOBS
 from ....libsimenv.manifest_db import save_to_manifest_db, load_from_manifest_db, prompt_app_name_suggestion
 from ....libsimenv.repo_path import get_repo_components_path
+from ....libsimenv.sysroot_index import load_sysroot_index
 from ....libsimenv.sysroots_db import get_pristine_sysroot_dir
-from ....libsimenv.utils import fatal
+from ....libsimenv.trace_cache import TraceCache, get_strace_index_dir, get_trace_cache_path
+from ....libsimenv.utils import fatal, warning
 
 
 @click.command()
 @click.pass_context
-@click.option("-s", "--syscall-trace", required=True, type=click.File(),
-              help="The FESVR syscall trace file.")
+@click.option("-s", "--syscall-trace", required=True, multiple=True, type=click.Path(dir_okay=False),
+              help="The FESVR syscall trace file (optionally compressed with gzip, xz or bz2). "
+                   "Repeat it together with -d to merge several bootstrap runs.")
 @click.option("-f", "--final-state-json", required=False, type=click.Path(),
               help="The FESVR final state registers dump.")
-@click.option("-d", "--post-sim-sysroot-path", required=True,
+@click.option("-d", "--post-sim-sysroot-path", required=True, multiple=True,
               type=click.Path(exists=True, dir_okay=True, file_okay=False),
-              help="The path to the sysroot after the app has run.")
+              help="The path to the sysroot after the app has run. "
+                   "The N-th -d is the sysroot left by the run that produced the N-th -s trace.")
+@click.option("--parser", "strace_parser", type=click.Choice(list(STRACE_PARSERS)), default=DEFAULT_STRACE_PARSER,
+              show_default=True,
+              help="The parser backend used to read the syscall trace.")
+@click.option("-j", "--jobs", type=click.IntRange(min=1), default=1, show_default=True,
+              help="The number of worker processes analyzing the syscall traces concurrently, "
+                   "one trace per process, if several are given.")
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the accessed files.")
+@click.option("--hash-algo", type=click.Choice(sorted(HASH_ALGOS)),
+              help="The algorithm hashing the accessed files [default: that of the manifest, or sha256].")
+@click.option("--no-cache", is_flag=True,
+              help="Always parse the syscall trace and hash the files, "
+                   "neither reading nor updating the trace and file hash caches, nor indexing the trace.")
+@click.option("--progress/--no-progress", default=None,
+              help="Show a live progress line while parsing the syscall trace [default: on if stderr is a terminal].")
+@click.option("--follow-pid", type=click.IntRange(min=1), metavar="PID",
+              help="Analyze the syscall trace while the process PID (the simulator, or the trace compressor) "
+                   "is still writing it, like 'tail -f', and finish once that process exits. "
+                   "The trace does not need to exist yet.")
+@click.option("--stats-json", type=click.Path(dir_okay=False, writable=True),
+              help="Dump the analyzer performance counters to this JSON file.")
 @click.argument("app-name", shell_complete=complete_app_names, type=click.STRING)
-def cmd_add_app_analyze(ctx, syscall_trace, final_state_json, post_sim_sysroot_path, app_name):
+def cmd_add_app_analyze(ctx, syscall_trace, final_state_json, post_sim_sysroot_path, strace_parser, jobs, hash_jobs,
+                        hash_algo, no_cache, progress, follow_pid, stats_json, app_name):
     """
     Analyze an app for how to create SimEnv.
     """
     sysroots_archive_path, manifest_db_path, _ = get_repo_components_path(ctx.obj["repo_path"])
+    if len(syscall_trace) != len(post_sim_sysroot_path):
+        fatal("Got %d syscall traces but %d post-sim sysroots, each trace must pair with one sysroot" % (
+            len(syscall_trace), len(post_sim_sysroot_path)))
+    if follow_pid is not None:
+        if len(syscall_trace) != 1:
+            fatal("Only a single syscall trace can be followed")
+    else:
+        for trace_path in syscall_trace:
+            if not os.path.isfile(trace_path):
+                fatal("Syscall trace [%s] does not exist" % trace_path)
 
     try:
         manifest = load_from_manifest_db(app_name, manifest_db_path)
@@ -44,7 +87,38 @@ def cmd_add_app_analyze(ctx, syscall_trace, final_state_json, post_sim_sysroot_p
         if not os.path.isdir(pristine_sysroot_path):
             fatal("App's pristine sysroot [%s] does not exist" % pristine_sysroot_path)
 
-        new_manifest = update_manifest_fs_access(manifest, pristine_sysroot_path, post_sim_sysroot_path, syscall_trace)
+        try:
+            pristine_index = load_sysroot_index(sysroots_archive_path, manifest["app_pristine_sysroot"])
+        except ValueError as ve:
+            warning("Ignoring the index of the pristine sysroot (%s)" % ve)
+            pristine_index = None
+        if pristine_index is None:
+            print("The pristine sysroot is not indexed, its files will be hashed "
+                  "(run 'repo reindex-sysroot %s' to index it)" % manifest["app_pristine_sysroot"])
+
+        if progress is None:
+            progress = sys.stderr.isatty()
+        stats = TraceStats()
+        trace_cache = None if no_cache else TraceCache(get_trace_cache_path(ctx.obj["repo_path"]))
+        hash_cache = None if no_cache else HashCache(get_hash_cache_path(ctx.obj["repo_path"]))
+        strace_index_dir = None if no_cache else get_strace_index_dir(ctx.obj["repo_path"])
+        try:
+            with stats.phase("update_fs_access"):
+                new_manifest = update_manifest_fs_access(
+                    manifest, pristine_sysroot_path, list(post_sim_sysroot_path), list(syscall_trace), strace_parser,
+                    jobs, trace_cache, stats, progress, follow_pid, hash_cache, hash_jobs, pristine_index, hash_algo,
+                    strace_index_dir
+                )
+        finally:
+            if trace_cache:
+                trace_cache.close()
+            if hash_cache:
+                hash_cache.close()
+        print(stats.format_summary())
+        if stats_json:
+            with open(stats_json, "w") as fp_stats:
+                json.dump(dict(traces=[os.path.abspath(p) for p in syscall_trace], parser=strace_parser, jobs=jobs,
+                               **stats.to_dict()), fp_stats, indent=2)
         if os.path.exists(final_state_json):
             with open(final_state_json, "r") as fp_final_state_json:
                 new_manifest = update_manifest_instret(new_manifest, fp_final_state_json)
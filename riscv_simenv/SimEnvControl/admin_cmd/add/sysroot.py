@@ -2,6 +2,7 @@
 
 import click
 
+from ...libsimenv.hash_engine import DEFAULT_HASH_JOBS
 from ...libsimenv.repo_path import get_repo_components_path
 from ...libsimenv.sysroots_db import is_sysroot_available, remove_sysroot, add_sysroot
 from ...libsimenv.utils import fatal
@@ -11,11 +12,13 @@ from ...libsimenv.utils import fatal
 @click.pass_context
 @click.option("-f", "--force-overwrite", is_flag=True,
               help="[Danger] Remove existing sysroot from the repository before importing the new sysroot.")
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the files of the sysroot to index it.")
 @click.argument("sysroot-name")
 @click.argument("sysroot-path", type=click.Path(exists=True, dir_okay=True, file_okay=False))
-def cmd_add_sysroot(ctx, sysroot_name, sysroot_path, force_overwrite):
+def cmd_add_sysroot(ctx, sysroot_name, sysroot_path, force_overwrite, hash_jobs):
     """
-    Import a pristine sysroot.
+    Import a pristine sysroot, and index its files.
     """
     sysroots_archive_path, _, _ = get_repo_components_path(ctx.obj["repo_path"])
 
@@ -28,7 +31,7 @@ def cmd_add_sysroot(ctx, sysroot_name, sysroot_path, force_overwrite):
             fatal("Sysroot name %s already exist." % sysroot_name)
 
     print(f"Importing pristine sysroot {sysroot_name} from \"{sysroot_path}\"")
-    succ, msg = add_sysroot(sysroots_archive_path, sysroot_name, sysroot_path)
+    succ, msg = add_sysroot(sysroots_archive_path, sysroot_name, sysroot_path, hash_jobs)
     if not succ:
         fatal(f"Fail to add new sysroot, reason:\n{msg}")
 
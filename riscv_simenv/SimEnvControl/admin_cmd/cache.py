@@ -0,0 +1,103 @@
+import os
+import time
+
+import click
+from tabulate import tabulate
+
+from ..libsimenv.hash_cache import HashCache, get_hash_cache_path
+from ..libsimenv.repo_path import check_repo
+from ..libsimenv.trace_cache import TraceCache, get_trace_cache_path
+from ..libsimenv.utils import fatal, format_size
+
+
+def _open_trace_cache(repo_path):
+    # type: (str) -> TraceCache
+    check_repo(repo_path)
+    return TraceCache(get_trace_cache_path(repo_path))
+
+
+def _open_hash_cache(repo_path):
+    # type: (str) -> HashCache
+    check_repo(repo_path)
+    return HashCache(get_hash_cache_path(repo_path))
+
+
+@click.group()
+@click.pass_context
+def cmd_group_cache(ctx):
+    """
+    Inspect or evict the cached syscall trace analysis and file hashes.
+    """
+    pass
+
+
+@click.command()
+@click.pass_context
+def cmd_cache_list(ctx):
+    """
+    List the cached syscall trace analysis.
+    """
+    from .show import tabulate_formats
+
+    with _open_trace_cache(ctx.obj["repo_path"]) as trace_cache:
+        entries = trace_cache.list_entries()
+        n_entries, cache_size = trace_cache.get_stats()
+    with _open_hash_cache(ctx.obj["repo_path"]) as hash_cache:
+        n_hashes, hash_cache_size = hash_cache.get_stats()
+
+    if not entries:
+        print("The trace cache is empty.")
+        print("File hash cache: %d files, %s on disk." % (n_hashes, format_size(hash_cache_size)))
+        return
+    row = []
+    for e in entries:
+        trace_status = "" if os.path.isfile(e.trace_path) else " (missing)"
+        row.append([
+            e.trace_hash[:16], e.app_init_cwd, e.trace_path + trace_status,
+            format_size(e.trace_size), format_size(e.result_size),
+            time.strftime("%Y-%m-%d %H:%M", time.localtime(e.last_used))
+        ])
+    print(
+        tabulate(
+            row,
+            headers=["Trace hash", "Init CWD", "Trace path", "Trace size", "Cached size", "Last used"],
+            **tabulate_formats
+        )
+    )
+    print("%d entries, %s on disk." % (n_entries, format_size(cache_size)))
+    print("File hash cache: %d files, %s on disk." % (n_hashes, format_size(hash_cache_size)))
+
+
+@click.command()
+@click.pass_context
+@click.option("-a", "--all", "evict_all", is_flag=True,
+              help="Evict every entry.")
+@click.option("-u", "--unused-days", type=click.FloatRange(min=0),
+              help="Only evict the entries not used in the last N days.")
+@click.option("--file-hashes", is_flag=True,
+              help="Also drop the cached file hashes (they are never stale, but they take up space).")
+@click.argument("trace-hash", nargs=-1, type=click.STRING)
+def cmd_cache_evict(ctx, evict_all, unused_days, file_hashes, trace_hash):
+    """
+    Evict cached syscall trace analysis by (a prefix of) the trace hash.
+    """
+    if not (evict_all or trace_hash or unused_days is not None or file_hashes):
+        fatal("Specify the trace hash to evict, --unused-days, --all or --file-hashes")
+    if evict_all and trace_hash:
+        fatal("--all cannot be used together with a trace hash")
+
+    if evict_all or trace_hash or unused_days is not None:
+        older_than = None if unused_days is None else time.time() - unused_days * 86400
+        with _open_trace_cache(ctx.obj["repo_path"]) as trace_cache:
+            if trace_hash:
+                n_evicted = sum(trace_cache.evict(h, older_than) for h in trace_hash)
+            else:
+                n_evicted = trace_cache.evict(None, older_than)
+        print("Evicted %d entries." % n_evicted)
+    if file_hashes:
+        with _open_hash_cache(ctx.obj["repo_path"]) as hash_cache:
+            print("Dropped %d file hashes." % hash_cache.clear())
+
+
+cmd_group_cache.add_command(cmd_cache_list, name="list")
+cmd_group_cache.add_command(cmd_cache_evict, name="evict")
@@ -0,0 +1,102 @@
+import os
+from typing import Dict, List, Optional, Tuple
+
+import click
+from tabulate import tabulate
+
+from ..libsimenv.autocomplete import complete_sysroot_names
+from ..libsimenv.hash_cache import HashCache, get_hash_cache_path
+from ..libsimenv.hash_engine import DEFAULT_HASH_JOBS
+from ..libsimenv.manifest_db import get_avail_apps_in_db, load_from_manifest_db
+from ..libsimenv.repo_path import get_repo_components_path
+from ..libsimenv.sysroot_index import FTYPE_DIR, SysrootIndex, diff_sysroot_indexes, \
+    load_sysroot_index
+from ..libsimenv.sysroots_db import is_sysroot_available
+from ..libsimenv.utils import fatal
+
+
+def _load_tree_index(sysroots_archive_path, sysroot_or_path, hash_jobs, hash_cache, follow_symlinks):
+    # type: (str, str, int, HashCache, bool) -> Tuple[SysrootIndex, Optional[str]]
+    """
+    Return the index of a sysroot of the repository, or of any directory tree (indexed on the fly),
+    along with the name of the sysroot, if it is one.
+    """
+    if is_sysroot_available(sysroots_archive_path, sysroot_or_path):
+        index = load_sysroot_index(sysroots_archive_path, sysroot_or_path)
+        if index is None:
+            fatal("Sysroot %s is not indexed, run 'repo reindex-sysroot %s' first" % (sysroot_or_path, sysroot_or_path))
+        return index, sysroot_or_path
+    elif os.path.isdir(sysroot_or_path):
+        print("Indexing [%s]..." % sysroot_or_path)
+        return SysrootIndex.build(sysroot_or_path, hash_jobs, hash_cache, follow_symlinks), None
+    else:
+        fatal("[%s] is neither a sysroot of the repository nor a directory" % sysroot_or_path)
+
+
+def find_affected_apps(manifest_db_path, sysroot_names, changed_paths):
+    # type: (str, List[str], List[str]) -> Dict[str, List[str]]
+    """
+    Return the apps on the given sysroots whose fs_access entries are at or below each changed path.
+    """
+    affected = {p: [] for p in changed_paths}  # type: Dict[str, List[str]]
+    for app in sorted(get_avail_apps_in_db(manifest_db_path)):
+        manifest = load_from_manifest_db(app, manifest_db_path)
+        if manifest["app_pristine_sysroot"] not in sysroot_names:
+            continue
+        accessed_paths = manifest.get("fs_access", {})
+        for changed_path in changed_paths:
+            prefix = changed_path.rstrip("/") + "/"
+            if any(p == changed_path or p.startswith(prefix) for p in accessed_paths):
+                affected[changed_path].append(app)
+    return affected
+
+
+@click.command()
+@click.pass_context
+@click.option("--ignore-missing", is_flag=True,
+              help="Do not report the paths of A missing from B, e.g. when B is a simenv, "
+                   "which only holds the files its app needs.")
+@click.option("-L", "--follow-symlinks", is_flag=True,
+              help="Follow the symlinks in a directory tree, e.g. those of a simenv to the pristine files.")
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the files of a directory to index it.")
+@click.argument("sysroot-a", shell_complete=complete_sysroot_names, type=click.STRING)
+@click.argument("sysroot-b", shell_complete=complete_sysroot_names, type=click.STRING)
+def cmd_diff_sysroot(ctx, ignore_missing, follow_symlinks, hash_jobs, sysroot_a, sysroot_b):
+    """
+    Show what changed from sysroot A to sysroot B, and the apps whose accessed files it affects.
+
+    A and B are the names of sysroots of the repository, or the paths of directory trees,
+    e.g. a simenv or a candidate sysroot, that are indexed through the file hash cache.
+    Only the subtrees whose tree hashes differ are compared.
+
+    To check a simenv against its pristine sysroot, use --ignore-missing and --follow-symlinks.
+    The files the simenv elided or holds sparse are then reported as modified.
+    """
+    from .show import tabulate_formats
+
+    sysroots_archive_path, manifest_db_path, _ = get_repo_components_path(ctx.obj["repo_path"])
+    with HashCache(get_hash_cache_path(ctx.obj["repo_path"])) as hash_cache:
+        index_a, name_a = _load_tree_index(sysroots_archive_path, sysroot_a, hash_jobs, hash_cache, follow_symlinks)
+        index_b, name_b = _load_tree_index(sysroots_archive_path, sysroot_b, hash_jobs, hash_cache, follow_symlinks)
+
+    changes = diff_sysroot_indexes(index_a, index_b, ignore_missing)
+    if not changes:
+        print("No difference.")
+        return
+    sysroot_names = [n for n in (name_a, name_b) if n]
+    affected = find_affected_apps(manifest_db_path, sysroot_names, [p for p, _ in changes])
+    row = [
+        [change, path + ("/" if index_a.entries.get(path, index_b.entries.get(path)).ftype == FTYPE_DIR else ""),
+         ", ".join(affected[path]) or "-"]
+        for path, change in changes
+    ]
+    print(
+        tabulate(
+            row,
+            headers=["Change", "Path", "Affected app"],
+            **tabulate_formats
+        )
+    )
+    n_affected = len(set(app for apps in affected.values() for app in apps))
+    print("%d changed paths, affecting %d apps." % (len(changes), n_affected))
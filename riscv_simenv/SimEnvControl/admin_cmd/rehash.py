@@ -0,0 +1,94 @@
+import os
+import sys
+from typing import List, Tuple
+
+import click
+from natsort import natsorted
+
+from riscv_simenv.SyscallAnalysis.libsyscall.target_path_converter import TargetPathConverter
+from ..libsimenv.app_manifest import Manifest_t, rehash_manifest_fs_access, verify_manifest_format
+from ..libsimenv.autocomplete import complete_app_names
+from ..libsimenv.digest import HASH_ALGOS, get_manifest_hash_algo, is_valid_digest
+from ..libsimenv.hash_cache import HashCache, get_hash_cache_path
+from ..libsimenv.hash_engine import DEFAULT_HASH_JOBS, HashEngine
+from ..libsimenv.manifest_db import get_avail_apps_in_db, load_from_manifest_db, save_to_manifest_db
+from ..libsimenv.repo_path import get_repo_components_path
+from ..libsimenv.sysroots_db import get_pristine_sysroot_dir
+from ..libsimenv.utils import fatal, warning
+
+
+@click.command()
+@click.pass_context
+@click.option("--algo", "hash_algo", type=click.Choice(sorted(HASH_ALGOS)), required=True,
+              help="The new hash algorithm.")
+@click.option("-a", "--all", "rehash_all", is_flag=True,
+              help="Rehash the manifests of every app in the repository.")
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the files.")
+@click.argument("app-names", shell_complete=complete_app_names, type=click.STRING, nargs=-1)
+def cmd_rehash(ctx, hash_algo, rehash_all, hash_jobs, app_names):
+    """
+    Migrate the manifests of apps to another hash algorithm, rehashing their files in the pristine sysroots.
+
+    The post-run hashes of the files an app changed cannot be recomputed, they keep their former algorithm.
+    """
+    sysroots_archive_path, manifest_db_path, _ = get_repo_components_path(ctx.obj["repo_path"])
+    if not (rehash_all or app_names):
+        fatal("Specify the apps to rehash, or --all")
+    if rehash_all and app_names:
+        fatal("--all cannot be used together with an app name")
+    if rehash_all:
+        app_names = natsorted(get_avail_apps_in_db(manifest_db_path))
+
+    all_succeed = True
+    to_rehash = []  # type: List[Tuple[str, Manifest_t, str]]
+    for app in dict.fromkeys(app_names):
+        try:
+            manifest = load_from_manifest_db(app, manifest_db_path)
+            verify_manifest_format(manifest)
+        except FileNotFoundError:
+            warning(f"app {app} does not exist!")
+            all_succeed = False
+            continue
+        except ValueError as ve:
+            warning(f"app {app} has an incomplete or malformed manifest ({ve}), skipped")
+            all_succeed = False
+            continue
+        if get_manifest_hash_algo(manifest) == hash_algo:
+            print(f"App {app} is already hashed by {hash_algo}.")
+            continue
+        pristine_sysroot_path = get_pristine_sysroot_dir(sysroots_archive_path, manifest["app_pristine_sysroot"])
+        if not os.path.isdir(pristine_sysroot_path):
+            warning(f"the pristine sysroot of app {app} [{pristine_sysroot_path}] does not exist, skipped")
+            all_succeed = False
+            continue
+        to_rehash.append((app, manifest, pristine_sysroot_path))
+
+    # hash the pristine files of all the apps as a single batch
+    with HashCache(get_hash_cache_path(ctx.obj["repo_path"])) as hash_cache:
+        hash_engine = HashEngine(hash_jobs, hash_cache, hash_algo)
+        known_hashes = hash_engine.hash_files(
+            TargetPathConverter({"/": os.path.abspath(pristine_sysroot_path)}).t2h(path)
+            for _, manifest, pristine_sysroot_path in to_rehash
+            for path, detail in manifest["fs_access"].items()
+            if detail["hash"]["pre-run"] and is_valid_digest(detail["hash"]["pre-run"])
+        )
+    if to_rehash:
+        print(hash_engine.format_summary())
+
+    for app, manifest, pristine_sysroot_path in to_rehash:
+        try:
+            new_manifest, n_post_run_kept = rehash_manifest_fs_access(
+                manifest, pristine_sysroot_path, hash_algo, known_hashes
+            )
+        except (OSError, ValueError) as ex:
+            warning(f"fail to rehash app {app}, reason:\n{ex}")
+            all_succeed = False
+            continue
+        save_to_manifest_db(app, new_manifest, db_path=manifest_db_path)
+        print(f"Rehashed app {app} by {hash_algo}" + (
+            f", {n_post_run_kept} post-run hashes of changed files keep their former algorithm" if n_post_run_kept else ""
+        ))
+
+    if not all_succeed:
+        sys.exit(1)
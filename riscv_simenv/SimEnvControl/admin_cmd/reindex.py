@@ -0,0 +1,48 @@
+import sys
+
+import click
+from natsort import natsorted
+
+from ..libsimenv.autocomplete import complete_sysroot_names
+from ..libsimenv.hash_engine import DEFAULT_HASH_JOBS
+from ..libsimenv.repo_path import get_repo_components_path
+from ..libsimenv.sysroots_db import get_all_sysroots, index_sysroot, is_sysroot_available
+from ..libsimenv.utils import fatal, format_size, warning
+
+
+@click.command()
+@click.pass_context
+@click.option("-a", "--all", "reindex_all", is_flag=True,
+              help="Reindex every sysroot in the repository.")
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the files of the sysroot.")
+@click.argument("sysroot-names", shell_complete=complete_sysroot_names, type=click.STRING, nargs=-1)
+def cmd_reindex_sysroot(ctx, reindex_all, hash_jobs, sysroot_names):
+    """
+    Rebuild the index of pristine sysroots, e.g. of those imported before sysroots were indexed.
+    """
+    sysroots_archive_path, _, _ = get_repo_components_path(ctx.obj["repo_path"])
+    if not (reindex_all or sysroot_names):
+        fatal("Specify the sysroots to reindex, or --all")
+    if reindex_all and sysroot_names:
+        fatal("--all cannot be used together with a sysroot name")
+    if reindex_all:
+        sysroot_names = natsorted(get_all_sysroots(sysroots_archive_path))
+
+    all_succeed = True
+    for sysroot in sysroot_names:
+        if not is_sysroot_available(sysroots_archive_path, sysroot):
+            warning(f"sysroot {sysroot} does not exist!")
+            all_succeed = False
+            continue
+        print(f"Indexing sysroot {sysroot}...")
+        try:
+            index = index_sysroot(sysroots_archive_path, sysroot, hash_jobs)
+        except (OSError, ValueError) as ex:
+            warning(f"fail to index sysroot {sysroot}, reason:\n{ex}")
+            all_succeed = False
+        else:
+            print(f"  {len(index.entries)} entries, {format_size(index.get_total_size())}")
+
+    if not all_succeed:
+        sys.exit(1)
@@ -1,6 +1,7 @@
 import click
 
 from .checkpoint import cmd_show_checkpoint
+from .io_profile import cmd_show_io_profile
 from .manifest import cmd_show_manifest
 from .sysroot import cmd_show_sysroot
 
@@ -15,6 +16,7 @@ def cmd_group_show(ctx):
 
 
 cmd_group_show.add_command(cmd_show_checkpoint, name="checkpoint")
+cmd_group_show.add_command(cmd_show_io_profile, name="io-profile")
 cmd_group_show.add_command(cmd_show_manifest, name="manifest")
 cmd_group_show.add_command(cmd_show_sysroot, name="sysroot")
 tabulate_formats = {
@@ -0,0 +1,77 @@
+import sys
+
+import click
+from tabulate import tabulate
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.io_profile import FileIOProfile
+from ...libsimenv.app_manifest import verify_manifest_format
+from ...libsimenv.autocomplete import complete_app_names
+from ...libsimenv.manifest_db import is_app_available, load_from_manifest_db, prompt_app_name_suggestion
+from ...libsimenv.repo_path import get_repo_components_path
+from ...libsimenv.utils import fatal, format_size
+
+_SORT_KEYS = {
+    "total": lambda p: p.bytes_read + p.bytes_written,
+    "read": lambda p: p.bytes_read,
+    "write": lambda p: p.bytes_written,
+    "ops": lambda p: p.reads + p.writes + p.seeks,
+    "opens": lambda p: p.opens,
+    "first": lambda p: -p.first_seq,
+}
+
+
+@click.command()
+@click.pass_context
+@click.option("-s", "--sort", "sort_by", type=click.Choice(list(_SORT_KEYS)), default="total", show_default=True,
+              help="Rank the files by bytes transferred, number of I/O operations or opens, "
+                   "or the time of the first access.")
+@click.option("-n", "--top", type=click.IntRange(min=1),
+              help="Only list the first N files.")
+@click.argument("app-name", shell_complete=complete_app_names, type=click.STRING)
+def cmd_show_io_profile(ctx, sort_by, top, app_name):
+    """
+    Show how much I/O an app performed on each file during the bootstrap run.
+    """
+    from . import tabulate_formats
+
+    sysroots_archive_path, manifest_db_path, checkpoints_archive_path = get_repo_components_path(ctx.obj["repo_path"])
+    if not is_app_available(app_name, manifest_db_path):
+        print("Fatal: No manifest file for app '%s'" % app_name, file=sys.stderr)
+        prompt_app_name_suggestion(app_name, manifest_db_path)
+        sys.exit(-1)
+
+    manifest = load_from_manifest_db(app_name, manifest_db_path)
+    try:
+        verify_manifest_format(manifest)
+    except ValueError as ve:
+        fatal("%s has a malformed or incomplete manifest (%s)" % (app_name, ve))
+
+    profiles = {
+        path: FileIOProfile.build_from_dict(detail["io_profile"])
+        for path, detail in manifest["fs_access"].items() if "io_profile" in detail
+    }
+    if not profiles:
+        print("App %s has no I/O profile, re-run the analysis to collect it." % app_name)
+        return
+
+    ranked = sorted(profiles.items(), key=lambda kv: _SORT_KEYS[sort_by](kv[1]), reverse=True)
+    total = FileIOProfile()
+    for _, p in ranked:
+        total = total.merge(p)
+    row = []
+    for path, p in ranked[:top]:
+        row.append([
+            path, format_size(p.bytes_read), format_size(p.bytes_written), p.reads, p.writes, p.seeks,
+            p.opens, p.first_seq, p.last_seq
+        ])
+    print(
+        tabulate(
+            row,
+            headers=["Path", "Read", "Written", "Reads", "Writes", "Seeks", "Opens", "First seq", "Last seq"],
+            **tabulate_formats
+        )
+    )
+    print("%d files, %s read in %d reads, %s written in %d writes, %d seeks, %d opens." % (
+        len(profiles), format_size(total.bytes_read), total.reads, format_size(total.bytes_written), total.writes,
+        total.seeks, total.opens
+    ))
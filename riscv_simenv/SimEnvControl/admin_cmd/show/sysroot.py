@@ -4,13 +4,14 @@ from tabulate import tabulate
 
 from ...libsimenv.manifest_db import stat_app_sysroot_dependency
 from ...libsimenv.repo_path import get_repo_components_path
+from ...libsimenv.sysroot_index import load_sysroot_index
 from ...libsimenv.sysroots_db import get_all_sysroots, get_pristine_sysroot_dir
-from ...libsimenv.utils import get_size_str
+from ...libsimenv.utils import format_size, get_size_str
 
 
 @click.command()
 @click.option("--without-size", is_flag=True,
-              help="Skip calculating the size of each sysroot (therefore running faster).")
+              help="Skip calculating the size of the sysroots that are not indexed (therefore running faster).")
 @click.pass_context
 def cmd_show_sysroot(ctx, without_size):
     from . import tabulate_formats
@@ -29,15 +30,21 @@ def cmd_show_sysroot(ctx, without_size):
             dep = ", ".join(sysroots_apps_dep[sysroot])
         else:
             dep = '-'
-        sysroot_size = "-" if without_size else get_size_str(sysroot_path)
+        index = load_sysroot_index(sysroots_archive_path, sysroot)
+        if index:
+            sysroot_size = format_size(index.get_total_size())
+        elif without_size:
+            sysroot_size = "-"
+        else:
+            sysroot_size = get_size_str(sysroot_path)
         row.append(
-            [sysroot, sysroot_size, dep, sysroot_path]
+            [sysroot, sysroot_size, dep, "yes" if index else "no", sysroot_path]
         )
 
     print(
         tabulate(
             row,
-            headers=["Sysroot name", "Size", "Used by app", "Sysroot location"],
+            headers=["Sysroot name", "Size", "Used by app", "Indexed", "Sysroot location"],
             **tabulate_formats
         )
     )
@@ -2,12 +2,29 @@ import copy
 import json
 import os
 import pathlib
-from typing import Dict, Union, TextIO, Set, Tuple, List
-
-from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsageInfo, stat_file_usage
-from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Union, TextIO, Set, Tuple, List, Optional
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsageInfo, FileUsageAnalyzer
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_extents import Extent_t, FileExtentAnalyzer, \
+    clip_extents, coalesce_extents
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.io_profile import FileIOProfile, IOProfileAnalyzer
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_file import detect_strace_compression, is_binary_strace
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_follow import is_pid_alive
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_index import StraceIndexBuilder, get_strace_index_path
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor, \
+    DEFAULT_STRACE_PARSER
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.trace_stats import TraceProgressReporter, TraceStats, \
+    timed_phase
+from riscv_simenv.SyscallAnalysis.libsyscall.target_path_converter import TargetPathConverter
 from .content_manager import ContentManager
-from .utils import fatal, is_valid_sha256
+from .digest import HASH_ALGOS, get_manifest_hash_algo, is_valid_digest
+from .hash_cache import HashCache
+from .hash_engine import DEFAULT_HASH_JOBS, HashEngine
+from .sysroot_index import SysrootIndex
+from .trace_cache import TraceCache, TraceAnalysisResult_t
+from .utils import digest_extents, digest_file, fatal, warning
 
 Manifest_t = Dict[str, Union[str, Dict, List]]
 
@@ -29,26 +46,195 @@ def new_manifest(app_name, proxy_kernel, stdin_redir, app_cmd, app_init_cwd, mem
     return manifest
 
 
-def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim_sysroot_path, strace_fp):
-    # type: (Manifest_t, str, str, TextIO) -> Manifest_t
+def analyze_strace(strace_path, app_init_cwd, strace_parser=DEFAULT_STRACE_PARSER, stats=None, show_progress=False,
+                   follow_pid=None, strace_index_dir=None):
+    # type: (str, str, str, Optional[TraceStats], bool, Optional[int], Optional[str]) -> TraceAnalysisResult_t
+    """
+    Analyze a syscall trace. The result is JSON serializable so it can be kept in a TraceCache.
+    If follow_pid is given, the trace is analyzed while the process follow_pid is still writing it,
+    and the analysis finishes when that process exits.
+    If strace_index_dir is given, the seq_no index of the trace (see strace_index) is saved into it.
+    """
+    trace_analyzer = SyscallTraceConstructor(app_init_cwd, retain_syscalls=False, stats=stats, skip_irrelevant=True)
+    file_usage_analyzer = FileUsageAnalyzer()
+    io_profile_analyzer = IOProfileAnalyzer()
+    file_extent_analyzer = FileExtentAnalyzer()
+    event_bus = trace_analyzer.get_event_bus()
+    event_bus.subscribe(file_usage_analyzer.on_syscall, file_usage_analyzer.RELEVANT_SYSCALLS)
+    event_bus.subscribe(io_profile_analyzer.on_syscall, io_profile_analyzer.RELEVANT_SYSCALLS)
+    event_bus.subscribe(file_extent_analyzer.on_syscall, file_extent_analyzer.RELEVANT_SYSCALLS)
+    # the offsets of a compressed trace are positions in the decompressed stream,
+    # and a followed trace is not known to be compressed until it is opened
+    is_compressed = follow_pid is None and detect_strace_compression(strace_path) is not None
+    progress_reporter = None
+    if show_progress:
+        total_size = None if is_compressed or follow_pid is not None else os.path.getsize(strace_path)
+        progress_reporter = TraceProgressReporter(total_size)
+        event_bus.subscribe(progress_reporter.on_syscall, progress_reporter.RELEVANT_SYSCALLS)
+        event_bus.subscribe_skipped(progress_reporter.on_skipped)
+    index_builder = None
+    if strace_index_dir and not is_compressed and (follow_pid is not None or not is_binary_strace(strace_path)):
+        # index the text trace along the way, for "trace show --around"
+        index_builder = StraceIndexBuilder()
+        event_bus.subscribe(index_builder.on_syscall, index_builder.RELEVANT_SYSCALLS)
+        event_bus.subscribe_skipped(index_builder.on_skipped)
+    if follow_pid is not None:
+        trace_analyzer.follow_strace_file(strace_path, lambda: is_pid_alive(follow_pid), parser=strace_parser)
+        if detect_strace_compression(strace_path) is not None:
+            index_builder = None
+    else:
+        trace_analyzer.parse_strace_file(strace_path, parser=strace_parser)
+    if progress_reporter:
+        progress_reporter.finish()
+    if index_builder:
+        try:
+            index_builder.build().save(strace_path, get_strace_index_path(strace_index_dir, strace_path))
+        except OSError as ex:
+            # the index is only a debugging aid
+            warning(f"fail to save the index of syscall trace [{strace_path}]: {ex}")
+    return {
+        "file_usage": {path: str(usage) for path, usage in file_usage_analyzer.get_file_usage().items()},
+        "io_profile": {path: profile.to_dict() for path, profile in io_profile_analyzer.get_io_profile().items()},
+        "extents": {
+            path: None if extents is None else [list(e) for e in extents]
+            for path, extents in file_extent_analyzer.get_extents().items()
+        },
+    }
+
+
+def _analyze_strace_worker(strace_path, app_init_cwd, strace_parser, strace_index_dir):
+    # type: (str, str, str, Optional[str]) -> Tuple[TraceAnalysisResult_t, TraceStats]
+    stats = TraceStats()
+    result = analyze_strace(strace_path, app_init_cwd, strace_parser, stats=stats, strace_index_dir=strace_index_dir)
+    return result, stats
+
+
+def analyze_straces(strace_paths, app_init_cwd, trace_cache=None, strace_parser=DEFAULT_STRACE_PARSER, jobs=1,
+                    stats=None, show_progress=False, follow_pid=None, strace_index_dir=None):
+    # type: (List[str], str, Optional[TraceCache], str, int, Optional[TraceStats], bool, Optional[int], Optional[str]) -> List[TraceAnalysisResult_t]
+    """
+    Analyze several syscall traces of the same app, reusing the cached results when possible.
+    Several traces are analyzed concurrently by up to [jobs] processes, one trace per process.
+    If follow_pid is given, the only trace is analyzed while it is being written (see analyze_strace).
+    """
+    if follow_pid is not None:
+        if len(strace_paths) != 1:
+            raise ValueError("Only a single syscall trace can be followed")
+        # the trace is still incomplete, there is nothing to look up yet
+        result = analyze_strace(
+            strace_paths[0], app_init_cwd, strace_parser, stats, show_progress, follow_pid, strace_index_dir
+        )
+        if trace_cache is not None:
+            with timed_phase(stats, "cache_store"):
+                trace_cache.store(strace_paths[0], app_init_cwd, result)
+        return [result]
+
+    results = [None] * len(strace_paths)  # type: List[Optional[TraceAnalysisResult_t]]
+    if trace_cache is not None:
+        for idx, strace_path in enumerate(strace_paths):
+            with timed_phase(stats, "cache_lookup"):
+                results[idx] = trace_cache.lookup(strace_path, app_init_cwd)
+            if results[idx] is not None:
+                print(f"Reusing the cached analysis of syscall trace [{strace_path}].")
+                if stats:
+                    stats.cache_hits += 1
+    pending = [idx for idx, result in enumerate(results) if result is None]
+
+    if len(pending) == 1 or jobs == 1:
+        for idx in pending:
+            # the byte counter of a TraceStats is the end of the last record, so each trace gets its own
+            trace_stats = TraceStats() if stats else None
+            results[idx] = analyze_strace(
+                strace_paths[idx], app_init_cwd, strace_parser, trace_stats, show_progress,
+                strace_index_dir=strace_index_dir
+            )
+            if stats:
+                stats.merge(trace_stats)
+    elif pending:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as executor:
+            futures = {
+                idx: executor.submit(
+                    _analyze_strace_worker, strace_paths[idx], app_init_cwd, strace_parser, strace_index_dir
+                )
+                for idx in pending
+            }
+            for idx, future in futures.items():
+                results[idx], worker_stats = future.result()
+                print(f"Analyzed syscall trace [{strace_paths[idx]}].")
+                if stats:
+                    stats.merge(worker_stats)
+
+    if trace_cache is not None:
+        for idx in pending:
+            with timed_phase(stats, "cache_store"):
+                trace_cache.store(strace_paths[idx], app_init_cwd, results[idx])
+    return results
+
+
+def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim_sysroot_paths, strace_paths,
+                              strace_parser=DEFAULT_STRACE_PARSER, jobs=1, trace_cache=None, stats=None,
+                              show_progress=False, follow_pid=None, hash_cache=None, hash_jobs=DEFAULT_HASH_JOBS,
+                              pristine_index=None, hash_algo=None, strace_index_dir=None):
+    # type: (Manifest_t, str, List[str], List[str], str, int, Optional[TraceCache], Optional[TraceStats], bool, Optional[int], Optional[HashCache], int, Optional[SysrootIndex], Optional[str], Optional[str]) -> Manifest_t
+    """
+    Build manifest['fs_access'] from one or more bootstrap runs of the app, each one given as a
+    syscall trace with the sysroot it left behind (strace_paths[i] pairs with post_sim_sysroot_paths[i]).
+    The access information of all the runs is merged. If the runs leave different content at a path,
+    the conflict is reported and the post-run hash of the first run is kept.
+    If follow_pid is given, the single bootstrap run is still going on in the process follow_pid,
+    and its trace is analyzed as it is written.
+    The files are hashed up front by up to hash_jobs threads, through hash_cache if given,
+    except those of the pristine sysroot if its pristine_index is given.
+    They are hashed by hash_algo (see digest), or by the algorithm of the existing manifest if it is None.
+    The seq_no indexes of the traces are saved into strace_index_dir, if given.
+    """
     verify_manifest_format(existing_manifest, skip_extra_field=True)
+    if len(strace_paths) != len(post_sim_sysroot_paths) or not strace_paths:
+        raise ValueError("Each syscall trace must pair with one post-sim sysroot")
 
     manifest = copy.deepcopy(existing_manifest)
     app_cmd = manifest["app_cmd"]
     app_init_cwd = manifest["app_init_cwd"]
     app_proxy_kernel = manifest["app_proxy_kernel"]
-
-    content_manager = ContentManager(os.path.abspath(pristine_sysroot_path), os.path.abspath(post_sim_sysroot_path))
+    hash_algo = hash_algo or get_manifest_hash_algo(manifest)
+    if hash_algo not in HASH_ALGOS:
+        raise ValueError("Unknown hash algorithm %s" % hash_algo)
+    manifest["hash_algo"] = hash_algo
+
+    content_managers = [
+        ContentManager(
+            os.path.abspath(pristine_sysroot_path), os.path.abspath(post_sim_sysroot_path), hash_cache, pristine_index,
+            hash_algo
+        )
+        for post_sim_sysroot_path in post_sim_sysroot_paths
+    ]
 
     fs_access_dict = dict()
     manifest["fs_access"] = fs_access_dict
-
-    def manifest_add_fs_access_entry(_path, _file_usage):
-        # type: (str, FileUsageInfo) -> None
+    post_run_hash_conflicts = dict()  # type: Dict[str, Set[str]]
+
+    def manifest_set_extents(_entry, _pristine_file, _extents):
+        # type: (Dict, str, Optional[List[Extent_t]]) -> None
+        if _extents is None:
+            # the whole file is needed
+            _entry.pop("extents", None)
+            _entry.pop("extents_hash", None)
+            return
+        _extents = clip_extents(_extents, _entry["size"])
+        _entry["extents"] = [list(e) for e in _extents]
+        with timed_phase(stats, "hash_files"):
+            _entry["extents_hash"] = digest_extents(_pristine_file, _extents, hash_algo)
+
+    def manifest_add_fs_access_entry(_content_manager, _path, _file_usage, _io_profile=None, _extents=None):
+        # type: (ContentManager, str, FileUsageInfo, Optional[FileIOProfile], Optional[List[Extent_t]]) -> None
+        """
+        _extents is the byte ranges of the file the app accessed, None means the whole file.
+        """
         assert pathlib.PurePosixPath(_path).is_absolute()
 
-        pre_run_hash = content_manager.get_pristine_hash(_path)
-        post_run_hash = content_manager.get_post_sim_hash(_path)
+        with timed_phase(stats, "hash_files"):
+            pre_run_hash = _content_manager.get_pristine_hash(_path)
+            post_run_hash = _content_manager.get_post_sim_hash(_path)
 
         if not pre_run_hash and not _file_usage.has_create():
             raise ValueError(
@@ -69,8 +255,24 @@ def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim
         if _path in fs_access_dict:
             # merge if path entry already added
             stored_usage = FileUsageInfo.build_from_str(fs_access_dict[_path]["usage"])
-            new_usage = stored_usage | _file_usage
+            new_usage = stored_usage.merge_run(_file_usage)
             fs_access_dict[_path]["usage"] = str(new_usage)
+            stored_post_run_hash = fs_access_dict[_path]["hash"]["post-run"]
+            if stored_post_run_hash != post_run_hash:
+                post_run_hash_conflicts.setdefault(_path, {str(stored_post_run_hash)}).add(str(post_run_hash))
+            if _io_profile:
+                if "io_profile" in fs_access_dict[_path]:
+                    stored_io_profile = FileIOProfile.build_from_dict(fs_access_dict[_path]["io_profile"])
+                    _io_profile = stored_io_profile.merge(_io_profile)
+                fs_access_dict[_path]["io_profile"] = _io_profile.to_dict()
+            if "extents" in fs_access_dict[_path]:
+                if _extents is not None:
+                    _extents = coalesce_extents(
+                        [tuple(e) for e in fs_access_dict[_path]["extents"]] + [tuple(e) for e in _extents]
+                    )
+                manifest_set_extents(
+                    fs_access_dict[_path], _content_manager.locate_pristine_file(_path), _extents
+                )
         else:
             # create a new path entry
             fs_access_dict[_path] = {
@@ -80,16 +282,49 @@ def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim
                     "post-run": post_run_hash
                 }
             }
+            if _io_profile:
+                fs_access_dict[_path]["io_profile"] = _io_profile.to_dict()
+            if pre_run_hash and is_valid_digest(pre_run_hash):
+                fs_access_dict[_path]["size"] = _content_manager.get_pristine_size(_path)
+                manifest_set_extents(fs_access_dict[_path], _content_manager.locate_pristine_file(_path), _extents)
 
     # 1. Record the files accessed by the RISCV process
-    # 1.1 Analyze the syscall trace collected from the bootstrap run
-    trace_analyzer = SyscallTraceConstructor(app_init_cwd)
-    trace_analyzer.parse_strace_str(strace_fp.read())
-    file_usage_info = stat_file_usage(trace_analyzer.syscalls)
-    # 2.2 Record the analysis result (file access pattern of the RISCV process)
-    for path, file_usage in file_usage_info.items():
-        manifest_add_fs_access_entry(path, file_usage)
+    # 1.1 Analyze the syscall traces collected from the bootstrap runs
+    analyses = analyze_straces(
+        strace_paths, app_init_cwd, trace_cache, strace_parser, jobs, stats, show_progress, follow_pid,
+        strace_index_dir
+    )
+    # 1.2 Hash every file the runs accessed, in the post-sim (and pristine) sysroots, as a single batch
+    extra_target_paths = [p for p in (manifest["app_stdin_redir"], app_proxy_kernel) if p]
+    hash_engine = HashEngine(hash_jobs, hash_cache, hash_algo)
+    with timed_phase(stats, "hash_files"):
+        known_hashes = hash_engine.hash_files(
+            host_path
+            for idx, (content_manager, analysis) in enumerate(zip(content_managers, analyses))
+            for host_path in content_manager.locate_files_to_hash(
+                list(analysis["file_usage"]) + (extra_target_paths if idx == 0 else [])
+            )
+        )
+    print(hash_engine.format_summary())
+    for content_manager in content_managers:
+        content_manager.add_known_hashes(known_hashes)
+    # 1.3 Record the analysis result (file access pattern of the RISCV process)
+    for content_manager, analysis in zip(content_managers, analyses):
+        io_profiles = analysis["io_profile"]
+        path_extents = analysis["extents"]
+        for path, file_usage in analysis["file_usage"].items():
+            io_profile = FileIOProfile.build_from_dict(io_profiles[path]) if path in io_profiles else None
+            extents = path_extents.get(path)
+            manifest_add_fs_access_entry(
+                content_manager, path, FileUsageInfo.build_from_str(file_usage), io_profile,
+                None if extents is None else [tuple(e) for e in extents]
+            )
+    if post_run_hash_conflicts:
+        warning("The bootstrap runs left different content at %d paths:" % len(post_run_hash_conflicts))
+        for path, hashes in sorted(post_run_hash_conflicts.items()):
+            print("  %s: %s" % (path, ", ".join(sorted(hashes))), file=sys.stderr)
 
+    content_manager = content_managers[0]
     # 2. Handle extra input files
     readonly_usage = FileUsageInfo.build_from_str("FUSE_OPEN_RD | FUSE_READ_DATA")
     # 2.1 Handle the input via STDIN redirection (if used)
@@ -104,14 +339,14 @@ def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim
                 "but it is not found in the pristine sysroot [%s]" %
                 (stdin_file_target_path, content_manager.get_pristine_sysroot())
             )
-        manifest_add_fs_access_entry(stdin_file_target_path, readonly_usage)
+        manifest_add_fs_access_entry(content_manager, stdin_file_target_path, readonly_usage)
         print(f"Added STDIN redirection input [{stdin_file_target_path}] to the manifest.")
     # 2.2 Handle the proxy kernel
     if not content_manager.locate_pristine_file(app_proxy_kernel):
         fatal(
             f"Cannot find the proxy kernel inside the pristine sysroot at \"{app_proxy_kernel}\"."
         )
-    manifest_add_fs_access_entry(app_proxy_kernel, readonly_usage)
+    manifest_add_fs_access_entry(content_manager, app_proxy_kernel, readonly_usage)
     print(f"Added proxy kernel [{app_proxy_kernel}] to the manifest.")
 
     verify_manifest_fs_access_format(manifest)
@@ -119,6 +354,42 @@ def update_manifest_fs_access(existing_manifest, pristine_sysroot_path, post_sim
     return manifest
 
 
+def rehash_manifest_fs_access(existing_manifest, pristine_sysroot_path, hash_algo, known_hashes=None):
+    # type: (Manifest_t, str, str, Optional[Dict[str, str]]) -> Tuple[Manifest_t, int]
+    """
+    Return a copy of the manifest whose hashes are by hash_algo (see digest), recomputed from the pristine sysroot,
+    along with the number of post-run hashes left by their former algorithm: the post-run hash of a path the app
+    changed cannot be recomputed, as the post-sim sysroot is gone, but a hash tells which algorithm produced it.
+    known_hashes are the hashes by hash_algo of pristine files computed up front (see HashEngine), by host path.
+    """
+    verify_manifest_fs_access_format(existing_manifest)
+    if hash_algo not in HASH_ALGOS:
+        raise ValueError("Unknown hash algorithm %s" % hash_algo)
+    known_hashes = known_hashes or dict()
+
+    manifest = copy.deepcopy(existing_manifest)
+    manifest["hash_algo"] = hash_algo
+    path_converter = TargetPathConverter({"/": os.path.abspath(pristine_sysroot_path)})
+    n_post_run_kept = 0
+    for path, detail in manifest["fs_access"].items():
+        pre_run_hash = detail["hash"]["pre-run"]
+        post_run_hash = detail["hash"]["post-run"]
+        if pre_run_hash and is_valid_digest(pre_run_hash):
+            pristine_file = path_converter.t2h(path)
+            new_pre_run_hash = known_hashes.get(pristine_file) or digest_file(pristine_file, hash_algo)
+            detail["hash"]["pre-run"] = new_pre_run_hash
+            if post_run_hash == pre_run_hash:
+                detail["hash"]["post-run"] = new_pre_run_hash
+            if "extents" in detail:
+                detail["extents_hash"] = digest_extents(pristine_file, [tuple(e) for e in detail["extents"]], hash_algo)
+        if detail["hash"]["post-run"] and is_valid_digest(detail["hash"]["post-run"]) and not is_valid_digest(
+                detail["hash"]["post-run"], hash_algo):
+            n_post_run_kept += 1
+
+    verify_manifest_fs_access_format(manifest)
+    return manifest, n_post_run_kept
+
+
 def update_manifest_instret(existing_manifest, fesvr_final_state_fp):
     # type: (Manifest_t, TextIO) -> Manifest_t
     verify_manifest_format(existing_manifest, skip_extra_field=True)
@@ -199,7 +470,14 @@ def verify_manifest_instret(manifest):
 
 def verify_manifest_fs_access_format(manifest):
     # type: (Manifest_t) -> None
+    """
+    The pre-run and extents hashes must be by the hash algorithm of the manifest, while a post-run hash,
+    which cannot always be recomputed (see "repo rehash"), can be by any known algorithm.
+    """
     _ensure_dict_type(manifest, "fs_access")
+    if "hash_algo" in manifest:
+        _ensure_in_set(manifest, "hash_algo", set(HASH_ALGOS))
+    hash_algo = get_manifest_hash_algo(manifest)
     for fpath, detail in manifest["fs_access"].items():
         if not pathlib.PurePosixPath(fpath).is_absolute():
             raise ValueError("In manifest['fs_access'], the key %s is not a Posix absolute path." % fpath)
@@ -221,8 +499,8 @@ def verify_manifest_fs_access_format(manifest):
                 pass
             elif not isinstance(detail['hash']['pre-run'], str):
                 raise ValueError("Manifest['fs_access']['%s']['hash']['pre-run'] is invalid." % fpath)
-            elif detail['hash']['pre-run'] not in {"DIR", "SKIP"} and not is_valid_sha256(
-                    detail['hash']['pre-run']):
+            elif detail['hash']['pre-run'] not in {"DIR", "SKIP"} and not is_valid_digest(
+                    detail['hash']['pre-run'], hash_algo):
                 raise ValueError("Manifest['fs_access']['%s']['hash']['pre-run'] is invalid." % fpath)
 
             if "post-run" not in detail['hash']:
@@ -231,9 +509,28 @@ def verify_manifest_fs_access_format(manifest):
                 pass
             elif detail['hash']['post-run'] is not None and not isinstance(detail['hash']['post-run'], str):
                 raise ValueError("Manifest['fs_access']['%s']['hash']['post-run'] is invalid." % fpath)
-            elif detail['hash']['post-run'] not in {"DIR", "SKIP"} and not is_valid_sha256(
+            elif detail['hash']['post-run'] not in {"DIR", "SKIP"} and not is_valid_digest(
                     detail['hash']['post-run']):
                 raise ValueError("Manifest['fs_access']['%s']['hash']['post-run'] is invalid." % fpath)
+        if "size" in detail and not (isinstance(detail['size'], int) and detail['size'] >= 0):
+            raise ValueError("Manifest['fs_access']['%s']['size'] is invalid." % fpath)
+        if "extents" in detail:
+            if "size" not in detail:
+                raise ValueError("Manifest['fs_access']['%s'] has extents but no size." % fpath)
+            if not isinstance(detail['extents'], list) or not all(
+                    isinstance(e, list) and len(e) == 2 and all(isinstance(_, int) for _ in e) and 0 <= e[0] < e[1]
+                    for e in detail['extents']):
+                raise ValueError("Manifest['fs_access']['%s']['extents'] is invalid." % fpath)
+            if not isinstance(detail.get('extents_hash'), str) or not is_valid_digest(
+                    detail['extents_hash'], hash_algo):
+                raise ValueError("Manifest['fs_access']['%s']['extents_hash'] is invalid." % fpath)
+        if "io_profile" in detail:
+            # optional, manifests analyzed by older versions don't have it
+            if not isinstance(detail['io_profile'], dict):
+                raise ValueError("Manifest['fs_access']['%s']['io_profile'] must be a map." % fpath)
+            for field in FileIOProfile.FIELDS:
+                if not isinstance(detail['io_profile'].get(field), int):
+                    raise ValueError("Manifest['fs_access']['%s']['io_profile']['%s'] is invalid." % (fpath, field))
 
 
 def verify_manifest_format(manifest, skip_extra_field=False):
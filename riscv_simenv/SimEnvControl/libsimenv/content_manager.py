@@ -1,14 +1,29 @@
 import os
 import pathlib
-from typing import Optional
+from typing import Dict, Iterable, List, Optional
 
 from riscv_simenv.SyscallAnalysis.libsyscall.target_path_converter import TargetPathConverter
-from .utils import sha256
+from .digest import DEFAULT_HASH_ALGO
+from .hash_cache import HashCache
+from .sysroot_index import FTYPE_DIR, FTYPE_FILE, SysrootIndex
+from .utils import digest_file
 
 
 class ContentManager:
-    def __init__(self, pristine_sysroot, post_sim_sysroot):
-        # type: (str, str) -> None
+    """
+    The files are hashed by hash_algo (see digest).
+    If pristine_index is given, the questions about the pristine sysroot are answered from its index
+    (see SysrootIndex), without touching the sysroot, except for hashing its files by another algorithm
+    than the SHA-256 of the index. The symlinks of the sysroot are then followed within it (see SysrootIndex.resolve).
+    """
+
+    def __init__(self, pristine_sysroot, post_sim_sysroot, hash_cache=None, pristine_index=None,
+                 hash_algo=DEFAULT_HASH_ALGO):
+        # type: (str, str, Optional[HashCache], Optional[SysrootIndex], str) -> None
+        self.hash_cache = hash_cache
+        self.hash_algo = hash_algo
+        self.pristine_index = pristine_index
+        self.known_hashes = dict()  # type: Dict[str, str]
         self.post_sim_sysroot = post_sim_sysroot
         self.pristine_sysroot = pristine_sysroot
         self.pristine_path_convertor = TargetPathConverter({
@@ -28,6 +43,11 @@ class ContentManager:
 
     def locate_pristine_file(self, target_path):
         # type: (str) -> Optional[str]
+        if self.pristine_index is not None:
+            resolved_path = self.pristine_index.resolve(target_path)
+            if resolved_path is None:
+                return None
+            return self.pristine_path_convertor.t2h(resolved_path)
         expected_location = pathlib.PosixPath(
             self.pristine_path_convertor.t2h(target_path)
         )
@@ -47,12 +67,48 @@ class ContentManager:
         else:
             return None
 
-    @staticmethod
-    def do_sha256(res_path):
+    def get_pristine_size(self, target_path):
+        # type: (str) -> Optional[int]
+        if self.pristine_index is not None:
+            entry = self.pristine_index.lookup(target_path)
+            return None if entry is None else entry.size
+        res_path = self.locate_pristine_file(target_path)
+        return None if res_path is None else os.path.getsize(res_path)
+
+    def _has_indexed_hashes(self):
+        # type: () -> bool
+        return self.pristine_index is not None and self.hash_algo == DEFAULT_HASH_ALGO
+
+    def locate_files_to_hash(self, target_paths):
+        # type: (Iterable[str]) -> List[str]
+        """
+        Return the regular files at the target paths, in the post-sim sysroot and, unless the hashes
+        of its files are indexed, in the pristine sysroot.
+        """
+        host_paths = []
+        for target_path in target_paths:
+            res_paths = [self.locate_post_sim_file(target_path)]
+            if not self._has_indexed_hashes():
+                res_paths.append(self.locate_pristine_file(target_path))
+            for res_path in res_paths:
+                if res_path and os.path.isfile(res_path):
+                    host_paths.append(res_path)
+        return host_paths
+
+    def add_known_hashes(self, digests):
+        # type: (Dict[str, str]) -> None
+        """
+        Record the hashes of files computed up front (see HashEngine), for do_hash to return them.
+        """
+        self.known_hashes.update(digests)
+
+    def do_hash(self, res_path):
         # type: (str) -> Optional[str]
         if res_path:
-            if os.path.isfile(res_path):
-                return sha256(res_path)
+            if res_path in self.known_hashes:
+                return self.known_hashes[res_path]
+            elif os.path.isfile(res_path):
+                return digest_file(res_path, self.hash_algo, hash_cache=self.hash_cache)
             elif os.path.isdir(res_path):
                 return "DIR"
             elif os.path.exists(res_path):
@@ -64,12 +120,24 @@ class ContentManager:
 
     def get_pristine_hash(self, target_path):
         # type: (str) -> Optional[str]
+        if self.pristine_index is not None:
+            entry = self.pristine_index.lookup(target_path)
+            if entry is None:
+                return None
+            elif entry.ftype == FTYPE_FILE:
+                if not self._has_indexed_hashes():
+                    return self.do_hash(self.locate_pristine_file(target_path))
+                return entry.sha256
+            elif entry.ftype == FTYPE_DIR:
+                return "DIR"
+            else:
+                return "SKIP"
         res_path = self.locate_pristine_file(target_path)
 
-        return self.do_sha256(res_path)
+        return self.do_hash(res_path)
 
     def get_post_sim_hash(self, target_path):
         # type: (str) -> Optional[str]
         res_path = self.locate_post_sim_file(target_path)
 
-        return self.do_sha256(res_path)
+        return self.do_hash(res_path)
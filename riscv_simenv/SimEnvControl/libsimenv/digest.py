@@ -0,0 +1,53 @@
+"""
+The digest algorithms of the file hashes in the manifests.
+
+A manifest records its algorithm in manifest['hash_algo'], which defaults to sha256 for the manifests written
+before it existed. A SHA-256 hash is a bare hex string, as it always was, while the hashes of the other
+algorithms are prefixed by the name of the algorithm, e.g. "blake2b:<128 hex digits>", so any hash tells
+which algorithm produced it.
+"""
+
+import string
+from typing import Dict, Optional
+
+DEFAULT_HASH_ALGO = "sha256"
+# the algorithms, by name, with the length of their hex digest
+HASH_ALGOS = {
+    "sha256": 64,
+    "blake2b": 128,
+}  # type: Dict[str, int]
+
+
+def format_digest(algo, hexdigest):
+    # type: (str, str) -> str
+    return hexdigest if algo == DEFAULT_HASH_ALGO else "%s:%s" % (algo, hexdigest)
+
+
+def get_digest_algo(h):
+    # type: (str) -> Optional[str]
+    """
+    Return the algorithm of a hash, or None if it is not a valid hash of a known algorithm.
+    """
+    algo, sep, hexdigest = h.partition(":")
+    if not sep:
+        algo, hexdigest = DEFAULT_HASH_ALGO, h
+    elif algo == DEFAULT_HASH_ALGO:
+        # SHA-256 hashes are never prefixed
+        return None
+    if len(hexdigest) != HASH_ALGOS.get(algo) or not all(_ in string.hexdigits for _ in hexdigest):
+        return None
+    return algo
+
+
+def is_valid_digest(h, algo=None):
+    # type: (str, Optional[str]) -> bool
+    """
+    Whether h is the hash of a file (not "DIR" or "SKIP"), by the given algorithm or by any known one.
+    """
+    h_algo = get_digest_algo(h)
+    return h_algo is not None and (algo is None or h_algo == algo)
+
+
+def get_manifest_hash_algo(manifest):
+    # type: (Dict) -> str
+    return manifest.get("hash_algo", DEFAULT_HASH_ALGO)
@@ -0,0 +1,202 @@
+import hashlib
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from .digest import DEFAULT_HASH_ALGO, format_digest
+from .repo_path import get_cache_dir
+
+_HASH_CACHE_DB_NAME = "hash_cache.sqlite"
+DEFAULT_LRU_SIZE = 1 << 16
+# the stores are committed in batches, the cache only loses the latest hashes if the process is killed
+_COMMIT_INTERVAL = 256
+# a file changed less than this long ago may still change without its mtime/ctime changing
+# (the timestamps have a coarse granularity on some file systems), so its hash is not cached
+_RACY_WINDOW_NS = 2 * 10 ** 9
+
+# (st_dev, st_ino, st_size, st_mtime_ns, st_ctime_ns, algo)
+FileKey_t = Tuple[int, int, int, int, int, str]
+
+
+def get_hash_cache_path(repo_path):
+    # type: (str) -> str
+    return os.path.join(get_cache_dir(repo_path), _HASH_CACHE_DB_NAME)
+
+
+def hash_file(fpath, algo=DEFAULT_HASH_ALGO):
+    # type: (str, str) -> str
+    with open(fpath, "rb") as f:
+        # file_digest reads into a reusable buffer and hashes without holding the GIL
+        return format_digest(algo, hashlib.file_digest(f, algo).hexdigest())
+
+
+def _file_key(st, algo):
+    # type: (os.stat_result, str) -> FileKey_t
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, st.st_ctime_ns, algo
+
+
+class HashCache:
+    """
+    A cache of the hashes of files (see digest), keyed by what stat() tells about the file: its identity
+    (st_dev, st_ino) and its version (size, mtime_ns, ctime_ns), and by the hash algorithm. A file that changes
+    gets a new ctime, so its cached hash is never reused, and the hash of an unchanged file costs a stat().
+
+    The cache is kept in a SQLite DB (one row per inode and algorithm, the latest version replacing the older
+    ones) behind an in-process LRU of up to lru_size entries. Without a db_path, only the LRU is kept.
+    A DB that cannot be opened or written, e.g. in a read-only repo, is used for what it allows.
+    """
+
+    def __init__(self, db_path=None, lru_size=DEFAULT_LRU_SIZE):
+        # type: (Optional[str], int) -> None
+        self.db_path = db_path
+        self.lru_size = lru_size
+        self.lru = OrderedDict()  # type: OrderedDict[FileKey_t, str]
+        self.hits = 0
+        self.misses = 0
+        self.db = None  # type: Optional[sqlite3.Connection]
+        self._db_writable = False
+        self._n_uncommitted = 0
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        # type: (str) -> None
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.db = sqlite3.connect(db_path, timeout=30)
+            with self.db:
+                self.db.execute(
+                    "CREATE TABLE IF NOT EXISTS file_digests ("
+                    "  dev INTEGER, ino INTEGER, size INTEGER, mtime_ns INTEGER, ctime_ns INTEGER, algo TEXT, hash TEXT,"
+                    "  PRIMARY KEY (dev, ino, algo))"
+                )
+                has_sha256_table = self.db.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'file_hashes'"
+                ).fetchone()
+                if has_sha256_table:
+                    # the table of the caches written before the algorithm was part of the key, all SHA-256
+                    self.db.execute(
+                        "INSERT OR IGNORE INTO file_digests"
+                        "  SELECT dev, ino, size, mtime_ns, ctime_ns, 'sha256', hash FROM file_hashes"
+                    )
+                    self.db.execute("DROP TABLE file_hashes")
+            self._db_writable = True
+        except (OSError, sqlite3.Error):
+            if self.db is None and os.path.isfile(db_path):
+                try:
+                    self.db = sqlite3.connect("file:%s?mode=ro" % db_path, uri=True, timeout=30)
+                except sqlite3.Error:
+                    self.db = None
+
+    def close(self):
+        # type: () -> None
+        if self.db is not None:
+            self._commit()
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _commit(self):
+        # type: () -> None
+        if self._n_uncommitted:
+            try:
+                self.db.commit()
+            except sqlite3.Error:
+                self._db_writable = False
+            self._n_uncommitted = 0
+
+    def _lru_put(self, key, digest):
+        # type: (FileKey_t, str) -> None
+        self.lru[key] = digest
+        self.lru.move_to_end(key)
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+
+    def lookup(self, st, algo=DEFAULT_HASH_ALGO):
+        # type: (os.stat_result, str) -> Optional[str]
+        key = _file_key(st, algo)
+        digest = self.lru.get(key)
+        if digest is not None:
+            self.lru.move_to_end(key)
+            return digest
+        if self.db is None:
+            return None
+        try:
+            row = self.db.execute(
+                "SELECT hash FROM file_digests"
+                " WHERE dev = ? AND ino = ? AND size = ? AND mtime_ns = ? AND ctime_ns = ? AND algo = ?",
+                key
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        if row is None:
+            return None
+        self._lru_put(key, row[0])
+        return row[0]
+
+    def store(self, st, algo, digest):
+        # type: (os.stat_result, str, str) -> None
+        key = _file_key(st, algo)
+        self._lru_put(key, digest)
+        if self.db is None or not self._db_writable:
+            return
+        try:
+            self.db.execute("INSERT OR REPLACE INTO file_digests VALUES (?, ?, ?, ?, ?, ?, ?)", key + (digest,))
+        except sqlite3.Error:
+            # e.g. another process holds the lock for too long, the hash is still in the LRU
+            return
+        self._n_uncommitted += 1
+        if self._n_uncommitted >= _COMMIT_INTERVAL:
+            self._commit()
+
+    def store_if_stable(self, st, st_after, algo, digest):
+        # type: (os.stat_result, os.stat_result, str, str) -> None
+        """
+        Store the digest of a file that was stat'ed before (st) and after (st_after) being hashed,
+        unless it changed in the meantime or too recently to tell.
+        """
+        is_racy = time.time_ns() - max(st_after.st_mtime_ns, st_after.st_ctime_ns) < _RACY_WINDOW_NS
+        if _file_key(st, algo) == _file_key(st_after, algo) and not is_racy:
+            self.store(st, algo, digest)
+
+    def digest(self, fpath, algo=DEFAULT_HASH_ALGO):
+        # type: (str, str) -> str
+        st = os.stat(fpath)
+        digest = self.lookup(st, algo)
+        if digest is not None:
+            self.hits += 1
+            return digest
+        self.misses += 1
+        digest = hash_file(fpath, algo)
+        self.store_if_stable(st, os.stat(fpath), algo, digest)
+        return digest
+
+    def clear(self):
+        # type: () -> int
+        """
+        Drop every cached hash. Return the number of hashes dropped from the DB.
+        """
+        self.lru.clear()
+        if self.db is None:
+            return 0
+        with self.db:
+            n_dropped = self.db.execute("DELETE FROM file_digests").rowcount
+        self.db.execute("VACUUM")
+        return n_dropped
+
+    def get_stats(self):
+        # type: () -> Tuple[int, int]
+        """
+        Return (number of files with a hash in the DB, size of the DB file in bytes).
+        """
+        if self.db is None:
+            return 0, 0
+        n_files = self.db.execute("SELECT count(DISTINCT dev || ':' || ino) FROM file_digests").fetchone()[0]
+        return n_files, os.path.getsize(self.db_path)
@@ -0,0 +1,82 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .digest import DEFAULT_HASH_ALGO
+from .hash_cache import HashCache, hash_file
+
+# hashing is bound by the disk as much as by the CPU, more threads than this rarely help
+DEFAULT_HASH_JOBS = min(8, os.cpu_count() or 1)
+
+
+def _hash_one(fpath, algo):
+    # type: (str, str) -> Tuple[str, os.stat_result, os.stat_result]
+    st = os.stat(fpath)
+    digest = hash_file(fpath, algo)
+    return digest, st, os.stat(fpath)
+
+
+class HashEngine:
+    """
+    Hash batches of files concurrently on a pool of up to jobs threads (hashlib releases the GIL while hashing),
+    the largest files first so that a big file does not start last and hold up the whole batch.
+
+    The files with a hash in hash_cache are not read, and the new hashes are stored into it.
+    The cache is only used from the calling thread.
+    """
+
+    def __init__(self, jobs=DEFAULT_HASH_JOBS, hash_cache=None, algo=DEFAULT_HASH_ALGO):
+        # type: (int, Optional[HashCache], str) -> None
+        self.jobs = jobs
+        self.hash_cache = hash_cache
+        self.algo = algo
+        self.n_files = 0
+        self.n_cached = 0
+        self.bytes_hashed = 0
+        self.seconds = 0.0
+
+    def hash_files(self, fpaths):
+        # type: (Iterable[str]) -> Dict[str, str]
+        """
+        Return the hashes (see digest) of the given regular files, by path.
+        A file that cannot be stat'ed or read is left out, for the caller to report.
+        """
+        begin = time.perf_counter()
+        digests = dict()  # type: Dict[str, str]
+        todo = []  # type: List[Tuple[int, str]]
+        for fpath in set(fpaths):
+            try:
+                st = os.stat(fpath)
+            except OSError:
+                continue
+            digest = self.hash_cache.lookup(st, self.algo) if self.hash_cache else None
+            if digest is not None:
+                digests[fpath] = digest
+                self.n_cached += 1
+            else:
+                todo.append((st.st_size, fpath))
+        todo.sort(key=lambda t: (-t[0], t[1]))
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [(fpath, executor.submit(_hash_one, fpath, self.algo)) for _, fpath in todo]
+            for fpath, future in futures:
+                try:
+                    digest, st, st_after = future.result()
+                except OSError:
+                    continue
+                digests[fpath] = digest
+                self.bytes_hashed += st.st_size
+                if self.hash_cache:
+                    self.hash_cache.store_if_stable(st, st_after, self.algo, digest)
+
+        self.n_files += len(digests)
+        self.seconds += time.perf_counter() - begin
+        return digests
+
+    def format_summary(self):
+        # type: () -> str
+        return "Hashed %d files by %s (%d from the cache), %.1f MiB in %.2fs at %.1f MiB/s with %d threads" % (
+            self.n_files, self.algo, self.n_cached, self.bytes_hashed / (1 << 20), self.seconds,
+            self.bytes_hashed / (1 << 20) / self.seconds if self.seconds else 0.0, self.jobs
+        )
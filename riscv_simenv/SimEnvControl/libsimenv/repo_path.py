@@ -8,6 +8,7 @@ from typing import Optional, Tuple
 _MANIFEST_DB_DIR = "manifests"
 _CHECKPOINTS_DIR = "checkpoints"
 _SYSROOTS_DIR = "sysroots"
+_CACHE_DIR = "cache"
 
 
 def create_repo(path):
@@ -56,6 +57,16 @@ def get_sysroots_dir(repo_path):
     return os.path.join(repo_path, _SYSROOTS_DIR)
 
 
+def get_cache_dir(repo_path):
+    # type: (Optional[str]) -> Optional[str]
+    """
+    The cache dir is optional: it is created on demand, and a repo is still valid without it.
+    """
+    if not repo_path:
+        return None
+    return os.path.join(repo_path, _CACHE_DIR)
+
+
 def check_repo(repo_path):
     # type: (Optional[str]) -> None
 
@@ -0,0 +1,295 @@
+"""
+The index of a pristine sysroot, built when the sysroot is imported.
+
+A pristine sysroot is read-only and never changes, so the type, size, mode, symlink target and SHA-256 of
+each of its entries are recorded once, and the analysis no longer has to probe and hash the tree.
+The index is a gzip'ed TSV file next to the sysroot:
+
+    # riscv-simenv sysroot index v1
+    path    type    size    mode    link_target    sha256
+
+one row per entry, where path is the target path ("/" is the sysroot itself), type is one of f (regular file),
+d (directory), l (symbolic link) or o (anything else), mode is in octal, and link_target/sha256 are empty
+when they do not apply. A backslash, tab or newline in a path or link target is escaped as \\\\, \\t or \\n.
+
+The sha256 of a directory is its Merkle hash, over the name, type and hash of each of its entries
+(the SHA-256 of its target for a symlink), so two trees differ below a directory only if its hashes differ.
+The modes are left out, e.g. a simenv has the same tree hashes as its pristine sysroot
+although its files are writable.
+"""
+
+import gzip
+import hashlib
+import os
+import posixpath
+import stat
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from .hash_cache import HashCache
+from .hash_engine import DEFAULT_HASH_JOBS, HashEngine
+
+INDEX_HEADER = "# riscv-simenv sysroot index v1"
+_INDEX_SUFFIX = ".index.gz"
+
+FTYPE_FILE = "f"
+FTYPE_DIR = "d"
+FTYPE_SYMLINK = "l"
+FTYPE_OTHER = "o"
+
+# like MAXSYMLINKS of Linux, a path that goes through more symlinks is taken for a loop
+_MAX_SYMLINKS = 40
+
+SysrootIndexEntry = NamedTuple(
+    "SysrootIndexEntry",
+    [("ftype", str), ("size", int), ("mode", int), ("link_target", Optional[str]), ("sha256", Optional[str])]
+)
+
+
+def get_sysroot_index_path(sysroots_db_path, sysroot_name):
+    # type: (str, str) -> str
+    return os.path.join(sysroots_db_path, sysroot_name + _INDEX_SUFFIX)
+
+
+def _escape(s):
+    # type: (str) -> str
+    return s.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def _unescape(s):
+    # type: (str) -> str
+    if "\\" not in s:
+        return s
+    out = []
+    chars = iter(s)
+    for c in chars:
+        if c == "\\":
+            c = {"t": "\t", "n": "\n"}.get(next(chars), "\\")
+        out.append(c)
+    return "".join(out)
+
+
+def _ftype_of(st_mode):
+    # type: (int) -> str
+    if stat.S_ISREG(st_mode):
+        return FTYPE_FILE
+    elif stat.S_ISDIR(st_mode):
+        return FTYPE_DIR
+    elif stat.S_ISLNK(st_mode):
+        return FTYPE_SYMLINK
+    else:
+        return FTYPE_OTHER
+
+
+def _walk_sysroot(sysroot_path, follow_symlinks=False):
+    # type: (str, bool) -> Iterator[Tuple[str, str, os.stat_result]]
+    """
+    Yield (target path, host path, stat) for the sysroot and every entry in it.
+    If follow_symlinks is True, an entry that is a symlink is taken for what it points to, unless it is dangling.
+    """
+
+    def _stat(_path):
+        # type: (str) -> os.stat_result
+        if follow_symlinks:
+            try:
+                return os.stat(_path)
+            except FileNotFoundError:
+                pass
+        return os.lstat(_path)
+
+    yield "/", sysroot_path, _stat(sysroot_path)
+    for root, dirs, files in os.walk(sysroot_path, followlinks=follow_symlinks):
+        target_root = "/" + os.path.relpath(root, sysroot_path) if root != sysroot_path else ""
+        for name in dirs + files:
+            host_path = os.path.join(root, name)
+            yield target_root + "/" + name, host_path, _stat(host_path)
+
+
+def _tree_hash_of(entry):
+    # type: (SysrootIndexEntry) -> str
+    if entry.ftype == FTYPE_SYMLINK:
+        return hashlib.sha256(entry.link_target.encode("utf-8", "surrogateescape")).hexdigest()
+    return entry.sha256 or ""
+
+
+class SysrootIndex:
+    def __init__(self, entries):
+        # type: (Dict[str, SysrootIndexEntry]) -> None
+        self.entries = entries
+        self._children = None  # type: Optional[Dict[str, List[str]]]
+        if "/" in entries and entries["/"].sha256 is None:
+            self._compute_tree_hashes()
+
+    def get_children(self, dir_path):
+        # type: (str) -> List[str]
+        """
+        Return the names of the entries in a directory.
+        """
+        if self._children is None:
+            self._children = defaultdict(list)
+            for path in self.entries:
+                if path != "/":
+                    parent, name = posixpath.split(path)
+                    self._children[parent].append(name)
+        return self._children.get(dir_path, [])
+
+    def _compute_tree_hashes(self):
+        # type: () -> None
+        dir_paths = [path for path, e in self.entries.items() if e.ftype == FTYPE_DIR]
+        # the deepest directories first, so the hashes of the subdirectories are known
+        dir_paths.sort(key=lambda _p: _p.count("/") if _p != "/" else 0, reverse=True)
+        for dir_path in dir_paths:
+            h = hashlib.sha256()
+            for name in sorted(self.get_children(dir_path)):
+                child = self.entries[posixpath.join(dir_path, name)]
+                h.update(("%s\t%s\t%s\n" % (_escape(name), child.ftype, _tree_hash_of(child))).encode(
+                    "utf-8", "surrogateescape"
+                ))
+            self.entries[dir_path] = self.entries[dir_path]._replace(sha256=h.hexdigest())
+
+    @classmethod
+    def build(cls, sysroot_path, hash_jobs=DEFAULT_HASH_JOBS, hash_cache=None, follow_symlinks=False):
+        # type: (str, int, Optional[HashCache], bool) -> SysrootIndex
+        """
+        Index a directory tree: a pristine sysroot, or e.g. a simenv to compare with one,
+        whose files are better hashed through hash_cache then, and whose symlinks to the pristine files
+        are better followed.
+        """
+        entries = dict()  # type: Dict[str, SysrootIndexEntry]
+        host_paths = dict()  # type: Dict[str, str]
+        for target_path, host_path, st in _walk_sysroot(os.path.abspath(sysroot_path), follow_symlinks):
+            ftype = _ftype_of(st.st_mode)
+            link_target = os.readlink(host_path) if ftype == FTYPE_SYMLINK else None
+            entries[target_path] = SysrootIndexEntry(ftype, st.st_size, stat.S_IMODE(st.st_mode), link_target, None)
+            if ftype == FTYPE_FILE:
+                host_paths[host_path] = target_path
+        digests = HashEngine(hash_jobs, hash_cache).hash_files(host_paths)
+        for host_path, target_path in host_paths.items():
+            if host_path not in digests:
+                raise ValueError("Cannot read [%s]" % host_path)
+            entries[target_path] = entries[target_path]._replace(sha256=digests[host_path])
+        # the tree hashes are computed by the constructor
+        return cls(entries)
+
+    @classmethod
+    def load(cls, index_path):
+        # type: (str) -> SysrootIndex
+        entries = dict()  # type: Dict[str, SysrootIndexEntry]
+        with gzip.open(index_path, "rt", encoding="utf-8", errors="surrogateescape", newline="\n") as fp:
+            if fp.readline().rstrip("\n") != INDEX_HEADER:
+                raise ValueError("[%s] is not a sysroot index, or of an unsupported version" % index_path)
+            for line in fp:
+                try:
+                    path, ftype, size, mode, link_target, sha256 = line.rstrip("\n").split("\t")
+                    entries[_unescape(path)] = SysrootIndexEntry(
+                        ftype, int(size), int(mode, 8), _unescape(link_target) if ftype == FTYPE_SYMLINK else None,
+                        sha256 or None
+                    )
+                except ValueError:
+                    raise ValueError("Malformed line in sysroot index [%s]: %r" % (index_path, line))
+        return cls(entries)
+
+    def save(self, index_path):
+        # type: (str) -> None
+        tmp_path = index_path + ".tmp"
+        try:
+            with gzip.open(tmp_path, "wt", encoding="utf-8", errors="surrogateescape", newline="\n") as fp:
+                fp.write(INDEX_HEADER + "\n")
+                for path in sorted(self.entries):
+                    e = self.entries[path]
+                    fp.write("%s\t%s\t%d\t%o\t%s\t%s\n" % (
+                        _escape(path), e.ftype, e.size, e.mode, _escape(e.link_target or ""), e.sha256 or ""
+                    ))
+            os.replace(tmp_path, index_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def resolve(self, target_path):
+        # type: (str) -> Optional[str]
+        """
+        Return the path that target_path refers to once its symlinks are followed, or None if it does not exist,
+        e.g. because of a dangling symlink or a symlink loop. The symlinks are followed within the sysroot,
+        an absolute link target being relative to the sysroot, as they are for the simulated app.
+        """
+        pending = [name for name in reversed(target_path.split("/")) if name not in ("", ".")]
+        resolved = "/"
+        n_links = 0
+        while pending:
+            name = pending.pop()
+            if name == "..":
+                resolved = posixpath.dirname(resolved)
+                continue
+            path = posixpath.join(resolved, name)
+            entry = self.entries.get(path)
+            if entry is None:
+                return None
+            elif entry.ftype == FTYPE_SYMLINK:
+                n_links += 1
+                if n_links > _MAX_SYMLINKS:
+                    return None
+                if entry.link_target.startswith("/"):
+                    resolved = "/"
+                pending.extend(name for name in reversed(entry.link_target.split("/")) if name not in ("", "."))
+            elif pending and entry.ftype != FTYPE_DIR:
+                return None
+            else:
+                resolved = path
+        return resolved if resolved in self.entries else None
+
+    def lookup(self, target_path):
+        # type: (str) -> Optional[SysrootIndexEntry]
+        """
+        Return the entry that target_path refers to once its symlinks are followed (see resolve), like stat() does.
+        """
+        resolved = self.resolve(target_path)
+        return None if resolved is None else self.entries[resolved]
+
+    def get_total_size(self):
+        # type: () -> int
+        """
+        Return the total size of the regular files, like get_size does for the sysroot tree.
+        """
+        return sum(e.size for e in self.entries.values() if e.ftype == FTYPE_FILE)
+
+
+def diff_sysroot_indexes(old, new, ignore_missing=False):
+    # type: (SysrootIndex, SysrootIndex, bool) -> List[Tuple[str, str]]
+    """
+    Compare two indexed trees, only descending into the directories whose tree hashes differ.
+    Return the sorted (path, change) of the topmost paths that differ, where change is "added", "removed",
+    "modified" or "type changed". If ignore_missing is True, the paths missing from new are not reported.
+    """
+    changes = []  # type: List[Tuple[str, str]]
+    todo = ["/"]
+    while todo:
+        path = todo.pop()
+        old_entry = old.entries.get(path)
+        new_entry = new.entries.get(path)
+        if old_entry is None:
+            changes.append((path, "added"))
+        elif new_entry is None:
+            if not ignore_missing:
+                changes.append((path, "removed"))
+        elif old_entry.ftype != new_entry.ftype:
+            changes.append((path, "type changed"))
+        elif _tree_hash_of(old_entry) == _tree_hash_of(new_entry):
+            continue
+        elif old_entry.ftype == FTYPE_DIR:
+            names = set(old.get_children(path)).union(new.get_children(path))
+            todo.extend(posixpath.join(path, name) for name in names)
+        else:
+            changes.append((path, "modified"))
+    changes.sort()
+    return changes
+
+
+def load_sysroot_index(sysroots_db_path, sysroot_name):
+    # type: (str, str) -> Optional[SysrootIndex]
+    """
+    Return the index of a pristine sysroot, or None if the sysroot was imported without one.
+    """
+    index_path = get_sysroot_index_path(sysroots_db_path, sysroot_name)
+    if not os.path.isfile(index_path):
+        return None
+    return SysrootIndex.load(index_path)
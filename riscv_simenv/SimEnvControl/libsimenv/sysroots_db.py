@@ -3,24 +3,40 @@ import shutil
 import stat
 from typing import List, Tuple
 
+from .hash_engine import DEFAULT_HASH_JOBS
+from .sysroot_index import SysrootIndex, get_sysroot_index_path
 from .utils import remove_path
 
 
-def add_sysroot(sysroots_db_path, sysroot_name, src_path):
-    # type: (str, str, str) -> Tuple[bool, str]
+def add_sysroot(sysroots_db_path, sysroot_name, src_path, hash_jobs=DEFAULT_HASH_JOBS):
+    # type: (str, str, str, int) -> Tuple[bool, str]
     new_sysroot_path = get_pristine_sysroot_dir(sysroots_db_path, sysroot_name)
     try:
         shutil.copytree(src_path, new_sysroot_path, symlinks=False)
         set_dir_readonly_ugo(new_sysroot_path)
+        index_sysroot(sysroots_db_path, sysroot_name, hash_jobs)
     except Exception as ex:
         return False, str(ex)
     else:
         return True, ""
 
 
+def index_sysroot(sysroots_db_path, sysroot_name, hash_jobs=DEFAULT_HASH_JOBS):
+    # type: (str, str, int) -> SysrootIndex
+    """
+    Build the index of a pristine sysroot (see SysrootIndex), replacing the existing one.
+    """
+    index = SysrootIndex.build(get_pristine_sysroot_dir(sysroots_db_path, sysroot_name), hash_jobs)
+    index.save(get_sysroot_index_path(sysroots_db_path, sysroot_name))
+    return index
+
+
 def remove_sysroot(sysroots_db_path, sysroot_name):
     # type: (str, str) -> Tuple[bool, str]
     sysroot_to_remove_path = get_pristine_sysroot_dir(sysroots_db_path, sysroot_name)
+    succ, msg = remove_path(get_sysroot_index_path(sysroots_db_path, sysroot_name))
+    if not succ:
+        return succ, msg
     set_dir_writeable_u(sysroot_to_remove_path)
     return remove_path(sysroot_to_remove_path)
 
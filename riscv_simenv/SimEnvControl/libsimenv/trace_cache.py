@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .repo_path import get_cache_dir
+
+# Bump this whenever the analysis result stored in the cache changes its meaning or layout
+CACHE_FORMAT_VERSION = 5
+_CACHE_DB_NAME = "trace_cache.sqlite"
+_STRACE_INDEX_DIR = "strace_index"
+
+TraceAnalysisResult_t = Dict[str, Dict]
+
+TraceCacheEntry = NamedTuple(
+    "TraceCacheEntry", [
+        ("trace_hash", str),
+        ("app_init_cwd", str),
+        ("trace_path", str),
+        ("trace_size", int),
+        ("result_size", int),
+        ("created", float),
+        ("last_used", float),
+    ]
+)
+
+
+def get_trace_cache_path(repo_path):
+    # type: (str) -> str
+    return os.path.join(get_cache_dir(repo_path), _CACHE_DB_NAME)
+
+
+def get_strace_index_dir(repo_path):
+    # type: (str) -> str
+    """
+    The dir of the seq_no indexes of the analyzed traces (see strace_index), for "trace show --around".
+    """
+    return os.path.join(get_cache_dir(repo_path), _STRACE_INDEX_DIR)
+
+
+class TraceCache:
+    """
+    A persistent cache of syscall trace analysis results, keyed by the content hash of
+    the trace and the app's initial working dir (which decides how relative paths resolve).
+
+    Hashing a large trace is still much faster than parsing it, and the hash of an
+    unchanged file (same path, size and mtime) is memorized so a cache hit costs a stat().
+    """
+
+    def __init__(self, db_path):
+        # type: (str) -> None
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.db = sqlite3.connect(db_path)
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS trace_files ("
+                "  path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, hash TEXT)"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS analysis ("
+                "  trace_hash TEXT, app_init_cwd TEXT, version INTEGER,"
+                "  trace_path TEXT, trace_size INTEGER, result TEXT, created REAL, last_used REAL,"
+                "  PRIMARY KEY (trace_hash, app_init_cwd, version))"
+            )
+
+    def close(self):
+        # type: () -> None
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get_trace_hash(self, trace_path):
+        # type: (str) -> str
+        trace_path = os.path.realpath(trace_path)
+        st = os.stat(trace_path)
+        row = self.db.execute(
+            "SELECT hash FROM trace_files WHERE path = ? AND size = ? AND mtime_ns = ?",
+            (trace_path, st.st_size, st.st_mtime_ns)
+        ).fetchone()
+        if row:
+            return row[0]
+
+        h = hashlib.sha256()
+        with open(trace_path, "rb") as fp:
+            while True:
+                data = fp.read(1 << 20)
+                if not data:
+                    break
+                h.update(data)
+        trace_hash = h.hexdigest()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO trace_files VALUES (?, ?, ?, ?)",
+                (trace_path, st.st_size, st.st_mtime_ns, trace_hash)
+            )
+        return trace_hash
+
+    def lookup(self, trace_path, app_init_cwd):
+        # type: (str, str) -> Optional[TraceAnalysisResult_t]
+        trace_hash = self.get_trace_hash(trace_path)
+        row = self.db.execute(
+            "SELECT result FROM analysis WHERE trace_hash = ? AND app_init_cwd = ? AND version = ?",
+            (trace_hash, app_init_cwd, CACHE_FORMAT_VERSION)
+        ).fetchone()
+        if not row:
+            return None
+        with self.db:
+            self.db.execute(
+                "UPDATE analysis SET last_used = ? WHERE trace_hash = ? AND app_init_cwd = ? AND version = ?",
+                (time.time(), trace_hash, app_init_cwd, CACHE_FORMAT_VERSION)
+            )
+        return json.loads(row[0])
+
+    def store(self, trace_path, app_init_cwd, result):
+        # type: (str, str, TraceAnalysisResult_t) -> None
+        trace_hash = self.get_trace_hash(trace_path)
+        now = time.time()
+        with self.db:
+            self.db.execute(
+                "INSERT OR REPLACE INTO analysis VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (trace_hash, app_init_cwd, CACHE_FORMAT_VERSION, os.path.realpath(trace_path),
+                 os.path.getsize(trace_path), json.dumps(result, separators=(",", ":")), now, now)
+            )
+
+    def list_entries(self):
+        # type: () -> List[TraceCacheEntry]
+        return [
+            TraceCacheEntry(*row) for row in self.db.execute(
+                "SELECT trace_hash, app_init_cwd, trace_path, trace_size, length(result), created, last_used "
+                "FROM analysis ORDER BY last_used DESC"
+            )
+        ]
+
+    def evict(self, trace_hash_prefix=None, older_than=None):
+        # type: (Optional[str], Optional[float]) -> int
+        """
+        Evict the entries whose trace hash starts with trace_hash_prefix and/or that have not
+        been used since the timestamp older_than. With neither given, the whole cache is dropped.
+        Return the number of evicted entries.
+        """
+        conds = []  # type: List[str]
+        params = []  # type: List
+        if trace_hash_prefix:
+            conds.append("substr(trace_hash, 1, ?) = ?")
+            params.extend((len(trace_hash_prefix), trace_hash_prefix.lower()))
+        if older_than is not None:
+            conds.append("last_used < ?")
+            params.append(older_than)
+        where = (" WHERE " + " AND ".join(conds)) if conds else ""
+        with self.db:
+            n_evicted = self.db.execute("DELETE FROM analysis" + where, params).rowcount
+            # forget the memorized hash of trace files that are gone or no longer referenced
+            self.db.execute(
+                "DELETE FROM trace_files WHERE hash NOT IN (SELECT trace_hash FROM analysis)"
+            )
+        self.db.execute("VACUUM")
+        return n_evicted
+
+    def get_stats(self):
+        # type: () -> Tuple[int, int]
+        """
+        Return (number of entries, size of the cache file in bytes).
+        """
+        n_entries = self.db.execute("SELECT count(*) FROM analysis").fetchone()[0]
+        return n_entries, os.path.getsize(self.db_path)
@@ -1,33 +1,46 @@
 import hashlib
 import os
+import re
 import shutil
-import string
 import sys
+from typing import Iterable, Optional, Tuple, Union
 
-__sha256_cache = {}  # type: dict[str, str]
+from .digest import DEFAULT_HASH_ALGO, format_digest
+from .hash_cache import HashCache, hash_file
 
+# the hashes computed by this process, when no repo hash cache is given
+_process_hash_cache = HashCache()
 
-def sha256(fpath, use_cache=True):
-    # type: (str, bool) -> str
-    global __sha256_cache
-    if use_cache and fpath in __sha256_cache:
-        return __sha256_cache[fpath]
-    BUF_SIZE = 65536
-    h = hashlib.sha256()
-    with open(fpath, 'rb') as f:
-        while True:
-            data = f.read(BUF_SIZE)
-            if not data:
-                break
-            h.update(data)
-    sha256_hash = h.hexdigest()
-    __sha256_cache[fpath] = sha256_hash
-    return sha256_hash
+
+def digest_file(fpath, algo=DEFAULT_HASH_ALGO, use_cache=True, hash_cache=None):
+    # type: (str, str, bool, Optional[HashCache]) -> str
+    """
+    Hash a file by algo (see digest), through hash_cache (see HashCache), or the in-process cache if it is None.
+    """
+    if not use_cache:
+        return hash_file(fpath, algo)
+    return (hash_cache or _process_hash_cache).digest(fpath, algo)
 
 
-def is_valid_sha256(h):
-    # type: (str) -> bool
-    return len(h) == 64 and all(_ in string.hexdigits for _ in h)
+def digest_extents(fpath, extents, algo=DEFAULT_HASH_ALGO):
+    # type: (str, Iterable[Tuple[int, int]], str) -> str
+    """
+    Hash the content of a file within the given [start, end) extents, along with the extents themselves.
+    """
+    BUF_SIZE = 65536
+    h = hashlib.new(algo)
+    with open(fpath, 'rb') as f:
+        for start, end in extents:
+            h.update(b"%d-%d:" % (start, end))
+            f.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = f.read(min(BUF_SIZE, remaining))
+                if not data:
+                    break
+                h.update(data)
+                remaining -= len(data)
+    return format_digest(algo, h.hexdigest())
 
 
 def remove_path(p):
@@ -85,7 +98,13 @@ def get_size(path):
 
 def get_size_str(path):
     # type: (str) -> str
-    size = get_size(path)
+    return format_size(get_size(path))
+
+
+def format_size(size):
+    # type: (Union[int, Tuple[Union[int, float], str]]) -> str
+    if isinstance(size, int):
+        size = human_readable_size(size)
     if isinstance(size[0], int):
         str_size = "%d %s" % size
     else:
@@ -94,6 +113,17 @@ def get_size_str(path):
     return str_size
 
 
+def parse_size(size_str):
+    # type: (str) -> int
+    """
+    Parse a size like "4096", "512K", "1.5G" or "2 TB", in the binary units printed by format_size.
+    """
+    m = re.fullmatch(r"(\d+(?:\.\d*)?)\s*([KMGT]?)B?", size_str.strip().upper())
+    if not m:
+        raise ValueError("%s is not a valid size" % size_str)
+    return int(float(m.group(1)) * (1 << (10 * " KMGT".index(m.group(2) or " "))))
+
+
 def fatal(s):
     # type: (str) -> None
     print("Fatal: %s" % s, file=sys.stderr)
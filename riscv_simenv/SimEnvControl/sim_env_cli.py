@@ -5,6 +5,7 @@ from .admin_cmd import cmd_group_repo
 # To support auto-completion in bash 4.2 shipped with CentOS 7
 from .libsimenv.click_bash42_completion import patch
 from .libsimenv.repo_path import get_default_repo_path
+from .trace_cmd import cmd_group_trace
 from .user_cmd.list import cmd_list
 from .user_cmd.mkgen import cmd_mkgen
 from .user_cmd.spawn import cmd_env_spawn
@@ -33,3 +34,4 @@ cli.add_command(cmd_mkgen, name="mkgen")
 cli.add_command(cmd_env_spawn, name="spawn")
 cli.add_command(cmd_env_verify, name="verify")
 cli.add_command(cmd_group_repo, name="repo")
+cli.add_command(cmd_group_trace, name="trace")
@@ -0,0 +1,19 @@
+import click
+
+from .compact import cmd_trace_compact
+from .show import cmd_trace_show
+from .stats import cmd_trace_stats
+
+
+@click.group()
+@click.pass_context
+def cmd_group_trace(ctx):
+    """
+    Inspect and analyze syscall traces.
+    """
+    pass
+
+
+cmd_group_trace.add_command(cmd_trace_compact, name="compact")
+cmd_group_trace.add_command(cmd_trace_show, name="show")
+cmd_group_trace.add_command(cmd_trace_stats, name="stats")
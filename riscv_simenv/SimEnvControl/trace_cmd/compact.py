@@ -0,0 +1,52 @@
+import os
+
+import click
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_binary import BinaryStraceWriter
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_file import is_binary_strace, open_strace_file
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import DEFAULT_STRACE_PARSER, \
+    STRACE_PARSERS
+from ..libsimenv.utils import fatal, format_size
+
+
+@click.command()
+@click.option("--parser", "strace_parser", type=click.Choice(sorted(STRACE_PARSERS.keys())),
+              default=DEFAULT_STRACE_PARSER, show_default=True,
+              help="The strace parser backend.")
+@click.option("--collapse", is_flag=True,
+              help="Collapse consecutive successful reads (or writes) on the same fd into a single record. "
+                   "This is lossy: the accessed files and byte ranges are kept, "
+                   "but the syscall counts and seq_no are not.")
+@click.option("-f", "--force", is_flag=True,
+              help="Overwrite OUTPUT if it exists.")
+@click.argument("syscall-trace", type=click.Path(exists=True, dir_okay=False))
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+def cmd_trace_compact(strace_parser, collapse, force, syscall_trace, output):
+    """
+    Convert a text syscall trace into the compact binary format.
+
+    The analyzer reads both formats, the binary one being much smaller and faster to parse.
+    """
+    if is_binary_strace(syscall_trace):
+        fatal("[%s] is already a compact syscall trace" % syscall_trace)
+    if os.path.exists(output) and not force:
+        fatal("[%s] already exists, use --force to overwrite it" % output)
+
+    tmp_output = output + ".tmp"
+    try:
+        with open_strace_file(syscall_trace) as fp_in, open(tmp_output, "wb") as fp_out:
+            writer = BinaryStraceWriter(fp_out, collapse)
+            for record, _, _ in STRACE_PARSERS[strace_parser].parse_stream(fp_in):
+                writer.write(record)
+            writer.flush()
+        os.replace(tmp_output, output)
+    finally:
+        if os.path.exists(tmp_output):
+            os.remove(tmp_output)
+
+    in_size = os.path.getsize(syscall_trace)
+    out_size = os.path.getsize(output)
+    print("Wrote %d records for %d syscalls, %s -> %s (%.1f%%)" % (
+        writer.n_records_out, writer.n_records_in, format_size(in_size), format_size(out_size),
+        out_size / in_size * 100 if in_size else 0.0
+    ))
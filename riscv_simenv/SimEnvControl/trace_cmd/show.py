@@ -0,0 +1,71 @@
+import click
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_file import STRACE_ENCODING, detect_strace_compression, \
+    is_binary_strace
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_index import StraceIndex, build_strace_index, \
+    get_strace_index_path, read_strace_window
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_parser import StraceRecord
+from riscv_simenv.SyscallAnalysis.libsyscall.syscalls.syscall import SyscallArgStrPtr
+from ..libsimenv.trace_cache import get_strace_index_dir
+from ..libsimenv.utils import fatal
+
+
+def format_record(seq_no, record, highlight):
+    # type: (int, StraceRecord, bool) -> str
+    args = []
+    for arg in record.syscall_args:
+        if isinstance(arg, SyscallArgStrPtr):
+            args.append("%s=%r" % (arg.aname, arg.amemval))
+        else:
+            args.append("%s=%d" % (arg.aname, arg.avalue))
+    return "%s #%d [%d] %s(%s) -> %d" % (
+        ">>" if highlight else "  ", seq_no, record.syscall_id, record.syscall_name, ", ".join(args), record.ret_code
+    )
+
+
+@click.command()
+@click.pass_context
+@click.option("-n", "--around", "seq_no", type=click.IntRange(min=0), required=True,
+              help="The seq_no of the syscall to show, as reported by the analyzer.")
+@click.option("-w", "--window", type=click.IntRange(min=0), default=5, show_default=True,
+              help="Number of syscalls to show before and after it.")
+@click.option("--raw", is_flag=True,
+              help="Print the records as they appear in the trace.")
+@click.argument("syscall-trace", type=click.Path(exists=True, dir_okay=False))
+def cmd_trace_show(ctx, seq_no, window, raw, syscall_trace):
+    """
+    Show the syscalls around the N-th one in a syscall trace.
+
+    The records are reached through the index of the trace in the repository cache (written by analyze),
+    which is built and saved first if it is missing or out of date. Without a repository,
+    the index is built and not saved.
+    """
+    if detect_strace_compression(syscall_trace):
+        fatal("Cannot seek in a compressed trace, decompress [%s] first" % syscall_trace)
+    if is_binary_strace(syscall_trace):
+        fatal("Cannot seek in a compact trace, use the text trace [%s] was made from" % syscall_trace)
+
+    repo_path = ctx.obj["repo_path"]
+    index_path = get_strace_index_path(get_strace_index_dir(repo_path), syscall_trace) if repo_path else None
+    index = StraceIndex.load(syscall_trace, index_path) if index_path else None
+    if index is None:
+        print("Indexing %s..." % syscall_trace)
+        index = build_strace_index(syscall_trace)
+        if index_path:
+            try:
+                index.save(syscall_trace, index_path)
+            except OSError:
+                pass
+
+    records = read_strace_window(syscall_trace, index, seq_no, window, window)
+    if not records or records[-1][0] < seq_no:
+        fatal("The trace has no syscall #%d" % seq_no)
+    if raw:
+        with open(syscall_trace, "rb") as fp:
+            for rec_seq_no, _, start, end in records:
+                fp.seek(start)
+                print("# seq_no %d%s" % (rec_seq_no, " <<<" if rec_seq_no == seq_no else ""))
+                print(fp.read(end - start).decode(STRACE_ENCODING).strip())
+    else:
+        for rec_seq_no, record, _, _ in records:
+            print(format_record(rec_seq_no, record, rec_seq_no == seq_no))
@@ -0,0 +1,58 @@
+import click
+from tabulate import tabulate
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import \
+    DEFAULT_STRACE_PARSER, STRACE_PARSERS, SyscallTraceConstructor
+from ..libsimenv.utils import fatal
+
+
+@click.command()
+@click.option("-c", "--init-cwd", default="/", show_default=True,
+              help="The initial working directory of the traced app.")
+@click.option("--parser", "strace_parser", type=click.Choice(sorted(STRACE_PARSERS.keys())),
+              default=DEFAULT_STRACE_PARSER, show_default=True,
+              help="The strace parser backend.")
+@click.option("-n", "--top", type=click.IntRange(min=1), default=10, show_default=True,
+              help="Number of paths to list in the I/O ranking.")
+@click.argument("syscall-trace", type=click.Path(exists=True, dir_okay=False))
+@click.pass_context
+def cmd_trace_stats(ctx, init_cwd, strace_parser, top, syscall_trace):
+    """
+    Print syscall and I/O statistics of a syscall trace.
+    """
+    from ..admin_cmd.show import tabulate_formats
+    try:
+        from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_table import SyscallTableBuilder
+    except ImportError:
+        fatal("Trace statistics require NumPy, install riscv-simenv with the \"analytics\" extra")
+        return
+
+    trace_cntr = SyscallTraceConstructor(init_cwd, retain_syscalls=False)
+    table_builder = SyscallTableBuilder()
+    trace_cntr.get_event_bus().subscribe(table_builder.on_syscall)
+    trace_cntr.parse_strace_file(syscall_trace, parser=strace_parser)
+    table = table_builder.build()
+
+    histogram = table.syscall_histogram()
+    failed = table.failed_call_counts()
+    print("%d syscalls in trace %s" % (len(table), syscall_trace))
+    print(
+        tabulate(
+            sorted(
+                ([name, cnt, failed.get(name, 0)] for name, cnt in histogram.items()),
+                key=lambda r: r[1], reverse=True
+            ),
+            headers=["Syscall", "Count", "Failed"],
+            **tabulate_formats
+        )
+    )
+
+    io_by_path = table.io_bytes_by_path()
+    ranking = sorted(io_by_path.items(), key=lambda kv: sum(kv[1]), reverse=True)[:top]
+    print(
+        tabulate(
+            [[path, rd, wr, rd + wr] for path, (rd, wr) in ranking],
+            headers=["Path", "Bytes read", "Bytes written", "Total"],
+            **tabulate_formats
+        )
+    )
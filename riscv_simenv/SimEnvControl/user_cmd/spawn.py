@@ -2,17 +2,30 @@ import os
 import shutil
 import stat
 import sys
+from typing import List, NamedTuple, Optional, Set, Tuple
 
 import click
 
 from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsageInfo
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.io_profile import FileIOProfile
 from riscv_simenv.SyscallAnalysis.libsyscall.target_path_converter import TargetPathConverter
 from ..libsimenv.app_manifest import Manifest_t, verify_manifest_format, verify_manifest_fs_access_format
 from ..libsimenv.autocomplete import complete_app_names
+from ..libsimenv.digest import is_valid_digest
 from ..libsimenv.manifest_db import load_from_manifest_db, prompt_app_name_suggestion
 from ..libsimenv.repo_path import get_repo_components_path
 from ..libsimenv.sysroots_db import get_pristine_sysroot_dir, set_dir_writeable_u
-from ..libsimenv.utils import fatal, remove_path
+from ..libsimenv.utils import fatal, format_size, parse_size, remove_path
+
+# copy the files that would be symlinked but are hot in the bootstrap run, i.e. opened at least min_opens times
+# or with at least min_bytes_read bytes read, as long as the copies take at most budget bytes (None: no limit)
+HotCopyPolicy = NamedTuple(
+    "HotCopyPolicy", [
+        ("min_opens", Optional[int]),
+        ("min_bytes_read", Optional[int]),
+        ("budget", Optional[int]),
+    ]
+)
 
 
 def usage_must_copy_spawn(usage):
@@ -44,10 +57,79 @@ def usage_must_writable(usage):
     )
 
 
-def spawn_file(src, dst, usage, copy_mode):
-    # type: (str, str, FileUsageInfo, bool) -> bool
+def usage_can_elide_content(usage):
+    # type: (FileUsageInfo) -> bool
+    """
+    Check whether the app never observes the content of a file based on its usage, so the spawned file
+    does not need it: a file the app only stat'ed only needs its size, and a file it truncated on its first
+    open can start empty.
+    """
+    return usage.is_stat_only() or usage.is_truncated_first()
+
+
+def select_hot_files(candidates, policy):
+    # type: (List[Tuple[str, int, FileIOProfile]], HotCopyPolicy) -> Tuple[Set[str], int]
+    """
+    Pick the hot files to copy among the candidates, given as (path, bytes to copy, I/O profile).
+    The most opened files (then the most read) are picked first, and a file that does not fit in what is
+    left of the budget is skipped in favor of the smaller ones after it.
+    Return the picked paths and the bytes they take.
+    """
+    def is_hot(_profile):
+        # type: (FileIOProfile) -> bool
+        return (
+                (policy.min_opens is not None and _profile.opens >= policy.min_opens) or
+                (policy.min_bytes_read is not None and _profile.bytes_read >= policy.min_bytes_read)
+        )
+
+    hot = sorted(
+        (c for c in candidates if is_hot(c[2])),
+        key=lambda c: (-c[2].opens, -c[2].bytes_read, c[1], c[0])
+    )
+    picked = set()  # type: Set[str]
+    used = 0
+    for path, size, _ in hot:
+        if policy.budget is not None and used + size > policy.budget:
+            continue
+        picked.add(path)
+        used += size
+    return picked, used
+
+
+def sparse_copy(src, dst, size, extents):
+    # type: (str, str, int, List[Tuple[int, int]]) -> int
+    """
+    Create dst as a sparse file of the given size, with only the extents filled from src.
+    Return the number of bytes copied.
+    """
+    BUF_SIZE = 1 << 20
+    copied = 0
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fdst.truncate(size)
+        for start, end in extents:
+            fsrc.seek(start)
+            fdst.seek(start)
+            remaining = end - start
+            while remaining > 0:
+                data = fsrc.read(min(BUF_SIZE, remaining))
+                if not data:
+                    break
+                fdst.write(data)
+                remaining -= len(data)
+                copied += len(data)
+    shutil.copystat(src, dst)
+    return copied
+
+
+def spawn_file(src, dst, usage, copy_mode, sparse_info=None, elide=False):
+    # type: (str, str, FileUsageInfo, bool, Optional[Tuple[int, List[Tuple[int, int]]]], bool) -> bool
     """
     Spawns a new file from src to dst.
+    If sparse_info (size, extents) is given, a copy-spawned file is materialized as a sparse file
+    with only the extents accessed by the app.
+    If elide is True, a file whose content the app never observes is materialized without it
+    (see usage_can_elide_content): as a sparse file of the same size if the app only stat'ed it,
+    or as an empty file if the app truncated it on open.
 
     Return True if file was spawn as a symbolic link.
     Return False if file was spawn as a copy of origin.
@@ -58,7 +140,21 @@ def spawn_file(src, dst, usage, copy_mode):
     spawn_dir(par_dir)
     if os.path.isdir(dst):
         fatal("Malformed manifest input: %s implies both input file and dir" % dst)
-    if copy_mode or usage_must_copy_spawn(usage):
+    if elide and usage_can_elide_content(usage) and not os.path.islink(src):
+        if usage.is_stat_only():
+            size = os.path.getsize(src)
+            sparse_copy(src, dst, size, [])
+            print("Elide %s -> %s (stat only, %s sparse)" % (src, dst, format_size(size)))
+        else:
+            sparse_copy(src, dst, 0, [])
+            print("Elide %s -> %s (truncated on open)" % (src, dst))
+        return False
+    elif (copy_mode or usage_must_copy_spawn(usage)) and sparse_info and not os.path.islink(src):
+        size, extents = sparse_info
+        copied = sparse_copy(src, dst, size, extents)
+        print("Sparse copy %s -> %s (%s of %s)" % (src, dst, format_size(copied), format_size(size)))
+        return False
+    elif copy_mode or usage_must_copy_spawn(usage):
         shutil.copy2(src, dst, follow_symlinks=False)
         print("Copy %s -> %s" % (src, dst))
         return False
@@ -77,8 +173,33 @@ def spawn_dir(dpath):
         print("Mkdir %s" % dpath)
 
 
-def do_selective_spawn(app_pristine_sysroot_path, dest_dir, manifest, copy_mode):
-    # type: (str, str, Manifest_t, bool) -> None
+def find_hot_copy_candidates(pristine_path_converter, manifest, sparse, elide):
+    # type: (TargetPathConverter, Manifest_t, bool, bool) -> List[Tuple[str, int, FileIOProfile]]
+    """
+    Return (path, bytes to copy, I/O profile) of the files the selective spawn would symlink.
+    """
+    candidates = []
+    for pname, details in manifest['fs_access'].items():
+        file_usage = FileUsageInfo.build_from_str(details['usage'])
+        pre_run_hash = details['hash']['pre-run']
+        if not pre_run_hash or not is_valid_digest(pre_run_hash) or "io_profile" not in details:
+            continue
+        if usage_must_copy_spawn(file_usage) or (elide and usage_can_elide_content(file_usage)):
+            continue
+        file_src = pristine_path_converter.t2h(pname)
+        if os.path.islink(file_src):
+            continue
+        if sparse and "extents" in details:
+            size = sum(end - start for start, end in details["extents"])
+        else:
+            size = details["size"] if "size" in details else os.path.getsize(file_src)
+        candidates.append((pname, size, FileIOProfile.build_from_dict(details["io_profile"])))
+    return candidates
+
+
+def do_selective_spawn(app_pristine_sysroot_path, dest_dir, manifest, copy_mode, sparse=False, elide=True,
+                       hot_copy_policy=None):
+    # type: (str, str, Manifest_t, bool, bool, bool, Optional[HotCopyPolicy]) -> None
     pristine_path_converter = TargetPathConverter({"/": os.path.abspath(app_pristine_sysroot_path)})
     spawn_path_converter = TargetPathConverter({"/": os.path.abspath(dest_dir)})
 
@@ -86,6 +207,15 @@ def do_selective_spawn(app_pristine_sysroot_path, dest_dir, manifest, copy_mode)
 
     copy_mode = copy_mode or manifest["app_spawn_mode"] == "copy"
 
+    hot_files = set()  # type: Set[str]
+    if hot_copy_policy and not copy_mode:
+        candidates = find_hot_copy_candidates(pristine_path_converter, manifest, sparse, elide)
+        hot_files, hot_bytes = select_hot_files(candidates, hot_copy_policy)
+        print("Copying %d hot files of %d otherwise symlinked (%s%s)" % (
+            len(hot_files), len(candidates), format_size(hot_bytes),
+            "" if hot_copy_policy.budget is None else " of a %s budget" % format_size(hot_copy_policy.budget)
+        ))
+
     for pname, details in manifest['fs_access'].items():
         pre_run_hash = details['hash']['pre-run']
         file_usage = FileUsageInfo.build_from_str(details['usage'])
@@ -95,7 +225,10 @@ def do_selective_spawn(app_pristine_sysroot_path, dest_dir, manifest, copy_mode)
             else:
                 file_src = pristine_path_converter.t2h(pname)
                 file_dst = spawn_path_converter.t2h(pname)
-                spawn_file(file_src, file_dst, file_usage, copy_mode)
+                sparse_info = None
+                if sparse and "extents" in details:
+                    sparse_info = (details["size"], [tuple(e) for e in details["extents"]])
+                spawn_file(file_src, file_dst, file_usage, copy_mode or pname in hot_files, sparse_info, elide)
                 if usage_must_writable(file_usage):
                     # ensure the write permission is present when needed by the app
                     if not os.access(file_dst, os.W_OK):
@@ -109,6 +242,16 @@ def do_raw_dump_spawn(sysroot_path, dest_dir):
     set_dir_writeable_u(dest_dir)
 
 
+def _parse_size_option(ctx, param, value):
+    # type: (click.Context, click.Parameter, Optional[str]) -> Optional[int]
+    if value is None:
+        return None
+    try:
+        return parse_size(value)
+    except ValueError as ve:
+        raise click.BadParameter(str(ve))
+
+
 @click.command()
 @click.pass_context
 @click.argument("app-name", shell_complete=complete_app_names, type=click.STRING)
@@ -120,13 +263,36 @@ def do_raw_dump_spawn(sysroot_path, dest_dir):
                    "(instead of selectively spawn only the files specified in the manifest).")
 @click.option("-c", "--copy-mode", is_flag=True,
               help="Copy the file to the new simenv, regardless the spawn mode given by the manifest.")
-def cmd_env_spawn(ctx, app_name, dest_dir, raw, force, copy_mode):
+@click.option("-s", "--sparse", is_flag=True,
+              help="Materialize the copied files as sparse files holding only the byte ranges the app accessed "
+                   "during the bootstrap run (when the manifest records them). Verify such a simenv with "
+                   "'verify --sparse'.")
+@click.option("--no-elide", is_flag=True,
+              help="Copy the content of the files the app only stat'ed or truncated on open, instead of "
+                   "materializing them as sparse files of the same size or empty files.")
+@click.option("--hot-opens", type=click.IntRange(min=1),
+              help="Copy the files the app opened at least this many times during the bootstrap run, "
+                   "instead of symlinking them.")
+@click.option("--hot-bytes", callback=_parse_size_option,
+              help="Copy the files the app read at least this many bytes from during the bootstrap run "
+                   "(e.g. 64M), instead of symlinking them.")
+@click.option("--hot-budget", callback=_parse_size_option,
+              help="The most bytes the hot files copied by --hot-opens/--hot-bytes may take (e.g. 2G), "
+                   "the most opened ones being copied first [default: no limit].")
+def cmd_env_spawn(ctx, app_name, dest_dir, raw, force, copy_mode, sparse, no_elide, hot_opens, hot_bytes,
+                  hot_budget):
     """
     Spawn a simenv.
     """
 
     sysroots_archive_path, manifest_db_path, _ = get_repo_components_path(ctx.obj["repo_path"])
 
+    hot_copy_policy = None
+    if hot_opens is not None or hot_bytes is not None:
+        hot_copy_policy = HotCopyPolicy(hot_opens, hot_bytes, hot_budget)
+    elif hot_budget is not None:
+        fatal("--hot-budget needs --hot-opens or --hot-bytes to tell which files are hot")
+
     if os.path.exists(dest_dir):
         if force:
             succ, msg = remove_path(dest_dir)
@@ -156,7 +322,9 @@ def cmd_env_spawn(ctx, app_name, dest_dir, raw, force, copy_mode):
         if raw:
             do_raw_dump_spawn(app_pristine_sysroot_path, dest_dir)
         else:
-            do_selective_spawn(app_pristine_sysroot_path, dest_dir, manifest, copy_mode)
+            do_selective_spawn(
+                app_pristine_sysroot_path, dest_dir, manifest, copy_mode, sparse, not no_elide, hot_copy_policy
+            )
 
 
 if __name__ == '__main__':
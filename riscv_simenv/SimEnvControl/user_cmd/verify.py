@@ -1,5 +1,6 @@
 import os
 import sys
+from typing import Dict, List, Optional, Tuple
 
 import click
 
@@ -7,9 +8,12 @@ from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsag
 from riscv_simenv.SyscallAnalysis.libsyscall.target_path_converter import TargetPathConverter
 from ..libsimenv.app_manifest import Manifest_t, verify_manifest_format, verify_manifest_fs_access_format
 from ..libsimenv.autocomplete import complete_app_names
+from ..libsimenv.digest import get_digest_algo, get_manifest_hash_algo, is_valid_digest
+from ..libsimenv.hash_cache import HashCache, get_hash_cache_path
+from ..libsimenv.hash_engine import DEFAULT_HASH_JOBS, HashEngine
 from ..libsimenv.manifest_db import load_from_manifest_db, prompt_app_name_suggestion
 from ..libsimenv.repo_path import get_repo_components_path
-from ..libsimenv.utils import sha256, is_valid_sha256, fatal
+from ..libsimenv.utils import digest_extents, digest_file, fatal
 
 warnings = dict()
 failures = dict()
@@ -95,23 +99,26 @@ def check_isfile(pname):
     return True
 
 
-def check_hash(pname, expect):
-    # type: (str, str) -> bool
+def check_hash(pname, expect, hash_cache=None, known_hashes=None):
+    # type: (str, str, Optional[HashCache], Optional[Dict[str, str]]) -> bool
     if expect is None:
         return True
     elif expect == 'SKIP':
-        add_warning(pname, "SHA256 checking was skipped")
+        add_warning(pname, "Hash checking was skipped")
         return True
     elif expect == 'DIR':
         return check_isdir(pname)
-    elif is_valid_sha256(expect):
+    elif is_valid_digest(expect):
         if not check_exist(pname):
             return False
         if not check_isfile(pname):
             return False
         if not check_read(pname):
             return False
-        actual = sha256(pname)
+        if known_hashes and pname in known_hashes:
+            actual = known_hashes[pname]
+        else:
+            actual = digest_file(pname, get_digest_algo(expect), hash_cache=hash_cache)
         if actual != expect:
             add_failure(pname, "File hash not match, Expect: %s, Actual: %s" % (expect, actual))
             return False
@@ -120,16 +127,99 @@ def check_hash(pname, expect):
         raise ValueError("Malformed hash: %s" % expect)
 
 
-def perform_manifest_fsck(manifest, target_sysroot):
-    # type: (Manifest_t, str) -> None
+def check_extents_hash(pname, expect_size, extents, expect):
+    # type: (str, int, List[Tuple[int, int]], str) -> bool
+    """
+    Check only the byte ranges the app accessed, which is all a sparse-spawned file holds.
+    """
+    if not check_exist(pname):
+        return False
+    if not check_isfile(pname):
+        return False
+    if not check_read(pname):
+        return False
+    actual_size = os.path.getsize(pname)
+    if actual_size != expect_size:
+        add_failure(pname, "File size not match, Expect: %d, Actual: %d" % (expect_size, actual_size))
+        return False
+    actual = digest_extents(pname, extents, get_digest_algo(expect))
+    if actual != expect:
+        add_failure(pname, "Accessed extents hash not match, Expect: %s, Actual: %s" % (expect, actual))
+        return False
+    return True
+
+
+def check_size(pname, expect_size):
+    # type: (str, int) -> bool
+    """
+    Check only the size of a file the app only stat'ed, which is all an elided file keeps.
+    """
+    if not check_exist(pname):
+        return False
+    if not check_isfile(pname):
+        return False
+    actual_size = os.path.getsize(pname)
+    if actual_size != expect_size:
+        add_failure(pname, "File size not match, Expect: %d, Actual: %d" % (expect_size, actual_size))
+        return False
+    return True
+
+
+def select_content_check(details, full_hash, sparse=False):
+    # type: (Dict, bool, bool) -> str
+    """
+    Return how much of the content of a path to check: "size", "exist", "extents" or "hash".
+    The accessed extents are only checked instead of the whole file if sparse is True,
+    as a simenv spawned sparse holds nothing else.
+    """
+    file_usage = FileUsageInfo.build_from_str(details['usage'])
+    pre_run_hash = details['hash']['pre-run']
+    can_elide = not full_hash and pre_run_hash and is_valid_digest(pre_run_hash)
+    if can_elide and file_usage.is_stat_only() and "size" in details:
+        return "size"
+    elif can_elide and file_usage.is_truncated_first():
+        # the app discards the content on open, whatever it is
+        return "exist"
+    elif sparse and "extents" in details and not full_hash:
+        return "extents"
+    else:
+        return "hash"
+
+
+def perform_manifest_fsck(manifest, target_sysroot, full_hash=False, hash_cache=None, hash_jobs=DEFAULT_HASH_JOBS,
+                          sparse=False):
+    # type: (Manifest_t, str, bool, Optional[HashCache], int, bool) -> None
     path_converter = TargetPathConverter({"/": os.path.abspath(target_sysroot)})
+    content_checks = {
+        pname: select_content_check(details, full_hash, sparse) for pname, details in manifest['fs_access'].items()
+    }
+
+    # hash every file to check in full as a single batch, before checking the paths one by one
+    hash_engine = HashEngine(hash_jobs, hash_cache, get_manifest_hash_algo(manifest))
+    known_hashes = hash_engine.hash_files(
+        path_converter.t2h(pname) for pname, details in manifest['fs_access'].items()
+        if content_checks[pname] == "hash" and is_valid_digest(details['hash']['pre-run'] or "")
+    )
+    print(hash_engine.format_summary())
+
     for pname, details in manifest['fs_access'].items():
         host_path = path_converter.t2h(pname)
         print("Checking path [%s] <--> [%s]" % (pname, host_path))
         file_usage = FileUsageInfo.build_from_str(details['usage'])
         pre_run_hash = details['hash']['pre-run']
 
-        check_hash(host_path, pre_run_hash)
+        content_check = content_checks[pname]
+        if content_check == "size":
+            check_size(host_path, details["size"])
+        elif content_check == "exist":
+            if check_exist(host_path):
+                check_isfile(host_path)
+        elif content_check == "extents":
+            check_extents_hash(
+                host_path, details["size"], [tuple(e) for e in details["extents"]], details["extents_hash"]
+            )
+        else:
+            check_hash(host_path, pre_run_hash, hash_cache, known_hashes)
 
         if file_usage.has_remove():
             check_write(host_path, non_exist_ok=pre_run_hash is None)
@@ -152,11 +242,21 @@ def perform_manifest_fsck(manifest, target_sysroot):
 @click.pass_context
 @click.argument("app-name", shell_complete=complete_app_names, type=click.STRING)
 @click.argument("simenv-path", type=click.Path(exists=True, dir_okay=True, file_okay=False))
-def cmd_env_verify(ctx, app_name, simenv_path):
+@click.option("--hash-jobs", type=click.IntRange(min=1), default=DEFAULT_HASH_JOBS, show_default=True,
+              help="The number of threads hashing the files.")
+@click.option("-s", "--sparse", is_flag=True,
+              help="Only check the byte ranges the app accessed (and the size) of the files for which the manifest "
+                   "records them, as a simenv spawned with --sparse holds nothing else.")
+@click.option("--full-hash", is_flag=True,
+              help="Check the hash of entire files, even those the app only stat'ed or truncated on open "
+                   "(a simenv spawned without --no-elide fails this check).")
+def cmd_env_verify(ctx, app_name, simenv_path, hash_jobs, sparse, full_hash):
     """
     Perform integrity checking for a simenv.
     """
     _, manifest_db_path, _ = get_repo_components_path(ctx.obj["repo_path"])
+    if sparse and full_hash:
+        fatal("--sparse cannot be used together with --full-hash")
 
     print("Begin pre-run file environment checking: %s @ [%s]" % (app_name, simenv_path))
     print()
@@ -175,7 +275,8 @@ def cmd_env_verify(ctx, app_name, simenv_path):
     except ValueError as ve:
         fatal("%s has a malformed manifest (%s)" % (app_name, ve))
     else:
-        perform_manifest_fsck(manifest, simenv_path)
+        with HashCache(get_hash_cache_path(ctx.obj["repo_path"])) as hash_cache:
+            perform_manifest_fsck(manifest, simenv_path, full_hash, hash_cache, hash_jobs, sparse)
         print()
         path_with_caveat = set(warnings.keys()).union(failures.keys())
         if path_with_caveat:
@@ -0,0 +1,65 @@
+from typing import Callable, FrozenSet, List, Optional
+
+from .strace_parser import StraceRecord
+from ..syscalls.syscall import Syscall
+
+SyscallListener_t = Callable[[Syscall, int, int], None]
+SkippedListener_t = Callable[[StraceRecord, int, int, int], None]
+
+
+class SyscallEventBus:
+    """
+    Dispatch each syscall resolved by the SyscallTraceConstructor to the subscribed analyzers,
+    so that several analyzers can run in the same pass over the trace.
+
+    A subscriber is called with (syscall, start, end), where start/end are the offsets of the
+    syscall record in the strace. A subscriber may tell which syscalls it needs, so that the
+    SyscallTraceConstructor can skip constructing the syscalls no subscriber needs. The records
+    it skips are published to the skipped subscribers as (record, seq_no, start, end).
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.subscribers = list()  # type: List[SyscallListener_t]
+        self.syscall_names = list()  # type: List[Optional[FrozenSet[str]]]
+        self.skipped_subscribers = list()  # type: List[SkippedListener_t]
+
+    def subscribe(self, listener, syscall_names=None):
+        # type: (SyscallListener_t, Optional[FrozenSet[str]]) -> None
+        """
+        syscall_names is the set of the syscalls the listener needs, or None if it needs all of them.
+        """
+        self.subscribers.append(listener)
+        self.syscall_names.append(syscall_names)
+
+    def unsubscribe(self, listener):
+        # type: (SyscallListener_t) -> None
+        idx = self.subscribers.index(listener)
+        del self.subscribers[idx]
+        del self.syscall_names[idx]
+
+    def subscribe_skipped(self, listener):
+        # type: (SkippedListener_t) -> None
+        self.skipped_subscribers.append(listener)
+
+    def relevant_syscalls(self):
+        # type: () -> Optional[FrozenSet[str]]
+        """
+        Return the syscalls needed by any subscriber, or None if one of them needs all the syscalls.
+        """
+        relevant = frozenset()
+        for syscall_names in self.syscall_names:
+            if syscall_names is None:
+                return None
+            relevant |= syscall_names
+        return relevant
+
+    def publish(self, s, start, end):
+        # type: (Syscall, int, int) -> None
+        for listener in self.subscribers:
+            listener(s, start, end)
+
+    def publish_skipped(self, record, seq_no, start, end):
+        # type: (StraceRecord, int, int, int) -> None
+        for listener in self.skipped_subscribers:
+            listener(record, seq_no, start, end)
@@ -0,0 +1,168 @@
+import os
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..syscalls import syscall as s
+from ..syscalls.sys_close import sys_close
+from ..syscalls.sys_fcntl import sys_fcntl
+from ..syscalls.sys_linkat import sys_linkat
+from ..syscalls.sys_lseek import sys_lseek
+from ..syscalls.sys_openat import sys_openat
+from ..syscalls.sys_pread import sys_pread
+from ..syscalls.sys_pwrite import sys_pwrite
+from ..syscalls.sys_read import sys_read
+from ..syscalls.sys_renameat2 import sys_renameat2
+from ..syscalls.sys_write import sys_write
+
+Extent_t = Tuple[int, int]
+
+# coalesce the pending extents of a path once this many have piled up
+_COALESCE_THRESHOLD = 4096
+
+
+def coalesce_extents(extents):
+    # type: (Iterable[Extent_t]) -> List[Extent_t]
+    """
+    Sort the [start, end) extents and merge the ones that overlap or touch.
+    """
+    merged = []  # type: List[Extent_t]
+    for start, end in sorted(extents):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            if end > merged[-1][1]:
+                merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def clip_extents(extents, size):
+    # type: (Iterable[Extent_t], int) -> List[Extent_t]
+    return [(start, min(end, size)) for start, end in extents if start < size]
+
+
+class _OpenFileDescription:
+    __slots__ = ("path", "offset", "append", "refcount")
+
+    def __init__(self, path, append):
+        # type: (str, bool) -> None
+        self.path = path
+        self.offset = 0
+        self.append = append
+        self.refcount = 1
+
+
+class FileExtentAnalyzer:
+    """
+    Track which byte ranges of each file the app accessed, by replaying the file offset
+    of every open file description: open sets it to 0, read/write advance it, lseek
+    returns the new offset, and pread/pwrite access an explicit offset.
+
+    A path is marked as accessed in full when its offsets cannot be reconstructed
+    (appending writes) or when its content moved to/from another path (rename/link).
+    Subscribe on_syscall to the SyscallEventBus of a SyscallTraceConstructor.
+    """
+    RELEVANT_SYSCALLS = frozenset(
+        scall_type.__name__ for scall_type in (
+            sys_openat, sys_read, sys_write, sys_pread, sys_pwrite, sys_lseek, sys_fcntl, sys_close,
+            sys_renameat2, sys_linkat
+        )
+    )
+
+    def __init__(self):
+        # type: () -> None
+        # keyed by the seq_no of the openat that created the open file description
+        self.descriptions = dict()  # type: Dict[int, _OpenFileDescription]
+        self.extents = dict()  # type: Dict[str, List[Extent_t]]
+        self.whole_file = set()  # type: Set[str]
+
+    @staticmethod
+    def _get_root_def(fd_def):
+        # type: (Optional[s.MixinSyscallDefFd]) -> Optional[s.MixinSyscallDefFd]
+        # a duplicated FD shares the open file description (and the offset) of the original one
+        while isinstance(fd_def, sys_fcntl):
+            fd_def = fd_def.def_list[0]
+        return fd_def
+
+    def _get_description(self, scall):
+        # type: (s.Syscall) -> Optional[_OpenFileDescription]
+        root_def = self._get_root_def(scall.def_list[0])
+        if root_def is None:
+            return None
+        return self.descriptions.get(root_def.seq_no)
+
+    def _add_extent(self, path, start, end):
+        # type: (str, int, int) -> None
+        extents = self.extents[path]
+        if extents and extents[-1][1] == start:
+            # sequential access extends the last extent
+            extents[-1] = (extents[-1][0], end)
+        else:
+            extents.append((start, end))
+            if len(extents) > _COALESCE_THRESHOLD:
+                self.extents[path] = coalesce_extents(extents)
+
+    def on_syscall(self, scall, start, end):
+        # type: (s.Syscall, int, int) -> None
+        if not scall.is_success():
+            return
+        scall_type = type(scall)
+
+        if scall_type is sys_openat:
+            path = scall.def_fd_get_path().abspath()
+            self.descriptions[scall.seq_no] = _OpenFileDescription(path, bool(scall.flags & os.O_APPEND))
+            self.extents.setdefault(path, [])
+        elif scall_type is sys_read or scall_type is sys_write:
+            desc = self._get_description(scall)
+            if desc is None:
+                return
+            if scall_type is sys_write and desc.append:
+                # the offset of an appending write depends on the file size at that time
+                self.whole_file.add(desc.path)
+                desc.offset = None
+            elif desc.offset is None:
+                self.whole_file.add(desc.path)
+            elif scall.ret > 0:
+                self._add_extent(desc.path, desc.offset, desc.offset + scall.ret)
+                desc.offset += scall.ret
+        elif scall_type is sys_pread or scall_type is sys_pwrite:
+            desc = self._get_description(scall)
+            if desc is None:
+                return
+            if scall_type is sys_pwrite and desc.append:
+                # on Linux, pwrite() appends regardless of the offset if O_APPEND is set
+                self.whole_file.add(desc.path)
+            elif scall.ret > 0:
+                self._add_extent(desc.path, scall.offset, scall.offset + scall.ret)
+        elif scall_type is sys_lseek:
+            desc = self._get_description(scall)
+            if desc is not None:
+                desc.offset = scall.ret
+        elif scall_type is sys_fcntl:
+            desc = self._get_description(scall)
+            if desc is None:
+                return
+            if scall.is_dupfd():
+                desc.refcount += 1
+            elif scall.is_setfl():
+                desc.append = bool(scall.setfl_newflags_ormask() & os.O_APPEND)
+        elif scall_type is sys_close:
+            root_def = self._get_root_def(scall.def_list[0])
+            if root_def is not None and root_def.seq_no in self.descriptions:
+                desc = self.descriptions[root_def.seq_no]
+                desc.refcount -= 1
+                if desc.refcount == 0:
+                    del self.descriptions[root_def.seq_no]
+        elif scall_type is sys_renameat2 or scall_type is sys_linkat:
+            for f in scall.get_arg_paths():
+                self.whole_file.add(f.abspath())
+
+    def get_extents(self):
+        # type: () -> Dict[str, Optional[List[Extent_t]]]
+        """
+        Return the coalesced extents accessed for every opened path, or None for a path accessed in full.
+        """
+        return {
+            path: None if path in self.whole_file else coalesce_extents(extents)
+            for path, extents in self.extents.items()
+        }
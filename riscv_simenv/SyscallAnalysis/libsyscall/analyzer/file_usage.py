@@ -1,10 +1,26 @@
 #!/usr/bin/env python3
 import os
-import sys
 from collections import defaultdict
-from typing import Dict, List
+from typing import Dict, FrozenSet, List, Iterator, Tuple
 
 from ..syscalls import syscall as s
+from ..syscalls.sys_chdir import sys_chdir
+from ..syscalls.sys_faccessat import sys_faccessat
+from ..syscalls.sys_fcntl import sys_fcntl
+from ..syscalls.sys_fstat import sys_fstat
+from ..syscalls.sys_fstatat import sys_fstatat
+from ..syscalls.sys_ftruncate import sys_ftruncate
+from ..syscalls.sys_linkat import sys_linkat
+from ..syscalls.sys_lstat import sys_lstat
+from ..syscalls.sys_mkdirat import sys_mkdirat
+from ..syscalls.sys_openat import sys_openat
+from ..syscalls.sys_pread import sys_pread
+from ..syscalls.sys_pwrite import sys_pwrite
+from ..syscalls.sys_read import sys_read
+from ..syscalls.sys_readlinkat import sys_readlinkat
+from ..syscalls.sys_renameat2 import sys_renameat2
+from ..syscalls.sys_unlinkat import sys_unlinkat
+from ..syscalls.sys_write import sys_write
 from ..syscalls.syscall import GenericPath
 
 
@@ -18,6 +34,17 @@ class FileUsageInfo:
     FUSE_OPEN_RD = 1 << 6
     FUSE_OPEN_WR = 1 << 7
     FUSE_OPEN_RW = 1 << 8
+    FUSE_OPEN_TRUNC = 1 << 9
+    FUSE_OPEN_APPEND = 1 << 10
+    # the content (or the size) of the file could be observed before it was first truncated on open
+    FUSE_PRE_TRUNC_ACCESS = 1 << 11
+    # the file is the source of a hard link, so its content may be accessed through another path
+    FUSE_LINK_SRC = 1 << 12
+
+    # the usage that observes the content of an existing file, or its size
+    CONTENT_ACCESS_MASK = (
+            FUSE_STAT | FUSE_READ_DATA | FUSE_WRITE_DATA | FUSE_OPEN_RD | FUSE_OPEN_WR | FUSE_OPEN_RW | FUSE_LINK_SRC
+    )
 
     def __init__(self, fuse=0):
         # type: (int) -> None
@@ -28,6 +55,18 @@ class FileUsageInfo:
         ret_usage = FileUsageInfo(self.fuse | other.fuse)
         return ret_usage
 
+    def merge_run(self, other):
+        # type: (FileUsageInfo) -> FileUsageInfo
+        """
+        Merge the usage of the same path in another bootstrap run. The file is only truncated first
+        in the merged usage if it is in both runs, or if the run that did not truncate it did not access it.
+        """
+        fuse = self.fuse | other.fuse
+        for this, that in ((self, other), (other, self)):
+            if this.has_open_trunc() and not that.has_open_trunc() and that.fuse & self.CONTENT_ACCESS_MASK:
+                fuse |= self.FUSE_PRE_TRUNC_ACCESS
+        return FileUsageInfo(fuse)
+
     def has_abs_ref(self):
         # type: () -> bool
         return self.fuse & self.FUSE_ABS_REF == self.FUSE_ABS_REF
@@ -64,6 +103,36 @@ class FileUsageInfo:
         # type: () -> bool
         return self.fuse & self.FUSE_OPEN_RW == self.FUSE_OPEN_RW
 
+    def has_open_trunc(self):
+        # type: () -> bool
+        return self.fuse & self.FUSE_OPEN_TRUNC == self.FUSE_OPEN_TRUNC
+
+    def has_open_append(self):
+        # type: () -> bool
+        return self.fuse & self.FUSE_OPEN_APPEND == self.FUSE_OPEN_APPEND
+
+    def has_pre_trunc_access(self):
+        # type: () -> bool
+        return self.fuse & self.FUSE_PRE_TRUNC_ACCESS == self.FUSE_PRE_TRUNC_ACCESS
+
+    def has_link_src(self):
+        # type: () -> bool
+        return self.fuse & self.FUSE_LINK_SRC == self.FUSE_LINK_SRC
+
+    def is_stat_only(self):
+        # type: () -> bool
+        """
+        Check whether the app only looked up the metadata of the path, without opening it.
+        """
+        return self.fuse & ~self.FUSE_ABS_REF == self.FUSE_STAT
+
+    def is_truncated_first(self):
+        # type: () -> bool
+        """
+        Check whether the app truncated the file when it first opened it, so its content was never observed.
+        """
+        return self.has_open_trunc() and not self.has_pre_trunc_access()
+
     @classmethod
     def build_from_str(cls, fuse_str):
         # type: (str) -> FileUsageInfo
@@ -76,6 +145,10 @@ class FileUsageInfo:
             "FUSE_OPEN_RD": cls.FUSE_OPEN_RD,
             "FUSE_OPEN_WR": cls.FUSE_OPEN_WR,
             "FUSE_OPEN_RW": cls.FUSE_OPEN_RW,
+            "FUSE_OPEN_TRUNC": cls.FUSE_OPEN_TRUNC,
+            "FUSE_OPEN_APPEND": cls.FUSE_OPEN_APPEND,
+            "FUSE_PRE_TRUNC_ACCESS": cls.FUSE_PRE_TRUNC_ACCESS,
+            "FUSE_LINK_SRC": cls.FUSE_LINK_SRC,
             "FUSE_ABS_REF": cls.FUSE_ABS_REF,
         }
 
@@ -101,6 +174,10 @@ class FileUsageInfo:
             (self.FUSE_OPEN_RD, "FUSE_OPEN_RD"),
             (self.FUSE_OPEN_WR, "FUSE_OPEN_WR"),
             (self.FUSE_OPEN_RW, "FUSE_OPEN_RW"),
+            (self.FUSE_OPEN_TRUNC, "FUSE_OPEN_TRUNC"),
+            (self.FUSE_OPEN_APPEND, "FUSE_OPEN_APPEND"),
+            (self.FUSE_PRE_TRUNC_ACCESS, "FUSE_PRE_TRUNC_ACCESS"),
+            (self.FUSE_LINK_SRC, "FUSE_LINK_SRC"),
             (self.FUSE_ABS_REF, "FUSE_ABS_REF"),
         )
         field = []
@@ -110,116 +187,138 @@ class FileUsageInfo:
         return " | ".join(field)
 
 
+_STAT_SYSCALLS = {sys_faccessat, sys_fstatat, sys_lstat}
+
+# the usage implied on the file behind an FD by a successful use of that FD
+_FD_USE_USAGE = {
+    sys_write: FileUsageInfo.FUSE_WRITE_DATA,
+    sys_pwrite: FileUsageInfo.FUSE_WRITE_DATA,
+    sys_ftruncate: FileUsageInfo.FUSE_WRITE_DATA,
+    sys_read: FileUsageInfo.FUSE_READ_DATA,
+    sys_pread: FileUsageInfo.FUSE_READ_DATA,
+    sys_fstat: FileUsageInfo.FUSE_STAT,
+}
+
+
+# the syscalls iter_file_usage yields any usage for
+FILE_USAGE_SYSCALLS = frozenset(
+    scall_type.__name__ for scall_type in (
+        *_STAT_SYSCALLS, sys_readlinkat, sys_mkdirat, sys_linkat, sys_renameat2, sys_unlinkat,
+        sys_openat, sys_fcntl, sys_chdir, *_FD_USE_USAGE
+    )
+)  # type: FrozenSet[str]
+
+
+def _open_usage(acc_mode):
+    # type: (int) -> int
+    if acc_mode == os.O_RDONLY:
+        return FileUsageInfo.FUSE_OPEN_RD
+    elif acc_mode == os.O_WRONLY:
+        return FileUsageInfo.FUSE_OPEN_WR
+    elif acc_mode == os.O_RDWR:
+        return FileUsageInfo.FUSE_OPEN_RW
+    else:
+        assert False
+
+
+def iter_file_usage(scall):
+    # type: (s.Syscall) -> Iterator[Tuple[GenericPath, int]]
+    """
+    Yield the (path, FUSE bits) pairs implied by a single syscall whose FDs have been resolved.
+    """
+    if not scall.is_success():
+        return
+    scall_type = type(scall)
+
+    # pathname reference analysis
+    if scall_type in _STAT_SYSCALLS:
+        stat_paths = scall.get_arg_paths()
+        if stat_paths:
+            assert len(stat_paths) == 1
+            yield stat_paths[0], FileUsageInfo.FUSE_STAT
+    elif scall_type is sys_readlinkat:
+        yield scall.get_arg_paths()[0], FileUsageInfo.FUSE_STAT
+    elif scall_type is sys_mkdirat:
+        yield scall.get_arg_paths()[0], FileUsageInfo.FUSE_CREATE
+    elif scall_type is sys_linkat:
+        link_info = scall.get_arg_paths()
+        yield link_info[0], FileUsageInfo.FUSE_STAT | FileUsageInfo.FUSE_LINK_SRC
+        yield link_info[1], FileUsageInfo.FUSE_CREATE
+    elif scall_type is sys_renameat2:
+        rename_info = scall.get_arg_paths()
+        yield rename_info[0], FileUsageInfo.FUSE_REMOVE
+        yield rename_info[1], FileUsageInfo.FUSE_CREATE
+    elif scall_type is sys_unlinkat:
+        yield scall.get_arg_paths()[0], FileUsageInfo.FUSE_REMOVE
+
+    # fd def-use analysis
+    if isinstance(scall, s.MixinSyscallDefFd) and not (scall_type is sys_fcntl and not scall.is_dupfd()):
+        fd_path = scall.def_fd_get_path()
+        fd_flags = scall.def_fd_get_flags()
+        open_usage = _open_usage(s.MixinSyscallDefFd.O_ACCMODE & fd_flags)
+        if scall_type is sys_openat:
+            # the file is truncated (or appended to) by the open itself, not by the dup of an fd
+            if fd_flags & os.O_TRUNC:
+                open_usage |= FileUsageInfo.FUSE_OPEN_TRUNC
+            if fd_flags & os.O_APPEND:
+                open_usage |= FileUsageInfo.FUSE_OPEN_APPEND
+        yield fd_path, open_usage
+        if fd_flags & os.O_CREAT:
+            yield fd_path, FileUsageInfo.FUSE_CREATE
+
+    fd_use_usage = _FD_USE_USAGE.get(scall_type)
+    if fd_use_usage:
+        for fd_def in scall.def_list:
+            # skip the initial working directory, which is not defined by any syscall in the trace
+            if fd_def is not None and fd_def.seq_no >= 0:
+                yield fd_def.def_fd_get_path(), fd_use_usage
+
+
+def fold_file_usage(fuse_so_far, fuse):
+    # type: (int, int) -> int
+    """
+    Fold the FUSE bits of a syscall into the FUSE bits of the same path from the earlier syscalls.
+    This is an OR, except that a truncating open after an access to the content sets FUSE_PRE_TRUNC_ACCESS.
+    """
+    if (
+            fuse & FileUsageInfo.FUSE_OPEN_TRUNC and not fuse_so_far & FileUsageInfo.FUSE_OPEN_TRUNC
+            and fuse_so_far & FileUsageInfo.CONTENT_ACCESS_MASK
+    ):
+        fuse |= FileUsageInfo.FUSE_PRE_TRUNC_ACCESS
+    return fuse_so_far | fuse
+
+
+class FileUsageAnalyzer:
+    """
+    Fold each syscall into the per-path FileUsageInfo as soon as it is resolved.
+    Subscribe on_syscall to the SyscallEventBus of a SyscallTraceConstructor to analyze
+    a trace in a single pass, without retaining the syscalls.
+    """
+    RELEVANT_SYSCALLS = FILE_USAGE_SYSCALLS
+
+    def __init__(self):
+        # type: () -> None
+        self.file_usage_info = defaultdict(FileUsageInfo)  # type: Dict[str, FileUsageInfo]
+
+    def on_syscall(self, scall, start, end):
+        # type: (s.Syscall, int, int) -> None
+        for f, fuse in iter_file_usage(scall):
+            if f.isabs():
+                fuse |= FileUsageInfo.FUSE_ABS_REF
+            usage = self.file_usage_info[f.abspath()]
+            usage.fuse = fold_file_usage(usage.fuse, fuse)
+
+    def get_file_usage(self):
+        # type: () -> Dict[str, FileUsageInfo]
+        return self.file_usage_info
+
+
 def stat_file_usage(syscalls, print_info=False):
     # type: (List[s.Syscall], bool) -> Dict[str, FileUsageInfo]
-    from ..syscalls.sys_read import sys_read
-    from ..syscalls.sys_pread import sys_pread
-    from ..syscalls.sys_write import sys_write
-    from ..syscalls.sys_pwrite import sys_pwrite
-    from ..syscalls.sys_lseek import sys_lseek
-    from ..syscalls.sys_fstat import sys_fstat
-    from ..syscalls.sys_fcntl import sys_fcntl
-    from ..syscalls.sys_ftruncate import sys_ftruncate
-    from ..syscalls.sys_lstat import sys_lstat
-    from ..syscalls.sys_fstatat import sys_fstatat
-    from ..syscalls.sys_faccessat import sys_faccessat
-    from ..syscalls.sys_linkat import sys_linkat
-    from ..syscalls.sys_unlinkat import sys_unlinkat
-    from ..syscalls.sys_mkdirat import sys_mkdirat
-    from ..syscalls.sys_renameat2 import sys_renameat2
-    from ..syscalls.sys_readlinkat import sys_readlinkat
-
-    file_usage_info = defaultdict(FileUsageInfo)
-
-    def _abs_bit(_f):
-        # type: (GenericPath) -> int
-        return FileUsageInfo.FUSE_ABS_REF if _f.isabs() else 0
-
-    def record_file_stat(_f):
-        # type: (GenericPath) -> None
-        file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_STAT | _abs_bit(_f)
-
-    def record_file_read_data(_f):
-        # type: (GenericPath) -> None
-        file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_READ_DATA | _abs_bit(_f)
-
-    def record_file_write_data(_f):
-        # type: (GenericPath) -> None
-        file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_WRITE_DATA | _abs_bit(_f)
-
-    def record_file_create(_f):
-        # type: (GenericPath) -> None
-        file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_CREATE | _abs_bit(_f)
-
-    def record_file_remove(_f):
-        # type: (GenericPath) -> None
-        file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_REMOVE | _abs_bit(_f)
-
-    def record_file_open(_f, acc_mode):
-        # type: (GenericPath, int) -> None
-        if acc_mode == os.O_RDONLY:
-            file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_OPEN_RD | _abs_bit(_f)
-        elif acc_mode == os.O_WRONLY:
-            file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_OPEN_WR | _abs_bit(_f)
-        elif acc_mode == os.O_RDWR:
-            file_usage_info[_f.abspath()].fuse |= FileUsageInfo.FUSE_OPEN_RW | _abs_bit(_f)
-        else:
-            assert False
-
-    def record_nothing(_f):
-        # type: (GenericPath) -> None
-        pass
-
+    analyzer = FileUsageAnalyzer()
     for scall in syscalls:
-        if not scall.is_success():
-            continue
-        # pathname reference analysis
-        if isinstance(scall, sys_faccessat) or isinstance(scall, sys_fstatat) or isinstance(scall, sys_lstat):
-            stat_paths = scall.get_arg_paths()
-            if stat_paths:
-                assert len(stat_paths) == 1
-                record_file_stat(stat_paths[0])
-        if isinstance(scall, sys_readlinkat):
-            orig_path = scall.get_arg_paths()[0]
-            record_file_stat(orig_path)
-        elif isinstance(scall, sys_mkdirat):
-            record_file_create(scall.get_arg_paths()[0])
-        elif isinstance(scall, sys_linkat):
-            link_info = scall.get_arg_paths()
-            record_file_stat(link_info[0])
-            record_file_create(link_info[1])
-        elif isinstance(scall, sys_renameat2):
-            rename_info = scall.get_arg_paths()
-            record_file_remove(rename_info[0])
-            record_file_create(rename_info[1])
-        elif isinstance(scall, sys_unlinkat):
-            record_file_remove(scall.get_arg_paths()[0])
-
-        # fd def-use analysis
-        if isinstance(scall, s.MixinSyscallDefFd):
-            if isinstance(scall, sys_fcntl) and not scall.is_dupfd():
-                continue
-
-            fd_path = scall.def_fd_get_path()
-            record_file_open(
-                fd_path,
-                s.MixinSyscallDefFd.O_ACCMODE & scall.def_fd_get_flags()
-            )
-            if scall.def_fd_get_flags() & os.O_CREAT:
-                record_file_create(fd_path)
-
-            for fd_use in scall.use_list:
-                if fd_use.is_success():
-                    {
-                        sys_write: record_file_write_data,
-                        sys_pwrite: record_file_write_data,
-                        sys_ftruncate: record_file_write_data,
-                        sys_read: record_file_read_data,
-                        sys_pread: record_file_read_data,
-                        sys_fstat: record_file_stat,
-                        sys_fcntl: record_nothing,
-                        sys_lseek: record_nothing,
-                    }.get(type(fd_use), record_nothing)(fd_path)
+        analyzer.on_syscall(scall, -1, -1)
+    file_usage_info = analyzer.get_file_usage()
 
     if print_info:
         for k, v in file_usage_info.items():
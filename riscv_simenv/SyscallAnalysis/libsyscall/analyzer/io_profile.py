@@ -0,0 +1,131 @@
+from typing import Dict, Optional
+
+from .file_usage import FILE_USAGE_SYSCALLS, iter_file_usage
+from ..syscalls import syscall as s
+from ..syscalls.sys_lseek import sys_lseek
+from ..syscalls.sys_openat import sys_openat
+from ..syscalls.sys_pread import sys_pread
+from ..syscalls.sys_pwrite import sys_pwrite
+from ..syscalls.sys_read import sys_read
+from ..syscalls.sys_write import sys_write
+
+_READ_SYSCALLS = {sys_read, sys_pread}
+_WRITE_SYSCALLS = {sys_write, sys_pwrite}
+
+
+class FileIOProfile:
+    """
+    The I/O volume and operation counts the traced app performed on one path, opens being its successful openat.
+    first_seq/last_seq are the seq_no of the first and last syscall that accessed the path.
+    """
+    FIELDS = ("bytes_read", "bytes_written", "reads", "writes", "seeks", "opens", "first_seq", "last_seq")
+
+    def __init__(self, bytes_read=0, bytes_written=0, reads=0, writes=0, seeks=0, opens=0, first_seq=-1,
+                 last_seq=-1):
+        # type: (int, int, int, int, int, int, int, int) -> None
+        self.bytes_read = bytes_read
+        self.bytes_written = bytes_written
+        self.reads = reads
+        self.writes = writes
+        self.seeks = seeks
+        self.opens = opens
+        self.first_seq = first_seq
+        self.last_seq = last_seq
+
+    def touch(self, seq_no):
+        # type: (int) -> None
+        if self.first_seq < 0:
+            self.first_seq = seq_no
+        self.last_seq = seq_no
+
+    def merge(self, other):
+        # type: (FileIOProfile) -> FileIOProfile
+        first_seqs = [p.first_seq for p in (self, other) if p.first_seq >= 0]
+        return FileIOProfile(
+            self.bytes_read + other.bytes_read,
+            self.bytes_written + other.bytes_written,
+            self.reads + other.reads,
+            self.writes + other.writes,
+            self.seeks + other.seeks,
+            self.opens + other.opens,
+            min(first_seqs) if first_seqs else -1,
+            max(self.last_seq, other.last_seq)
+        )
+
+    def to_dict(self):
+        # type: () -> Dict[str, int]
+        return {f: getattr(self, f) for f in self.FIELDS}
+
+    @classmethod
+    def build_from_dict(cls, d):
+        # type: (Dict[str, int]) -> FileIOProfile
+        # the fields missing from the profiles of older manifests (e.g. opens) keep their defaults
+        return cls(**{f: d[f] for f in cls.FIELDS if f in d})
+
+    def __eq__(self, other):
+        return isinstance(other, FileIOProfile) and self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return "FileIOProfile(%s)" % ", ".join("%s=%d" % kv for kv in self.to_dict().items())
+
+
+class IOProfileAnalyzer:
+    """
+    Accumulate the per-path FileIOProfile.
+    Subscribe on_syscall to the SyscallEventBus of a SyscallTraceConstructor.
+    """
+    RELEVANT_SYSCALLS = FILE_USAGE_SYSCALLS | {sys_lseek.__name__}
+
+    def __init__(self):
+        # type: () -> None
+        self.profiles = dict()  # type: Dict[str, FileIOProfile]
+
+    def _get_profile(self, f):
+        # type: (s.GenericPath) -> FileIOProfile
+        path = f.abspath()
+        profile = self.profiles.get(path)
+        if profile is None:
+            profile = self.profiles[path] = FileIOProfile()
+        return profile
+
+    @staticmethod
+    def _get_fd_path(scall):
+        # type: (s.Syscall) -> Optional[s.GenericPath]
+        fd_def = scall.def_list[0]
+        # skip the FDs not opened in the trace (e.g. stdio) and the initial working directory
+        if fd_def is None or fd_def.seq_no < 0:
+            return None
+        return fd_def.def_fd_get_path()
+
+    def on_syscall(self, scall, start, end):
+        # type: (s.Syscall, int, int) -> None
+        for f, _ in iter_file_usage(scall):
+            self._get_profile(f).touch(scall.seq_no)
+
+        if not scall.is_success():
+            return
+        scall_type = type(scall)
+        if scall_type in _READ_SYSCALLS:
+            fd_path = self._get_fd_path(scall)
+            if fd_path is not None:
+                profile = self._get_profile(fd_path)
+                profile.reads += 1
+                profile.bytes_read += scall.ret
+        elif scall_type in _WRITE_SYSCALLS:
+            fd_path = self._get_fd_path(scall)
+            if fd_path is not None:
+                profile = self._get_profile(fd_path)
+                profile.writes += 1
+                profile.bytes_written += scall.ret
+        elif scall_type is sys_lseek:
+            fd_path = self._get_fd_path(scall)
+            if fd_path is not None:
+                profile = self._get_profile(fd_path)
+                profile.seeks += 1
+                profile.touch(scall.seq_no)
+        elif scall_type is sys_openat:
+            self._get_profile(scall.def_fd_get_path()).opens += 1
+
+    def get_io_profile(self):
+        # type: () -> Dict[str, FileIOProfile]
+        return self.profiles
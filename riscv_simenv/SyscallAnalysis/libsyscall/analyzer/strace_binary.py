@@ -0,0 +1,289 @@
+"""
+The compact binary strace format.
+
+    header:  magic "STRACEBN", varint version, varint flags
+    record:  varint schema_ref, zigzag syscall_id, zigzag ret, then one value per argument of the schema:
+             zigzag value for an integer argument, varint pointer + string_ref for a string pointer argument
+
+A schema is the syscall name with the type, name and kind of each of its arguments. schema_ref is 0
+for a schema seen for the first time, which then follows inline (string_ref name, varint n_args, and
+string_ref type, string_ref name, byte kind for each argument), or else the index of the schema plus 1.
+Strings (the names, and the memory values of the string arguments, e.g. paths) are kept in a dictionary
+the same way: string_ref is 0 for a new string, followed by its varint length and its bytes, or else
+the index of the string plus 1. A reader rebuilds both dictionaries as it goes, so the records can only
+be read from the beginning of the stream.
+"""
+
+import base64
+from typing import BinaryIO, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from .strace_parser import StraceRecord
+from ..syscalls.syscall import SyscallArgInteger, SyscallArgStrPtr
+
+BINARY_MAGIC = b"STRACEBN"
+BINARY_VERSION = 1
+# the consecutive reads/writes on the same fd were collapsed, so the records no longer map 1:1 to the syscalls
+FLAG_COLLAPSED = 0x1
+
+_ARG_INTEGER = 0
+_ARG_STR_PTR = 1
+_COLLAPSIBLE_SYSCALLS = ("sys_read", "sys_write")
+_READ_CHUNK = 1 << 20
+
+ArgSchema_t = Tuple[bytes, bytes, int]
+Schema_t = Tuple[bytes, Tuple[ArgSchema_t, ...]]
+
+
+def _encode_varint(value, out):
+    # type: (int, bytearray) -> None
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _encode_zigzag(value, out):
+    # type: (int, bytearray) -> None
+    _encode_varint(value << 1 if value >= 0 else ((-value) << 1) - 1, out)
+
+
+def _decode_varint(buf, pos):
+    # type: (bytes, int) -> Tuple[int, int]
+    b = buf[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result = b & 0x7F
+    shift = 7
+    while True:
+        pos += 1
+        b = buf[pos]
+        result |= (b & 0x7F) << shift
+        if b < 0x80:
+            return result, pos + 1
+        shift += 7
+
+
+def _decode_zigzag(buf, pos):
+    # type: (bytes, int) -> Tuple[int, int]
+    value, pos = _decode_varint(buf, pos)
+    return (value >> 1) if not value & 1 else -((value + 1) >> 1), pos
+
+
+def is_binary_strace_head(head):
+    # type: (bytes) -> bool
+    return head.startswith(BINARY_MAGIC)
+
+
+class BinaryStraceWriter:
+    """
+    Write StraceRecords in the compact binary format.
+
+    If collapse is True, consecutive successful reads (or writes) on the same fd are written as a single
+    record, whose count and return value are the sums of those of the collapsed syscalls. The file usage and
+    the accessed extents stay the same, but the syscall counts and the seq_no of the later syscalls do not.
+    """
+
+    def __init__(self, fp, collapse=False):
+        # type: (BinaryIO, bool) -> None
+        self.fp = fp
+        self.collapse = collapse
+        self.strings = dict()  # type: Dict[bytes, int]
+        self.schemas = dict()  # type: Dict[Schema_t, int]
+        self.n_records_in = 0
+        self.n_records_out = 0
+        self._pending = None  # type: Optional[StraceRecord]
+        header = bytearray(BINARY_MAGIC)
+        _encode_varint(BINARY_VERSION, header)
+        _encode_varint(FLAG_COLLAPSED if collapse else 0, header)
+        self.fp.write(header)
+
+    def _encode_string(self, s, out):
+        # type: (bytes, bytearray) -> None
+        idx = self.strings.get(s)
+        if idx is not None:
+            _encode_varint(idx + 1, out)
+            return
+        self.strings[s] = len(self.strings)
+        out.append(0)
+        _encode_varint(len(s), out)
+        out += s
+
+    @staticmethod
+    def _memval_bytes(arg):
+        # type: (SyscallArgStrPtr) -> bytes
+        # the fast parser keeps the memory value base64-encoded, so there is no need to decode it as text
+        amemval_b64 = getattr(arg, "amemval_b64", None)
+        if amemval_b64 is not None:
+            return base64.b64decode(amemval_b64, validate=True)
+        return arg.amemval.encode("ascii")
+
+    def _encode_record(self, record):
+        # type: (StraceRecord) -> None
+        out = bytearray()
+        schema = (
+            record.syscall_name.encode("ascii"),
+            tuple(
+                (arg.atype.encode("ascii"), arg.aname.encode("ascii"),
+                 _ARG_STR_PTR if isinstance(arg, SyscallArgStrPtr) else _ARG_INTEGER)
+                for arg in record.syscall_args
+            )
+        )
+        idx = self.schemas.get(schema)
+        if idx is not None:
+            _encode_varint(idx + 1, out)
+        else:
+            self.schemas[schema] = len(self.schemas)
+            out.append(0)
+            self._encode_string(schema[0], out)
+            _encode_varint(len(schema[1]), out)
+            for atype, aname, kind in schema[1]:
+                self._encode_string(atype, out)
+                self._encode_string(aname, out)
+                out.append(kind)
+        _encode_zigzag(record.syscall_id, out)
+        _encode_zigzag(record.ret_code, out)
+        for arg in record.syscall_args:
+            if isinstance(arg, SyscallArgStrPtr):
+                _encode_varint(arg.avalue, out)
+                self._encode_string(self._memval_bytes(arg), out)
+            else:
+                _encode_zigzag(arg.avalue, out)
+        self.fp.write(out)
+        self.n_records_out += 1
+
+    @staticmethod
+    def _can_collapse(prev, record):
+        # type: (StraceRecord, StraceRecord) -> bool
+        # read/write(fd, buf, count): args[0] is the fd and args[2] the count
+        return (
+            record.syscall_name == prev.syscall_name and record.syscall_id == prev.syscall_id
+            and record.ret_code >= 0 and prev.ret_code >= 0
+            and record.syscall_args[0].avalue == prev.syscall_args[0].avalue
+        )
+
+    def write(self, record):
+        # type: (StraceRecord) -> None
+        self.n_records_in += 1
+        if not self.collapse:
+            self._encode_record(record)
+            return
+        pending = self._pending
+        if pending is not None:
+            if self._can_collapse(pending, record):
+                args = list(pending.syscall_args)
+                args[2] = SyscallArgInteger(args[2].aname, args[2].atype,
+                                            args[2].avalue + record.syscall_args[2].avalue)
+                self._pending = StraceRecord(pending.syscall_id, pending.syscall_name, args,
+                                             pending.ret_code + record.ret_code)
+                return
+            self._encode_record(pending)
+            self._pending = None
+        if record.syscall_name in _COLLAPSIBLE_SYSCALLS and record.ret_code >= 0:
+            self._pending = record
+        else:
+            self._encode_record(record)
+
+    def flush(self):
+        # type: () -> None
+        if self._pending is not None:
+            self._encode_record(self._pending)
+            self._pending = None
+        self.fp.flush()
+
+
+class BinaryStraceReader:
+    """
+    Read the compact binary format back into the StraceRecords it was written from.
+    """
+
+    @staticmethod
+    def parse_header(head):
+        # type: (bytes) -> Tuple[int, int]
+        """
+        Return (flags, header size) given the beginning of a binary strace.
+        """
+        if not is_binary_strace_head(head):
+            raise ValueError("Not a binary strace")
+        try:
+            version, pos = _decode_varint(head, len(BINARY_MAGIC))
+            flags, pos = _decode_varint(head, pos)
+        except IndexError:
+            raise ValueError("Truncated binary strace header")
+        if version != BINARY_VERSION:
+            raise ValueError("Unsupported binary strace version %d" % version)
+        return flags, pos
+
+    @classmethod
+    def parse_stream(cls, strace_fp, keep_syscalls=None):
+        # type: (BinaryIO, Optional[FrozenSet[str]]) -> Iterator[Tuple[StraceRecord, int, int]]
+        """
+        Parse the records from a binary stream positioned at its beginning.
+        Yield (record, start, end), where start/end are the offsets of the record in the stream.
+        If keep_syscalls is given, the arguments of the other syscalls are not built (see StraceRecord).
+        """
+        buf = strace_fp.read(_READ_CHUNK)
+        _, pos = cls.parse_header(buf)
+        offset = 0
+        strings = []  # type: List[str]
+        schemas = []  # type: List[Tuple[str, List[Tuple[str, str, int]]]]
+
+        def decode_string(_pos):
+            # type: (int) -> Tuple[str, int]
+            ref, _pos = _decode_varint(buf, _pos)
+            if ref:
+                return strings[ref - 1], _pos
+            length, _pos = _decode_varint(buf, _pos)
+            if _pos + length > len(buf):
+                raise IndexError
+            s = buf[_pos:_pos + length].decode("ascii")
+            strings.append(s)
+            return s, _pos + length
+
+        while True:
+            record_start = pos
+            n_strings = len(strings)
+            n_schemas = len(schemas)
+            try:
+                ref, pos = _decode_varint(buf, pos)
+                if ref:
+                    name, arg_schemas = schemas[ref - 1]
+                else:
+                    name, pos = decode_string(pos)
+                    n_args, pos = _decode_varint(buf, pos)
+                    arg_schemas = []
+                    for _ in range(n_args):
+                        atype, pos = decode_string(pos)
+                        aname, pos = decode_string(pos)
+                        arg_schemas.append((atype, aname, buf[pos]))
+                        pos += 1
+                    schemas.append((name, arg_schemas))
+                syscall_id, pos = _decode_zigzag(buf, pos)
+                ret, pos = _decode_zigzag(buf, pos)
+                skip_args = keep_syscalls is not None and name not in keep_syscalls
+                args = None if skip_args else []
+                for atype, aname, kind in arg_schemas:
+                    # the values of a skipped record are still decoded, to reach the next record
+                    # and to keep the string dictionary complete
+                    if kind == _ARG_STR_PTR:
+                        ptr, pos = _decode_varint(buf, pos)
+                        memval, pos = decode_string(pos)
+                        if not skip_args:
+                            args.append(SyscallArgStrPtr(aname, atype, ptr, memval))
+                    else:
+                        value, pos = _decode_zigzag(buf, pos)
+                        if not skip_args:
+                            args.append(SyscallArgInteger(aname, atype, value))
+            except IndexError:
+                # the record is cut at the end of the buffer: roll back what it added, then read on
+                del strings[n_strings:]
+                del schemas[n_schemas:]
+                chunk = strace_fp.read(_READ_CHUNK)
+                if not chunk:
+                    if record_start < len(buf):
+                        raise ValueError("Truncated binary strace at offset %d" % (offset + record_start))
+                    return
+                offset += record_start
+                buf = buf[record_start:] + chunk
+                pos = 0
+                continue
+            yield StraceRecord(syscall_id, name, args, ret), offset + record_start, offset + pos
@@ -0,0 +1,119 @@
+import re
+from typing import FrozenSet, Iterator, Optional, TextIO, Tuple
+
+from .strace_parser import StraceInputParser, StraceRecord
+from ..syscalls.syscall import SyscallArgInteger, SyscallArgLazyStrPtr
+
+
+class FastStraceInputParser:
+    """
+    A hand-written tokenizer for the FESVR strace format:
+
+        [id] sys_name (
+          type name = val
+          ...
+        ) -> ret
+
+    It accepts the same grammar as StraceInputParser, but matches each token with a
+    precompiled regex instead of building a pyparsing parse tree. The base64 memory
+    value of string pointer arguments is decoded lazily (see SyscallArgLazyStrPtr).
+    """
+
+    _ident = r"[A-Za-z][A-Za-z0-9_]*"
+    _integer = r"0x[0-9a-fA-F]+|[+-]?\d+"
+
+    re_header = re.compile(r"\s*\[([+-]?\d+)\]\s*(%s)\s*\(" % _ident)
+    re_arg = re.compile(
+        r"\s*(?:(%s)\s+(%s)\s*=\s*(%s)|(%s)\s+(%s)\s*=\s*(0x[0-9a-fA-F]+)\s*\|([A-Za-z0-9+/]*={0,2})\|)" % (
+            "|".join(StraceInputParser.list_arg_type_num), _ident, _integer,
+            "|".join(StraceInputParser.list_arg_type_strptr), _ident
+        )
+    )
+    re_tail = re.compile(r"\s*\)\s*->\s*([+-]?\d+)")
+
+    @staticmethod
+    def _to_int(val):
+        # type: (str) -> int
+        if val.startswith("0x"):
+            return int(val, 16)
+        return int(val)
+
+    @classmethod
+    def parse_stream(cls, strace_fp, keep_syscalls=None):
+        # type: (TextIO, Optional[FrozenSet[str]]) -> Iterator[Tuple[StraceRecord, int, int]]
+        """
+        Parse the strace from a text stream one line at a time.
+        Yield (record, start, end), where start/end are the offsets of the record in the stream, which are
+        its byte offsets in the file when it is opened by open_strace_file.
+        If keep_syscalls is given, the arguments of the other syscalls are neither tokenized nor built,
+        and their records are yielded without arguments (see StraceRecord).
+        """
+        re_header_match = cls.re_header.match
+        re_arg_match = cls.re_arg.match
+        re_tail_match = cls.re_tail.match
+        re_tail_search = cls.re_tail.search
+        to_int = cls._to_int
+
+        in_record = False
+        skip_args = False
+        syscall_id = 0
+        syscall_name = ""
+        args = []
+        record_start = 0
+        offset = 0
+        for line in strace_fp:
+            line_start = offset
+            offset += len(line)
+            pos = 0
+            line_len = len(line)
+            while pos < line_len:
+                if not in_record:
+                    m = re_header_match(line, pos)
+                    if m is None:
+                        break
+                    syscall_id = int(m.group(1))
+                    syscall_name = m.group(2)
+                    skip_args = keep_syscalls is not None and syscall_name not in keep_syscalls
+                    args = None if skip_args else []
+                    record_start = line_start + pos
+                    in_record = True
+                    pos = m.end()
+                    continue
+
+                if skip_args:
+                    # the arguments hold no ")", so the tail is the first one on the line, if any
+                    m = re_tail_search(line, pos)
+                    if m is None:
+                        # an argument line of a skipped record
+                        pos = line_len
+                        break
+                    yield StraceRecord(syscall_id, syscall_name, None, int(m.group(1))), \
+                        record_start, line_start + m.end()
+                    in_record = False
+                    pos = m.end()
+                    continue
+
+                m = re_arg_match(line, pos)
+                if m is not None:
+                    num_type, num_name, num_val, ptr_type, ptr_name, ptr_val, ptr_memval = m.groups()
+                    if num_type is not None:
+                        args.append(SyscallArgInteger(num_name, num_type, to_int(num_val)))
+                    else:
+                        args.append(SyscallArgLazyStrPtr(ptr_name, ptr_type, int(ptr_val, 16), ptr_memval))
+                    pos = m.end()
+                    continue
+
+                m = re_tail_match(line, pos)
+                if m is None:
+                    break
+                yield StraceRecord(syscall_id, syscall_name, args, int(m.group(1))), record_start, line_start + m.end()
+                in_record = False
+                pos = m.end()
+
+            if pos < line_len and line[pos:].strip():
+                raise ValueError(
+                    "Malformed syscall record at offset %d: %s" % (line_start + pos, line[pos:].strip())
+                )
+
+        if in_record:
+            raise ValueError("Incomplete syscall record at offset %d" % record_start)
@@ -0,0 +1,84 @@
+import bz2
+import gzip
+import io
+import lzma
+from typing import BinaryIO, Optional, TextIO
+
+from .strace_binary import BINARY_MAGIC, is_binary_strace_head
+
+# (magic bytes, compression name, opener)
+_COMPRESSION_FORMATS = (
+    (b"\x1f\x8b", "gzip", gzip.open),
+    (b"\xfd7zXZ\x00", "xz", lzma.open),
+    (b"BZh", "bz2", bz2.open),
+)
+COMPRESSION_MAGIC_LEN = max(len(magic) for magic, _, _ in _COMPRESSION_FORMATS)
+
+# a strace file is read as text in latin-1, which decodes each byte to one character, and without
+# newline translation, so the offsets of the records in the text are their byte offsets in the file
+STRACE_ENCODING = "latin-1"
+STRACE_NEWLINE = ""
+
+
+def detect_strace_compression(strace_path):
+    # type: (str) -> Optional[str]
+    """
+    Return the compression format of a strace file by its magic bytes, or None for a plain text file.
+    """
+    with open(strace_path, "rb") as fp:
+        return detect_compression_magic(fp.read(COMPRESSION_MAGIC_LEN))
+
+
+def detect_compression_magic(head):
+    # type: (bytes) -> Optional[str]
+    """
+    Return the compression format given the first bytes of a strace file, or None for plain text.
+    """
+    for magic, name, _ in _COMPRESSION_FORMATS:
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def wrap_strace_fileobj(fileobj, compression):
+    # type: (BinaryIO, Optional[str]) -> TextIO
+    """
+    Wrap a binary stream of a strace file as text, decompressing it on the fly if it is compressed.
+    """
+    for _, name, opener in _COMPRESSION_FORMATS:
+        if name == compression:
+            return opener(fileobj, "rt", encoding=STRACE_ENCODING, newline=STRACE_NEWLINE)
+    return io.TextIOWrapper(fileobj, encoding=STRACE_ENCODING, newline=STRACE_NEWLINE)
+
+
+def open_strace_file(strace_path):
+    # type: (str) -> TextIO
+    """
+    Open a strace file for reading as text, decompressing it on the fly if it is compressed.
+    """
+    compression = detect_strace_compression(strace_path)
+    for _, name, opener in _COMPRESSION_FORMATS:
+        if name == compression:
+            return opener(strace_path, "rt", encoding=STRACE_ENCODING, newline=STRACE_NEWLINE)
+    return open(strace_path, "r", encoding=STRACE_ENCODING, newline=STRACE_NEWLINE)
+
+
+def open_strace_file_binary(strace_path):
+    # type: (str) -> BinaryIO
+    """
+    Open a strace file for reading as bytes, decompressing it on the fly if it is compressed.
+    """
+    compression = detect_strace_compression(strace_path)
+    for _, name, opener in _COMPRESSION_FORMATS:
+        if name == compression:
+            return opener(strace_path, "rb")
+    return open(strace_path, "rb")
+
+
+def is_binary_strace(strace_path):
+    # type: (str) -> bool
+    """
+    Check whether a strace file, once decompressed, is in the compact binary format (see strace_binary).
+    """
+    with open_strace_file_binary(strace_path) as fp:
+        return is_binary_strace_head(fp.read(len(BINARY_MAGIC)))
@@ -0,0 +1,107 @@
+import io
+import os
+import time
+from typing import Callable, Optional, TextIO
+
+from .strace_file import COMPRESSION_MAGIC_LEN, detect_compression_magic, wrap_strace_fileobj
+
+DEFAULT_POLL_INTERVAL = 0.5
+
+
+def is_pid_alive(pid):
+    # type: (int) -> bool
+    """
+    Check whether a process is still running. A zombie process has exited, so it is not alive.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # the process exists but belongs to another user
+        pass
+    try:
+        with open("/proc/%d/stat" % pid, "r") as fp:
+            # the state follows the executable name, which is in parentheses and may contain spaces
+            return fp.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except (OSError, IndexError):
+        return True
+
+
+class FollowedFile(io.RawIOBase):
+    """
+    A read-only binary stream of a file that is still being appended to, like "tail -f".
+
+    A read at the end of the file waits until the writer appends more data, so a consumer sees the
+    complete content of the file as one stream. The stream only ends once the writer has exited
+    (as told by is_writer_alive) and everything it wrote has been read.
+    """
+
+    def __init__(self, path, is_writer_alive, poll_interval=DEFAULT_POLL_INTERVAL):
+        # type: (str, Callable[[], bool], float) -> None
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self._is_writer_alive = is_writer_alive
+        self._writer_exited = False
+        self._fp = None  # type: Optional[io.FileIO]
+        while True:
+            try:
+                self._fp = open(path, "rb", buffering=0)
+                break
+            except FileNotFoundError:
+                if not self._poll_writer():
+                    raise
+
+    def _poll_writer(self):
+        # type: () -> bool
+        """
+        Wait for the writer to make progress. Return False once the writer has exited.
+        """
+        if self._writer_exited:
+            return False
+        if not self._is_writer_alive():
+            # one more read is still needed to drain what the writer wrote before exiting
+            self._writer_exited = True
+        else:
+            time.sleep(self.poll_interval)
+        return True
+
+    def readable(self):
+        # type: () -> bool
+        return True
+
+    def readinto(self, b):
+        n = self._fp.readinto(b)
+        while not n and self._poll_writer():
+            n = self._fp.readinto(b)
+        return n
+
+    def peek_head(self, size):
+        # type: (int) -> bytes
+        """
+        Return the first [size] bytes of the file without consuming them, waiting for the writer
+        to write them. Fewer bytes are returned if the writer exits before writing them.
+        """
+        head = os.pread(self._fp.fileno(), size, 0)
+        while len(head) < size and self._poll_writer():
+            head = os.pread(self._fp.fileno(), size, 0)
+        return head
+
+    def close(self):
+        # type: () -> None
+        if self._fp is not None:
+            self._fp.close()
+        super().close()
+
+
+def open_followed_strace_file(strace_path, is_writer_alive, poll_interval=DEFAULT_POLL_INTERVAL):
+    # type: (str, Callable[[], bool], float) -> TextIO
+    """
+    Open a strace file that the simulator is still writing, for reading as text. Reading ends once
+    the writer has exited. The file may not exist yet, and may be compressed by a streaming
+    compressor, in which case the writer to follow is the compressor.
+    """
+    followed_file = FollowedFile(strace_path, is_writer_alive, poll_interval)
+    compression = detect_compression_magic(followed_file.peek_head(COMPRESSION_MAGIC_LEN))
+    return wrap_strace_fileobj(io.BufferedReader(followed_file), compression)
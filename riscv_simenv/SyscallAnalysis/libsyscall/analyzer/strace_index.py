@@ -0,0 +1,157 @@
+import hashlib
+import io
+import os
+import struct
+from array import array
+from typing import Iterator, List, Optional, Tuple
+
+from .strace_fast_parser import FastStraceInputParser
+from .strace_file import STRACE_ENCODING, STRACE_NEWLINE, open_strace_file
+from .strace_parser import StraceRecord
+from ..syscalls.syscall import Syscall
+
+INDEX_SUFFIX = ".idx"
+DEFAULT_INDEX_INTERVAL = 1024
+
+_INDEX_MAGIC = b"STRACEIX"
+# magic, format version, interval, trace size, trace mtime_ns
+_INDEX_HEADER = struct.Struct("<8sIIQQ")
+# version 1 recorded character offsets, which are not the byte offsets in a CRLF or non-ASCII trace
+_INDEX_VERSION = 2
+
+
+def get_strace_index_path(index_dir, strace_path):
+    # type: (str, str) -> str
+    """
+    Return the path of the index of a strace file in a directory of indexes, named after the absolute path of the trace,
+    so the indexes are not written next to the traces.
+    """
+    path_hash = hashlib.sha256(os.path.abspath(strace_path).encode("utf-8", "surrogateescape")).hexdigest()
+    return os.path.join(index_dir, path_hash + INDEX_SUFFIX)
+
+
+class StraceIndex:
+    """
+    An index of a strace file: the byte offset of every [interval]-th record,
+    so the record with a given seq_no can be reached by parsing at most [interval] records.
+
+    The index remembers the size and mtime of the trace it was built from, and is not
+    loaded if the trace has changed since.
+    """
+
+    def __init__(self, interval, offsets):
+        # type: (int, array) -> None
+        self.interval = interval
+        self.offsets = offsets
+
+    def lookup(self, seq_no):
+        # type: (int) -> Tuple[int, int]
+        """
+        Return (seq_no, offset) of the indexed record closest to, but not after, the given seq_no.
+        """
+        slot = min(max(seq_no, 0) // self.interval, len(self.offsets) - 1)
+        return slot * self.interval, self.offsets[slot]
+
+    def save(self, strace_path, index_path):
+        # type: (str, str) -> None
+        st = os.stat(strace_path)
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "wb") as fp:
+            fp.write(_INDEX_HEADER.pack(_INDEX_MAGIC, _INDEX_VERSION, self.interval, st.st_size, st.st_mtime_ns))
+            self.offsets.tofile(fp)
+        os.replace(tmp_path, index_path)
+
+    @classmethod
+    def load(cls, strace_path, index_path):
+        # type: (str, str) -> Optional[StraceIndex]
+        """
+        Load the index of a strace file. Return None if there is no index or it is out of date.
+        """
+        try:
+            with open(index_path, "rb") as fp:
+                header = fp.read(_INDEX_HEADER.size)
+                body = fp.read()
+        except FileNotFoundError:
+            return None
+        if len(header) != _INDEX_HEADER.size:
+            return None
+        magic, version, interval, size, mtime_ns = _INDEX_HEADER.unpack(header)
+        st = os.stat(strace_path)
+        if magic != _INDEX_MAGIC or version != _INDEX_VERSION or (size, mtime_ns) != (st.st_size, st.st_mtime_ns):
+            return None
+        offsets = array("Q")
+        offsets.frombytes(body[:len(body) - len(body) % offsets.itemsize])
+        if not offsets:
+            return None
+        return cls(interval, offsets)
+
+
+class StraceIndexBuilder:
+    """
+    Build a StraceIndex as a side effect of a normal parse.
+    Subscribe on_syscall to the SyscallEventBus of a SyscallTraceConstructor that parses an
+    uncompressed strace file, then call build() or save(). Subscribe on_skipped too, so the
+    records of the syscalls that are not constructed are indexed as well.
+    """
+    RELEVANT_SYSCALLS = frozenset()
+
+    def __init__(self, interval=DEFAULT_INDEX_INTERVAL):
+        # type: (int) -> None
+        self.interval = interval
+        self.offsets = array("Q")
+
+    def on_syscall(self, s, start, end):
+        # type: (Syscall, int, int) -> None
+        if s.seq_no % self.interval == 0:
+            self.offsets.append(start)
+
+    def on_skipped(self, record, seq_no, start, end):
+        # type: (StraceRecord, int, int, int) -> None
+        if seq_no % self.interval == 0:
+            self.offsets.append(start)
+
+    def build(self):
+        # type: () -> StraceIndex
+        return StraceIndex(self.interval, self.offsets)
+
+
+def build_strace_index(strace_path, interval=DEFAULT_INDEX_INTERVAL):
+    # type: (str, int) -> StraceIndex
+    """
+    Build the index of a strace file by only tokenizing it, which is much faster than a full parse.
+    """
+    offsets = array("Q")
+    with open_strace_file(strace_path) as fp:
+        for seq_no, (_, start, _) in enumerate(FastStraceInputParser.parse_stream(fp)):
+            if seq_no % interval == 0:
+                offsets.append(start)
+    return StraceIndex(interval, offsets)
+
+
+def iter_strace_records_from(strace_path, index, seq_no):
+    # type: (str, StraceIndex, int) -> Iterator[Tuple[int, StraceRecord, int, int]]
+    """
+    Yield (seq_no, record, start, end) from the indexed record closest to seq_no onwards.
+    """
+    first_seq_no, offset = index.lookup(seq_no)
+    with open(strace_path, "rb") as fp:
+        fp.seek(offset)
+        text_fp = io.TextIOWrapper(fp, encoding=STRACE_ENCODING, newline=STRACE_NEWLINE)
+        for cur_seq_no, (record, start, end) in enumerate(FastStraceInputParser.parse_stream(text_fp), first_seq_no):
+            yield cur_seq_no, record, offset + start, offset + end
+
+
+def read_strace_window(strace_path, index, seq_no, before, after):
+    # type: (str, StraceIndex, int, int, int) -> List[Tuple[int, StraceRecord, int, int]]
+    """
+    Return the records from seq_no - before to seq_no + after (inclusive).
+    """
+    first = max(seq_no - before, 0)
+    window = []
+    for rec in iter_strace_records_from(strace_path, index, first):
+        if rec[0] > seq_no + after:
+            break
+        if rec[0] >= first:
+            window.append(rec)
+    return window
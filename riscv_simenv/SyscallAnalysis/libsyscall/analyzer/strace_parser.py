@@ -1,7 +1,21 @@
 import base64
+import re
+from typing import FrozenSet, Iterator, Optional, TextIO, Tuple, NamedTuple
 
 from pyparsing import Suppress, Word, alphas, alphanums, Regex, oneOf, Group, ZeroOrMore, StringEnd, \
-    ParseFatalException, ParseResults
+    ParseFatalException, ParseResults, ParseBaseException
+
+from ..syscalls.syscall import SyscallArgInteger, SyscallArgStrPtr, SyscallArgList_t
+
+# A syscall record parsed from the strace, with its arguments already converted to SyscallArg objects.
+# All parser backends produce records in this form.
+# syscall_args is None for a record skipped by the keep_syscalls filter of a parser
+StraceRecord = NamedTuple("StraceRecord", [
+    ("syscall_id", int),
+    ("syscall_name", str),
+    ("syscall_args", SyscallArgList_t),
+    ("ret_code", int),
+])
 
 
 class StraceInputParser:
@@ -49,6 +63,9 @@ class StraceInputParser:
 
     scall_traces = scall_record | StringEnd()
 
+    # the line that closes a record, i.e. ") -> ret_code"
+    record_end = re.compile(r"\)\s*->\s*[+-]?\d+\s*$")
+
     @staticmethod
     def on_parse_fail(s, loc, expr, err):
         raise ParseFatalException(s, loc, str(err))
@@ -63,6 +80,65 @@ class StraceInputParser:
         for item in cls.scall_traces.scanString(strace_str):
             yield item
 
+    @classmethod
+    def to_record(cls, p):
+        # type: (ParseResults) -> StraceRecord
+        args = list()
+        for pa in p.syscall_args:
+            if pa.arg_type in cls.list_arg_type_strptr:
+                args.append(SyscallArgStrPtr(pa.arg_name, pa.arg_type, pa.arg_val, pa.arg_memval))
+            elif pa.arg_type in cls.list_arg_type_num:
+                args.append(SyscallArgInteger(pa.arg_name, pa.arg_type, pa.arg_val))
+            else:
+                raise ValueError("Invalid syscall argument type %s" % pa.arg_type)
+        return StraceRecord(p.syscall_id, p.syscall_name, args, p.ret_code)
+
+    @classmethod
+    def parse_stream(cls, strace_fp, keep_syscalls=None):
+        # type: (TextIO, Optional[FrozenSet[str]]) -> Iterator[Tuple[StraceRecord, int, int]]
+        """
+        Parse the strace from a text stream one record at a time.
+        Only the lines of the record being parsed are buffered, so the memory
+        consumption does not depend on the size of the trace.
+        Yield (record, start, end), where start/end are the offsets of the record in the stream, which are
+        its byte offsets in the file when it is opened by open_strace_file.
+        If keep_syscalls is given, the arguments of the other syscalls are not built (see StraceRecord).
+        """
+        record_lines = []
+        record_start = 0
+        offset = 0
+        for line in strace_fp:
+            line_start = offset
+            offset += len(line)
+            if not record_lines:
+                if not line.strip():
+                    continue
+                record_start = line_start
+            record_lines.append(line)
+            if cls.record_end.search(line):
+                record = cls.parse_record("".join(record_lines), record_start)
+                if keep_syscalls is not None and record.syscall_name not in keep_syscalls:
+                    yield StraceRecord(record.syscall_id, record.syscall_name, None, record.ret_code), \
+                        record_start, offset
+                else:
+                    yield cls.to_record(record), record_start, offset
+                record_lines = []
+
+        if record_lines:
+            raise ParseFatalException(
+                "".join(record_lines), 0, "Incomplete syscall record at offset %d" % record_start
+            )
+
+    @classmethod
+    def parse_record(cls, record_str, record_start=0):
+        # type: (str, int) -> ParseResults
+        try:
+            return cls.scall_record.parseString(record_str, parseAll=True)
+        except ParseBaseException as pe:
+            raise ParseFatalException(
+                record_str, pe.loc, "%s (record at offset %d)" % (pe.msg, record_start)
+            )
+
     @classmethod
     def stringify(cls, s):
         # type: (ParseResults) -> str
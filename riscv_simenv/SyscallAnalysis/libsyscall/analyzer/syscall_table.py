@@ -0,0 +1,242 @@
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .file_usage import FileUsageInfo, iter_file_usage
+from ..syscalls import syscall as s
+from ..syscalls.sys_lseek import sys_lseek
+from ..syscalls.sys_pread import sys_pread
+from ..syscalls.sys_pwrite import sys_pwrite
+from ..syscalls.sys_read import sys_read
+from ..syscalls.sys_write import sys_write
+
+_READ_SYSCALLS = ("sys_read", "sys_pread")
+_WRITE_SYSCALLS = ("sys_write", "sys_pwrite")
+
+
+class _InternTable:
+    def __init__(self):
+        # type: () -> None
+        self.ids = dict()  # type: Dict[str, int]
+        self.values = list()  # type: List[str]
+
+    def intern(self, v):
+        # type: (str) -> int
+        vid = self.ids.get(v)
+        if vid is None:
+            vid = len(self.values)
+            self.ids[v] = vid
+            self.values.append(v)
+        return vid
+
+
+class SyscallTableBuilder:
+    """
+    Collect a columnar representation of a trace.
+    Subscribe on_syscall to the SyscallEventBus of a SyscallTraceConstructor, then call build().
+
+    The columns are buffered in compact typed arrays while the trace is parsed,
+    so the syscall objects themselves do not need to be retained.
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.names = _InternTable()
+        self.paths = _InternTable()
+
+        self.seq_no = array("q")
+        self.syscall_id = array("q")
+        self.name = array("i")
+        self.ret = array("q")
+        self.success = array("b")
+        self.fd = array("q")
+        self.count = array("q")
+        self.offset = array("q")
+        self.path_id = array("i")
+
+        # one row for every (path, FUSE bits) pair reported by iter_file_usage()
+        self.usage_path_id = array("i")
+        self.usage_fuse = array("q")
+
+    def _intern_path(self, f):
+        # type: (s.GenericPath) -> int
+        return self.paths.intern(f.abspath())
+
+    def _get_path_id(self, scall):
+        # type: (s.Syscall) -> int
+        try:
+            if isinstance(scall, s.MixinSyscallUseFd) and not isinstance(scall, s.MixinSyscallHasPathArgs):
+                fd_def = scall.def_list[0] if scall.def_list else None
+                if fd_def is not None:
+                    return self._intern_path(fd_def.def_fd_get_path())
+            elif isinstance(scall, s.MixinSyscallHasPathArgs):
+                arg_paths = scall.get_arg_paths()
+                if arg_paths:
+                    return self._intern_path(arg_paths[0])
+        except ValueError:
+            # the FD of a failed syscall may not be resolvable
+            pass
+        return -1
+
+    def on_syscall(self, scall, start, end):
+        # type: (s.Syscall, int, int) -> None
+        scall_type = type(scall)
+        self.seq_no.append(scall.seq_no)
+        self.syscall_id.append(scall.syscall_id)
+        self.name.append(self.names.intern(scall.name))
+        self.ret.append(scall.ret)
+        self.success.append(scall.is_success())
+        if isinstance(scall, s.MixinSyscallUseFd) and not isinstance(scall, s.MixinSyscallHasPathArgs):
+            self.fd.append(scall.use_fd_get_fds()[0])
+        else:
+            self.fd.append(-1)
+        if scall_type in (sys_read, sys_write, sys_pread, sys_pwrite):
+            self.count.append(scall.count)
+        else:
+            self.count.append(0)
+        if scall_type in (sys_pread, sys_pwrite, sys_lseek):
+            self.offset.append(scall.offset)
+        else:
+            self.offset.append(-1)
+        self.path_id.append(self._get_path_id(scall))
+
+        for f, fuse in iter_file_usage(scall):
+            if f.isabs():
+                fuse |= FileUsageInfo.FUSE_ABS_REF
+            self.usage_path_id.append(self._intern_path(f))
+            self.usage_fuse.append(fuse)
+
+    def build(self):
+        # type: () -> SyscallTable
+        def _np(a, dtype):
+            return np.frombuffer(a, dtype=dtype) if len(a) else np.zeros(0, dtype=dtype)
+
+        return SyscallTable(
+            names=self.names.values,
+            paths=self.paths.values,
+            seq_no=_np(self.seq_no, np.int64),
+            syscall_id=_np(self.syscall_id, np.int64),
+            name=_np(self.name, np.int32),
+            ret=_np(self.ret, np.int64),
+            success=_np(self.success, np.int8).astype(bool),
+            fd=_np(self.fd, np.int64),
+            count=_np(self.count, np.int64),
+            offset=_np(self.offset, np.int64),
+            path_id=_np(self.path_id, np.int32),
+            usage_path_id=_np(self.usage_path_id, np.int32),
+            usage_fuse=_np(self.usage_fuse, np.int64),
+        )
+
+
+class SyscallTable:
+    """
+    A parsed trace stored column by column in NumPy arrays, one row per syscall.
+    name and path_id are codes into the interned names and paths tables (-1 for no path).
+    """
+
+    def __init__(self, names, paths, seq_no, syscall_id, name, ret, success, fd, count, offset, path_id,
+                 usage_path_id, usage_fuse):
+        # type: (List[str], List[str], np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray) -> None
+        self.names = names
+        self.paths = paths
+        self.seq_no = seq_no
+        self.syscall_id = syscall_id
+        self.name = name
+        self.ret = ret
+        self.success = success
+        self.fd = fd
+        self.count = count
+        self.offset = offset
+        self.path_id = path_id
+        self.usage_path_id = usage_path_id
+        self.usage_fuse = usage_fuse
+
+    def __len__(self):
+        # type: () -> int
+        return len(self.seq_no)
+
+    def _name_codes(self, names):
+        # type: (Tuple[str, ...]) -> np.ndarray
+        return np.array([self.names.index(n) for n in names if n in self.names], dtype=np.int32)
+
+    def _tally(self, keys, n_keys, mask=None, weights=None):
+        # type: (np.ndarray, int, Optional[np.ndarray], Optional[np.ndarray]) -> np.ndarray
+        if mask is not None:
+            keys = keys[mask]
+            weights = weights[mask] if weights is not None else None
+        if weights is None:
+            return np.bincount(keys, minlength=n_keys)
+        # np.bincount() accumulates weights in float64, which is not exact for large byte counts
+        tally = np.zeros(n_keys, dtype=np.int64)
+        np.add.at(tally, keys, weights)
+        return tally
+
+    def syscall_histogram(self):
+        # type: () -> Dict[str, int]
+        counts = self._tally(self.name, len(self.names))
+        return {self.names[i]: int(c) for i, c in enumerate(counts)}
+
+    def failed_call_counts(self):
+        # type: () -> Dict[str, int]
+        counts = self._tally(self.name, len(self.names), mask=~self.success)
+        return {self.names[i]: int(c) for i, c in enumerate(counts) if c}
+
+    def _io_masks(self):
+        # type: () -> Tuple[np.ndarray, np.ndarray]
+        transferred = self.success & (self.ret > 0)
+        is_read = np.isin(self.name, self._name_codes(_READ_SYSCALLS)) & transferred
+        is_write = np.isin(self.name, self._name_codes(_WRITE_SYSCALLS)) & transferred
+        return is_read, is_write
+
+    def io_bytes_by_path(self):
+        # type: () -> Dict[str, Tuple[int, int]]
+        """
+        Return {path: (bytes read, bytes written)} for every path with data transferred.
+        """
+        is_read, is_write = self._io_masks()
+        has_path = self.path_id >= 0
+        n_paths = len(self.paths)
+        read = self._tally(self.path_id, n_paths, mask=is_read & has_path, weights=self.ret)
+        written = self._tally(self.path_id, n_paths, mask=is_write & has_path, weights=self.ret)
+        active = np.flatnonzero(read + written)
+        return {self.paths[i]: (int(read[i]), int(written[i])) for i in active}
+
+    def io_bytes_by_fd(self):
+        # type: () -> Dict[int, Tuple[int, int]]
+        """
+        Return {fd: (bytes read, bytes written)} for every fd number with data transferred.
+        """
+        is_read, is_write = self._io_masks()
+        fds, fd_codes = np.unique(self.fd, return_inverse=True)
+        read = self._tally(fd_codes, len(fds), mask=is_read, weights=self.ret)
+        written = self._tally(fd_codes, len(fds), mask=is_write, weights=self.ret)
+        active = np.flatnonzero(read + written)
+        return {int(fds[i]): (int(read[i]), int(written[i])) for i in active}
+
+    def file_usage_bitmask(self):
+        # type: () -> Dict[str, FileUsageInfo]
+        """
+        Reduce the usage rows into the per-path FileUsageInfo, the same result as stat_file_usage().
+        """
+        if not len(self.usage_path_id):
+            return dict()
+        order = np.argsort(self.usage_path_id, kind="stable")
+        sorted_path_id = self.usage_path_id[order]
+        sorted_fuse = self.usage_fuse[order]
+        is_new_group = np.r_[True, sorted_path_id[1:] != sorted_path_id[:-1]]
+        group_starts = np.flatnonzero(is_new_group)
+        fuse = np.bitwise_or.reduceat(sorted_fuse, group_starts)
+
+        # the stable sort keeps the rows of a path in trace order: like fold_file_usage(), flag the paths with
+        # a content access in a row before the first truncating open of the path
+        is_trunc = (sorted_fuse & FileUsageInfo.FUSE_OPEN_TRUNC) != 0
+        n_trunc_before = np.cumsum(is_trunc) - is_trunc
+        n_trunc_before -= n_trunc_before[group_starts][np.cumsum(is_new_group) - 1]
+        pre_trunc = (n_trunc_before == 0) & ~is_trunc & ((sorted_fuse & FileUsageInfo.CONTENT_ACCESS_MASK) != 0)
+        has_pre_trunc_access = np.logical_or.reduceat(pre_trunc, group_starts)
+        fuse[has_pre_trunc_access & ((fuse & FileUsageInfo.FUSE_OPEN_TRUNC) != 0)] |= \
+            FileUsageInfo.FUSE_PRE_TRUNC_ACCESS
+        return {
+            self.paths[sorted_path_id[i]]: FileUsageInfo(int(f)) for i, f in zip(group_starts, fuse)
+        }
@@ -1,40 +1,125 @@
-from typing import List, Iterable
-
-from pyparsing import ParseResults
+import time
+from collections import Counter
+from typing import Callable, FrozenSet, List, Iterable, TextIO, Optional
 
+from .event_bus import SyscallEventBus
 from .fd_tracker import FileDescriptorTracker
-from .strace_parser import StraceInputParser
+from .strace_fast_parser import FastStraceInputParser
+from .strace_binary import BinaryStraceReader
+from .strace_file import is_binary_strace, open_strace_file, open_strace_file_binary
+from .strace_follow import DEFAULT_POLL_INTERVAL, open_followed_strace_file
+from .strace_parser import StraceInputParser, StraceRecord
+from .trace_stats import TraceStats, timed_phase
 from ..syscalls import factory as syscall_factory
-from ..syscalls.syscall import SyscallArgInteger, SyscallArgStrPtr, MixinSyscallUseFd, MixinSyscallDefFd, Syscall
+from ..syscalls.syscall import MixinSyscallUseFd, MixinSyscallDefFd, Syscall
+
+STRACE_PARSERS = {
+    "fast": FastStraceInputParser,
+    "pyparsing": StraceInputParser,
+}
+DEFAULT_STRACE_PARSER = "fast"
 
 
 class SyscallTraceConstructor:
 
-    def __init__(self, initial_working_dir):
-        # type: (str) -> None
+    def __init__(self, initial_working_dir, retain_syscalls=True, stats=None, skip_irrelevant=False):
+        # type: (str, bool, Optional[TraceStats], bool) -> None
+        """
+        If retain_syscalls is False, the constructed syscalls are only dispatched to the
+        subscribers of the event bus and then dropped: self.syscalls stays empty and the FD
+        definitions only count their uses instead of keeping them in the use_list.
+
+        If stats is given, it is updated with the per-record counters and timers.
+
+        If skip_irrelevant is True, the records of the syscalls that no subscriber of the event bus
+        needs (see SyscallEventBus.subscribe) are not constructed: they are dropped by the parser
+        before their arguments are built, and only counted in skipped_counts. The syscalls that
+        affect the FD tracker are always constructed, and the skipped records still take their
+        seq_no, so the seq_no of a syscall is its position in the trace either way.
+        """
         self.syscalls = list()  # type: List[Syscall]
+        self.n_syscalls = 0
+        self.skip_irrelevant = skip_irrelevant
+        self.skipped_counts = Counter()  # type: Counter
+        self.retain_syscalls = retain_syscalls
+        self.stats = stats
         self.fd_res = FileDescriptorTracker(initial_working_dir)
+        self.event_bus = SyscallEventBus()
 
     def get_fd_resolver(self):
         # type: () -> FileDescriptorTracker
         return self.fd_res
 
+    def get_event_bus(self):
+        # type: () -> SyscallEventBus
+        return self.event_bus
+
+    def get_syscall_filter(self):
+        # type: () -> Optional[FrozenSet[str]]
+        """
+        Return the names of the syscalls to construct, or None to construct all of them.
+        """
+        if not self.skip_irrelevant:
+            return None
+        relevant = self.event_bus.relevant_syscalls()
+        if relevant is None:
+            return None
+        return relevant | frozenset(self.fd_res.triggers)
+
     def on_strace_parsed(self, p, start, end):
-        # type: (ParseResults, int, int) -> None
-        args = list()
-        for pa in p.syscall_args:
-            if pa.arg_type in StraceInputParser.list_arg_type_strptr:
-                args.append(SyscallArgStrPtr(pa.arg_name, pa.arg_type, pa.arg_val, pa.arg_memval))
-            elif pa.arg_type in StraceInputParser.list_arg_type_num:
-                args.append(SyscallArgInteger(pa.arg_name, pa.arg_type, pa.arg_val))
-            else:
-                raise ValueError("Invalid syscall argument type %s" % p.arg_type)
+        # type: (StraceRecord, int, int) -> None
+        if p.syscall_args is None:
+            self._skip(p, start, end)
+            return
+        if self.stats is not None:
+            self._on_strace_parsed_timed(p, start, end)
+            return
+        new_syscall = self._construct(p)
+        self._resolve_fd(new_syscall, start, end)
+        self.event_bus.publish(new_syscall, start, end)
+
+    def _on_strace_parsed_timed(self, p, start, end):
+        # type: (StraceRecord, int, int) -> None
+        stats = self.stats
+        t0 = time.perf_counter()
+        new_syscall = self._construct(p)
+        t1 = time.perf_counter()
+        self._resolve_fd(new_syscall, start, end)
+        t2 = time.perf_counter()
+        self.event_bus.publish(new_syscall, start, end)
+        t3 = time.perf_counter()
+        stats.time_construct += t1 - t0
+        stats.time_fd_resolve += t2 - t1
+        stats.time_listeners += t3 - t2
+        stats.n_records += 1
+        stats.bytes_consumed = end
+        stats.syscall_counts[p.syscall_name] += 1
+
+    def _skip(self, p, start, end):
+        # type: (StraceRecord, int, int) -> None
+        seq_no = self.n_syscalls
+        self.n_syscalls += 1
+        self.skipped_counts[p.syscall_name] += 1
+        if self.stats is not None:
+            self.stats.n_records += 1
+            self.stats.bytes_consumed = end
+            self.stats.syscall_counts[p.syscall_name] += 1
+            self.stats.skipped_counts[p.syscall_name] += 1
+        self.event_bus.publish_skipped(p, seq_no, start, end)
+
+    def _construct(self, p):
+        # type: (StraceRecord) -> Syscall
         new_syscall = syscall_factory.construct_syscall(
-            p.syscall_name, args, p.ret_code, p.syscall_id,
-            self.fd_res.getcwd(), len(self.syscalls)
+            p.syscall_name, p.syscall_args, p.ret_code, p.syscall_id,
+            self.fd_res.getcwd(), self.n_syscalls
         )
-        self.syscalls.append(new_syscall)
+        self.n_syscalls += 1
+        if self.retain_syscalls:
+            self.syscalls.append(new_syscall)
+        return new_syscall
 
+    def _resolve_fd(self, new_syscall, start, end):
+        # type: (Syscall, int, int) -> None
         if isinstance(new_syscall, MixinSyscallUseFd):
             fd_defs = map(
                 lambda fd: self.fd_res.lookup_def(fd),
@@ -43,7 +128,10 @@ class SyscallTraceConstructor:
 
             for fd_def in fd_defs:
                 if fd_def:
-                    fd_def.def_fd_add_use(new_syscall)
+                    if self.retain_syscalls:
+                        fd_def.def_fd_add_use(new_syscall)
+                    else:
+                        fd_def.def_fd_count_use()
                 new_syscall.use_fd_add_def(fd_def)
 
         self.fd_res.on_syscall(new_syscall, start, end)
@@ -52,4 +140,36 @@ class SyscallTraceConstructor:
         # type: (str) -> None
         for i, start, end in StraceInputParser.parse(strace_str):
             if i:
-                self.on_strace_parsed(i, start, end)
+                self.on_strace_parsed(StraceInputParser.to_record(i), start, end)
+
+    def parse_strace_stream(self, strace_fp, parser=DEFAULT_STRACE_PARSER):
+        # type: (TextIO, str) -> None
+        for i, start, end in STRACE_PARSERS[parser].parse_stream(strace_fp, self.get_syscall_filter()):
+            self.on_strace_parsed(i, start, end)
+
+    def parse_strace_file(self, strace_path, parser=DEFAULT_STRACE_PARSER):
+        # type: (str, str) -> None
+        """
+        Parse a strace file, which may be compressed with gzip, xz or bz2, and may be in the compact
+        binary format (see strace_binary), in which case the parser is not used.
+        """
+        with timed_phase(self.stats, "parse_trace"):
+            if is_binary_strace(strace_path):
+                with open_strace_file_binary(strace_path) as fp:
+                    for i, start, end in BinaryStraceReader.parse_stream(fp, self.get_syscall_filter()):
+                        self.on_strace_parsed(i, start, end)
+            else:
+                with open_strace_file(strace_path) as fp:
+                    self.parse_strace_stream(fp, parser=parser)
+
+    def follow_strace_file(self, strace_path, is_writer_alive, parser=DEFAULT_STRACE_PARSER,
+                           poll_interval=DEFAULT_POLL_INTERVAL):
+        # type: (str, Callable[[], bool], str, float) -> None
+        """
+        Parse a strace file while it is still being written, like "tail -f": the records are
+        constructed and dispatched as they are appended, and the parsing finishes once the writer
+        has exited (as told by is_writer_alive) and the whole file has been consumed.
+        """
+        with timed_phase(self.stats, "parse_trace"):
+            with open_followed_strace_file(strace_path, is_writer_alive, poll_interval) as fp:
+                self.parse_strace_stream(fp, parser=parser)
@@ -0,0 +1,160 @@
+import contextlib
+import sys
+import time
+from collections import Counter, OrderedDict
+from typing import ContextManager, Dict, Optional, TextIO, Union
+
+from .strace_parser import StraceRecord
+from ..syscalls.syscall import Syscall
+
+
+class TraceStats:
+    """
+    Performance counters of a trace analysis.
+
+    The per-record counters are filled by the SyscallTraceConstructor it is given to,
+    and callers can time their own steps with phase().
+    """
+
+    def __init__(self):
+        # type: () -> None
+        self.phases = OrderedDict()  # type: Dict[str, float]
+        self.n_records = 0
+        self.bytes_consumed = 0
+        self.syscall_counts = Counter()  # type: Counter
+        self.time_construct = 0.0
+        self.time_fd_resolve = 0.0
+        self.time_listeners = 0.0
+        self.cache_hits = 0
+        # the records whose syscall was not constructed, because no analyzer needs it
+        self.skipped_counts = Counter()  # type: Counter
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # type: (str) -> None
+        """
+        Time a step; the time of a phase entered more than once accumulates.
+        """
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - begin
+
+    def merge(self, other):
+        # type: (TraceStats) -> None
+        """
+        Add the counters of another analysis (e.g. one done in a worker process) into this one.
+        """
+        for name, seconds in other.phases.items():
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+        self.n_records += other.n_records
+        self.bytes_consumed += other.bytes_consumed
+        self.syscall_counts.update(other.syscall_counts)
+        self.time_construct += other.time_construct
+        self.time_fd_resolve += other.time_fd_resolve
+        self.time_listeners += other.time_listeners
+        self.cache_hits += other.cache_hits
+        self.skipped_counts.update(other.skipped_counts)
+
+    def to_dict(self):
+        # type: () -> Dict[str, Union[int, float, bool, Dict]]
+        parse_time = self.phases.get("parse_trace", 0.0)
+        return {
+            "cache_hits": self.cache_hits,
+            "records": self.n_records,
+            "bytes": self.bytes_consumed,
+            "records_per_sec": self.n_records / parse_time if parse_time else 0.0,
+            "bytes_per_sec": self.bytes_consumed / parse_time if parse_time else 0.0,
+            "phases": dict(self.phases),
+            "parse_breakdown": {
+                "construct_syscall": self.time_construct,
+                "fd_resolve": self.time_fd_resolve,
+                "listeners": self.time_listeners,
+                # what remains is spent in reading and tokenizing the trace
+                "tokenize": max(parse_time - self.time_construct - self.time_fd_resolve - self.time_listeners, 0.0),
+            },
+            "syscall_counts": dict(self.syscall_counts.most_common()),
+            "skipped_counts": dict(self.skipped_counts.most_common()),
+        }
+
+    def format_summary(self):
+        # type: () -> str
+        d = self.to_dict()
+        lines = []
+        if d["records"]:
+            lines.append("Parsed %d syscalls (%.1f MiB) at %.0f records/s, %.1f MiB/s" % (
+                d["records"], d["bytes"] / (1 << 20), d["records_per_sec"], d["bytes_per_sec"] / (1 << 20)
+            ))
+            lines.append("  " + ", ".join("%s %.2fs" % kv for kv in d["parse_breakdown"].items()))
+        if self.skipped_counts:
+            lines.append("Skipped %d records not needed by the analysis: %s" % (
+                sum(self.skipped_counts.values()), ", ".join("%s %d" % kv for kv in self.skipped_counts.most_common())
+            ))
+        lines.append("Time by phase: " + ", ".join("%s %.2fs" % kv for kv in self.phases.items()))
+        return "\n".join(lines)
+
+
+def timed_phase(stats, name):
+    # type: (Optional[TraceStats], str) -> ContextManager
+    if stats is None:
+        return contextlib.nullcontext()
+    return stats.phase(name)
+
+
+class TraceProgressReporter:
+    """
+    Subscribe on_syscall to a SyscallEventBus to show a live progress line.
+
+    total_bytes is the size of the trace, or None if it is unknown (e.g. a compressed trace),
+    in which case only the position and the throughput are shown.
+    Subscribe on_skipped too, to count the records of the syscalls that are not constructed.
+    """
+    CHECK_EVERY = 4096
+    RELEVANT_SYSCALLS = frozenset()
+
+    def __init__(self, total_bytes=None, out=sys.stderr, interval=0.5):
+        # type: (Optional[int], TextIO, float) -> None
+        self.total_bytes = total_bytes
+        self.out = out
+        self.interval = interval
+        self.n_records = 0
+        self.position = 0
+        self.begin = time.monotonic()
+        self.last_report = self.begin
+
+    def on_syscall(self, s, start, end):
+        # type: (Syscall, int, int) -> None
+        self.on_record(end)
+
+    def on_skipped(self, record, seq_no, start, end):
+        # type: (StraceRecord, int, int, int) -> None
+        self.on_record(end)
+
+    def on_record(self, end):
+        # type: (int) -> None
+        self.n_records += 1
+        self.position = end
+        # checking the clock for every record would cost more than the report itself
+        if self.n_records % self.CHECK_EVERY == 0:
+            now = time.monotonic()
+            if now - self.last_report >= self.interval:
+                self.last_report = now
+                self.report(now)
+
+    def report(self, now):
+        # type: (float) -> None
+        elapsed = max(now - self.begin, 1e-9)
+        line = "%d syscalls, %.1f MiB" % (self.n_records, self.position / (1 << 20))
+        if self.total_bytes:
+            fraction = min(self.position / self.total_bytes, 1.0)
+            line += " / %.1f MiB (%.1f%%)" % (self.total_bytes / (1 << 20), fraction * 100)
+            if fraction > 0:
+                line += ", ETA %ds" % (elapsed / fraction - elapsed)
+        line += ", %.0f records/s" % (self.n_records / elapsed)
+        print("\r\033[K" + line, end="", file=self.out, flush=True)
+
+    def finish(self):
+        # type: () -> None
+        self.report(time.monotonic())
+        print(file=self.out, flush=True)
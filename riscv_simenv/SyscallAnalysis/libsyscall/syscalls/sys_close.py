@@ -4,9 +4,10 @@ from . import syscall as s
 # int close(int fd);
 @s.mixedomatic
 class sys_close(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("target_fd",)
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         self.target_fd = args[0].avalue
 
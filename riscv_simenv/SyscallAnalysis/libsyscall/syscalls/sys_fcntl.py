@@ -8,9 +8,10 @@ from . import syscall as s
 # int fcntl(int fd, int cmd, uint64_t arg);
 @s.mixedomatic
 class sys_fcntl(s.Syscall, s.MixinSyscallDefFd, s.MixinSyscallUseFd):
+    __slots__ = ("target_fd", "cmd", "cmd_arg")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgInteger)
         assert isinstance(args[2], s.SyscallArgInteger)
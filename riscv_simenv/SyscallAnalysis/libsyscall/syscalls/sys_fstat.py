@@ -6,9 +6,10 @@ from . import syscall as s
 # int fstat(int fd, struct stat *statbuf);
 @s.mixedomatic
 class sys_fstat(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("fd",)
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         self.fd = args[0].avalue
 
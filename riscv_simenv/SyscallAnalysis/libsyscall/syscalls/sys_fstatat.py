@@ -6,11 +6,12 @@ from . import syscall as s
 # int fstatat(int dirfd, const char *pathname, struct stat *statbuf, int flags);
 @s.mixedomatic
 class sys_fstatat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallUseFd):
+    __slots__ = ("dirfd", "pathname", "flags")
+
     AT_EMPTY_PATH = 0x1000  # Allow empty relative pathname, <linux/fcntl.h>
 
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgStrPtr)
         assert isinstance(args[3], s.SyscallArgInteger)
@@ -6,9 +6,10 @@ from . import syscall as s
 # int ftruncate(int fd, off_t length);
 @s.mixedomatic
 class sys_ftruncate(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("fd", "length")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgInteger)
         self.fd = args[0].avalue
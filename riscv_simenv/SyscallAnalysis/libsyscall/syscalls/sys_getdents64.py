@@ -6,9 +6,10 @@ from . import syscall as s
 # int getdents64(unsigned int fd, struct linux_dirent64 *dirp, unsigned int count);
 @s.mixedomatic
 class sys_getdents64(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("fd",)
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         self.fd = args[0].avalue
 
@@ -7,9 +7,10 @@ from . import syscall as s
 #            int newdirfd, const char *newpath, int flags);
 @s.mixedomatic
 class sys_linkat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallUseFd):
+    __slots__ = ("olddirfd", "oldpath", "newdirfd", "newpath", "flags")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgStrPtr)
         assert isinstance(args[2], s.SyscallArgInteger)
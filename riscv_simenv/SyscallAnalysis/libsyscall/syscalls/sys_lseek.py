@@ -6,9 +6,10 @@ from . import syscall as s
 # off_t lseek(int fd, off_t offset, int whence);
 @s.mixedomatic
 class sys_lseek(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("fd", "offset", "whence")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgInteger)
         assert isinstance(args[2], s.SyscallArgInteger)
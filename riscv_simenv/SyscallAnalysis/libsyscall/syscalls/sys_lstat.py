@@ -4,9 +4,10 @@ from . import syscall as s
 # int lstat(const char *pathname, struct stat *statbuf);
 @s.mixedomatic
 class sys_lstat(s.Syscall, s.MixinSyscallHasPathArgs):
+    __slots__ = ("pathname",)
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgStrPtr)
         self.pathname = args[0].amemval
 
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from . import syscall as s
 
@@ -6,9 +6,10 @@ from . import syscall as s
 # int openat(int dirfd, const char *pathname, int flags, mode_t mode);
 @s.mixedomatic
 class sys_openat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallDefFd, s.MixinSyscallUseFd):
+    __slots__ = ("dirfd", "pathname", "flags", "mode", "_def_fd_path")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgStrPtr)
         assert isinstance(args[2], s.SyscallArgInteger)
@@ -17,6 +18,7 @@ class sys_openat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallDefFd, s.Mi
         self.pathname = args[1].amemval
         self.flags = args[2].avalue
         self.mode = args[3].avalue
+        self._def_fd_path = None  # type: Optional[s.GenericPath]
 
     def is_success(self):
         # type: () -> bool
@@ -28,8 +30,11 @@ class sys_openat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallDefFd, s.Mi
 
     def def_fd_get_path(self):
         # type: () -> s.GenericPath
-        self.check_fd_def(0)
-        return s.GenericPath(self.def_list[0].def_fd_get_path().abspath(), self.pathname)
+        # the dirfd define never changes once resolved, so neither does the opened path
+        if self._def_fd_path is None:
+            self.check_fd_def(0)
+            self._def_fd_path = s.GenericPath(self.def_list[0].def_fd_get_path().abspath(), self.pathname)
+        return self._def_fd_path
 
     def get_arg_paths(self):
         # type: () -> s.GenericPathList_t
@@ -6,9 +6,10 @@ from . import syscall as s
 # ssize_t pread(int fd, void *buf, size_t count, off_t offset);
 @s.mixedomatic
 class sys_pread(s.Syscall, s.MixinSyscallUseFd):
+    __slots__ = ("fd", "count", "offset")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[2], s.SyscallArgInteger)
         assert isinstance(args[3], s.SyscallArgInteger)
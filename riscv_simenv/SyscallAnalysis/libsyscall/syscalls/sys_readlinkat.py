@@ -6,9 +6,10 @@ from . import syscall as s
 # ssize_t readlinkat(int dirfd, const char *pathname, char *buf, size_t bufsiz);
 @s.mixedomatic
 class sys_readlinkat(s.Syscall, s.MixinSyscallHasPathArgs, s.MixinSyscallUseFd):
+    __slots__ = ("dirfd", "pathname", "buf_ptr", "buf_size")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, s.SyscallArgList_t, int, int, str, int) -> None
-        super().__init__(name, args, ret, syscall_id, at_cwd, seq_no)
         assert isinstance(args[0], s.SyscallArgInteger)
         assert isinstance(args[1], s.SyscallArgStrPtr)
         assert isinstance(args[2], s.SyscallArgInteger)
@@ -1,51 +1,68 @@
+import base64
+import functools
 import os
 import pathlib
-from typing import List, Union
+import sys
+from typing import List, Optional, Sequence, Union
 
 AT_FDCWD = -100
 
 
+@functools.lru_cache(maxsize=1 << 16)
+def _normalize_path(path):
+    # type: (str) -> str
+    return sys.intern(str(pathlib.PurePosixPath(path)))
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def _resolve_path(base, rest):
+    # type: (str, str) -> str
+    sep = os.path.sep
+    _path = '' if rest.startswith(sep) else base
+    for name in rest.split(sep):
+        if not name or name == '.':
+            # current dir
+            continue
+        if name == '..':
+            # parent dir
+            _path, _, _ = _path.rpartition(sep)
+            continue
+        if _path.endswith(sep):
+            _path = _path + name
+        else:
+            _path = _path + sep + name
+    return sys.intern(_path or sep)
+
+
 class GenericPath:
+    """
+    A pathname as seen by a syscall, relative to the base dir it is resolved against.
+    Both parts are normalized and interned, and abspath() is resolved at most once per object.
+    """
+    __slots__ = ("base", "rpath", "_abspath")
+
     def __init__(self, base, pathname):
         # type: (str, str) -> None
-        self.base = pathlib.PurePosixPath(base)
-        self.rpath = pathlib.PurePosixPath(pathname)
-        assert self.base.is_absolute()
+        self.base = _normalize_path(base)
+        self.rpath = _normalize_path(pathname)
+        self._abspath = None  # type: Optional[str]
+        assert self.base.startswith(os.path.sep)
 
     def isabs(self):
         # type: () -> bool
-        return self.rpath.is_absolute()
+        return self.rpath.startswith(os.path.sep)
 
     def rawpath(self):
-        return str(self.rpath)
+        return self.rpath
 
     def basepath(self):
-        return str(self.base)
+        return self.base
 
     def abspath(self):
         # type: () -> str
-        sep = os.path.sep
-
-        def _resolve(_path, _rest):
-            if _rest.startswith(sep):
-                _path = ''
-
-            for name in _rest.split(sep):
-                if not name or name == '.':
-                    # current dir
-                    continue
-                if name == '..':
-                    # parent dir
-                    _path, _, _ = _path.rpartition(sep)
-                    continue
-                if _path.endswith(sep):
-                    _path = _path + name
-                else:
-                    _path = _path + sep + name
-            return _path
-
-        base = '' if self.rpath.is_absolute() else str(self.base)
-        return _resolve(base, str(self.rpath)) or sep
+        if self._abspath is None:
+            self._abspath = _resolve_path(self.base, self.rpath)
+        return self._abspath
 
     def contains(self, p):
         # type: (GenericPath) -> bool
@@ -62,7 +79,9 @@ class GenericPath:
 
     def __eq__(self, other):
         # type: (GenericPath) -> bool
-        return isinstance(other, self.__class__) and self.base == other.base and self.rpath == other.rpath
+        return self is other or (
+                isinstance(other, self.__class__) and self.base == other.base and self.rpath == other.rpath
+        )
 
     def __hash__(self):
         # type: () -> int
@@ -70,6 +89,8 @@ class GenericPath:
 
 
 class SyscallArgInteger:
+    __slots__ = ("aname", "atype", "avalue")
+
     def __init__(self, aname, atype, avalue):
         # type: (str, str, int) -> None
         self.aname = aname
@@ -78,13 +99,49 @@ class SyscallArgInteger:
 
 
 class SyscallArgStrPtr(SyscallArgInteger):
+    __slots__ = ("amemval",)
+
     def __init__(self, aname, atype, avalue, amemval):
         # type: (str, str, int, str) -> None
         super().__init__(aname, atype, avalue)
         self.amemval = amemval
 
 
+# the slot descriptor of SyscallArgStrPtr.amemval, which SyscallArgLazyStrPtr hides with a property
+_AMEMVAL_SLOT = SyscallArgStrPtr.amemval
+
+
+class SyscallArgLazyStrPtr(SyscallArgStrPtr):
+    """
+    A string pointer argument whose memory value is kept base64-encoded as it appears
+    in the strace, and only decoded when amemval is accessed for the first time.
+    The decoded value is cached in the amemval slot of SyscallArgStrPtr.
+    """
+    __slots__ = ("amemval_b64",)
+
+    def __init__(self, aname, atype, avalue, amemval_b64):
+        # type: (str, str, int, str) -> None
+        SyscallArgInteger.__init__(self, aname, atype, avalue)
+        self.amemval_b64 = amemval_b64
+
+    @property
+    def amemval(self):
+        # type: () -> str
+        try:
+            return _AMEMVAL_SLOT.__get__(self)
+        except AttributeError:
+            amemval = base64.b64decode(self.amemval_b64, validate=True).decode('ascii')
+            _AMEMVAL_SLOT.__set__(self, amemval)
+            return amemval
+
+    def __reduce__(self):
+        # the default pickling would set amemval, which the property does not allow
+        return self.__class__, (self.aname, self.atype, self.avalue, self.amemval_b64)
+
+
 class Syscall:
+    __slots__ = ("name", "args", "ret", "syscall_id", "seq_no", "at_cwd")
+
     def __init__(self, name, args, ret, syscall_id, at_cwd, seq_no):
         # type: (str, SyscallArgList_t, int, int, str, int) -> None
         self.name = name
@@ -113,15 +170,35 @@ class Syscall:
 
 
 class MixinSyscallDefFd:
+    """
+    A syscall that defines an fd. The uses of the fd are only kept when the trace constructor
+    retains the syscalls, so the list is allocated on the first one.
+    """
+    __slots__ = ()
+    # the fields a mixin adds to a syscall class, with their initial values (see mixedomatic)
+    _mixin_fields = (("_use_list", None), ("use_count", 0))
+
     O_ACCMODE = os.O_RDONLY | os.O_WRONLY | os.O_RDWR
 
-    def __init__(self, *args, **kwargs):
-        self.use_list = list()  # type: List[Union[Syscall, MixinSyscallUseFd]]
+    @property
+    def use_list(self):
+        # type: () -> Sequence[Union[Syscall, MixinSyscallUseFd]]
+        return self._use_list if self._use_list is not None else ()
 
     def def_fd_add_use(self, fd_use):
         # type: (Union[Syscall, MixinSyscallUseFd]) -> int
-        ret_val = len(self.use_list)
-        self.use_list.append(fd_use)
+        if self._use_list is None:
+            self._use_list = list()  # type: List[Union[Syscall, MixinSyscallUseFd]]
+        ret_val = len(self._use_list)
+        self._use_list.append(fd_use)
+        self.use_count += 1
+        return ret_val
+
+    def def_fd_count_use(self):
+        # type: () -> int
+        # count a use without keeping a reference to it
+        ret_val = self.use_count
+        self.use_count += 1
         return ret_val
 
     def def_fd_get_path(self):
@@ -144,13 +221,24 @@ class MixinSyscallDefFd:
 
 
 class MixinSyscallUseFd:
-    def __init__(self, *args, **kwargs):
-        self.def_list = list()  # type: List[Union[Syscall, MixinSyscallDefFd]]
+    """
+    A syscall that uses fds. The defines are resolved by the trace constructor, one per used fd,
+    and the list is allocated on the first one.
+    """
+    __slots__ = ()
+    _mixin_fields = (("_def_list", None),)
+
+    @property
+    def def_list(self):
+        # type: () -> Sequence[Union[Syscall, MixinSyscallDefFd]]
+        return self._def_list if self._def_list is not None else ()
 
     def use_fd_add_def(self, fd_def):
         # type: (Union[Syscall, MixinSyscallDefFd]) -> int
-        ret_val = len(self.def_list)
-        self.def_list.append(fd_def)
+        if self._def_list is None:
+            self._def_list = list()  # type: List[Union[Syscall, MixinSyscallDefFd]]
+        ret_val = len(self._def_list)
+        self._def_list.append(fd_def)
         return ret_val
 
     def check_fd_def(self, idx):
@@ -171,30 +259,50 @@ class MixinSyscallUseFd:
 
 
 class MixinSyscallHasPathArgs:
-    def __init__(self, *args, **kwargs):
-        pass
+    __slots__ = ()
+    _mixin_fields = ()
 
     def get_arg_paths(self):
         # type: () -> GenericPathList_t
         raise NotImplementedError()
 
 
+_SYSCALL_INIT_ARGS = ("name", "args", "ret", "syscall_id", "at_cwd", "seq_no")
+
+
 def mixedomatic(cls):
-    """ Mixed-in class decorator. """
+    """
+    Mixed-in class decorator.
+
+    Rebuild the class with __slots__ for the fields of its mixins, on top of the __slots__ the class
+    declares for its own fields, and give it a flattened __init__ that sets the fields of Syscall and of
+    the mixins inline, then calls the __init__ of the class, if any. The __init__ of the class must not
+    call super().__init__(), the Syscall fields are already set when it runs.
+    """
     classinit = cls.__dict__.get('__init__')  # Possibly None.
 
-    # Define an __init__ function for the class.
-    def __init__(self, *args, **kwargs):
-        # Call the __init__ functions of all the bases.
-        for base in cls.__bases__:
-            base.__init__(self, *args, **kwargs)
-        # Also call any __init__ function that was in the class.
-        if classinit:
-            classinit(self, *args, **kwargs)
-
-    # Make the local function the class's __init__.
-    setattr(cls, '__init__', __init__)
-    return cls
+    mixin_fields = []
+    for base in cls.__mro__[1:]:
+        for field, value in base.__dict__.get('_mixin_fields', ()):
+            if field not in (f for f, _ in mixin_fields):
+                mixin_fields.append((field, value))
+
+    # Generate the __init__ function for the class.
+    lines = ["def __init__(self, %s):" % ", ".join(_SYSCALL_INIT_ARGS)]
+    lines.extend("    self.%s = %s" % (arg, arg) for arg in _SYSCALL_INIT_ARGS)
+    lines.extend("    self.%s = %r" % (field, value) for field, value in mixin_fields)
+    if classinit:
+        lines.append("    classinit(self, %s)" % ", ".join(_SYSCALL_INIT_ARGS))
+    namespace = {"classinit": classinit}
+    exec("\n".join(lines), namespace)
+
+    # Rebuild the class, since __slots__ only take effect when a class is created.
+    own_slots = tuple(cls.__dict__.get('__slots__', ()))
+    class_dict = {k: v for k, v in cls.__dict__.items() if k not in own_slots and k not in ('__dict__', '__weakref__')}
+    class_dict['__slots__'] = own_slots + tuple(field for field, _ in mixin_fields)
+    class_dict['__init__'] = namespace['__init__']
+    class_dict['__init__'].__qualname__ = cls.__qualname__ + '.__init__'
+    return type(cls)(cls.__name__, cls.__bases__, class_dict)
 
 
 SyscallArg_t = Union[SyscallArgInteger, SyscallArgStrPtr]
@@ -0,0 +1,216 @@
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+import click
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsageAnalyzer, stat_file_usage
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_fast_parser import FastStraceInputParser
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.strace_parser import StraceInputParser
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.trace_stats import TraceStats
+from riscv_simenv.SyscallAnalysis.test.gen_synthetic_strace import SyntheticTraceGenerator
+
+BenchResult_t = Dict[str, object]
+
+
+def _count_records(parser, trace_path):
+    # type: (type, str) -> int
+    n_records = 0
+    with open(trace_path, "r") as fp:
+        for _ in parser.parse_stream(fp):
+            n_records += 1
+    return n_records
+
+
+def bench_parse_pyparsing(trace_path, init_cwd):
+    # type: (str, str) -> BenchResult_t
+    return {"records": _count_records(StraceInputParser, trace_path)}
+
+
+def bench_parse_fast(trace_path, init_cwd):
+    # type: (str, str) -> BenchResult_t
+    return {"records": _count_records(FastStraceInputParser, trace_path)}
+
+
+def bench_construct(trace_path, init_cwd):
+    # type: (str, str) -> BenchResult_t
+    stats = TraceStats()
+    trace_cntr = SyscallTraceConstructor(init_cwd, retain_syscalls=False, stats=stats)
+    trace_cntr.parse_strace_file(trace_path)
+    stats_dict = stats.to_dict()
+    return {"records": stats.n_records, "phases": stats_dict["phases"], "parse_breakdown": stats_dict["parse_breakdown"]}
+
+
+def bench_stat_file_usage(trace_path, init_cwd):
+    # type: (str, str) -> BenchResult_t
+    """
+    The batch analysis: all the syscalls are retained, then folded by stat_file_usage.
+    """
+    stats = TraceStats()
+    trace_cntr = SyscallTraceConstructor(init_cwd, retain_syscalls=True, stats=stats)
+    trace_cntr.parse_strace_file(trace_path)
+    with stats.phase("stat_file_usage"):
+        file_usage = stat_file_usage(trace_cntr.syscalls)
+    return {"records": stats.n_records, "paths": len(file_usage), "phases": dict(stats.phases)}
+
+
+def bench_file_usage_streaming(trace_path, init_cwd):
+    # type: (str, str) -> BenchResult_t
+    """
+    The single pass analysis done by "repo add app analyze", without retaining the syscalls.
+    """
+    stats = TraceStats()
+    trace_cntr = SyscallTraceConstructor(init_cwd, retain_syscalls=False, stats=stats)
+    file_usage_analyzer = FileUsageAnalyzer()
+    trace_cntr.get_event_bus().subscribe(file_usage_analyzer.on_syscall)
+    trace_cntr.parse_strace_file(trace_path)
+    return {"records": stats.n_records, "paths": len(file_usage_analyzer.get_file_usage()),
+            "phases": dict(stats.phases)}
+
+
+BENCHMARKS = OrderedDict([
+    ("parse-pyparsing", bench_parse_pyparsing),
+    ("parse-fast", bench_parse_fast),
+    ("construct", bench_construct),
+    ("stat-file-usage", bench_stat_file_usage),
+    ("file-usage-streaming", bench_file_usage_streaming),
+])  # type: Dict[str, Callable[[str, str], BenchResult_t]]
+
+
+def _peak_rss_bytes():
+    # type: () -> int
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux, but in bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _run_benchmark(name, trace_path, init_cwd):
+    # type: (str, str, str) -> BenchResult_t
+    """
+    Run a benchmark in the current process, which must be a fresh one for its peak RSS to be meaningful.
+    """
+    rss_before = _peak_rss_bytes()
+    begin = time.perf_counter()
+    result = BENCHMARKS[name](trace_path, init_cwd)
+    seconds = time.perf_counter() - begin
+    trace_size = os.path.getsize(trace_path)
+    result.update(
+        seconds=seconds,
+        records_per_sec=result["records"] / seconds if seconds else 0.0,
+        bytes_per_sec=trace_size / seconds if seconds else 0.0,
+        peak_rss=_peak_rss_bytes(),
+        peak_rss_increase=_peak_rss_bytes() - rss_before,
+    )
+    return result
+
+
+def run_benchmark_isolated(name, trace_path, init_cwd):
+    # type: (str, str, str) -> BenchResult_t
+    """
+    Run a benchmark in a new interpreter, so the peak RSS is not inherited from earlier benchmarks.
+    """
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(_run_benchmark, (name, trace_path, init_cwd))
+
+
+def format_comparison(results, baseline_results):
+    # type: (List[BenchResult_t], List[BenchResult_t]) -> str
+    baseline = {(r["bench"], r["n_records"]): r for r in baseline_results}
+    lines = []
+    for r in results:
+        b = baseline.get((r["bench"], r["n_records"]))
+        if b is None:
+            continue
+        lines.append("%-22s %10d records: %.2fx time, %.2fx peak RSS" % (
+            r["bench"], r["n_records"], r["seconds"] / b["seconds"] if b["seconds"] else float("inf"),
+            r["peak_rss"] / b["peak_rss"] if b["peak_rss"] else float("inf")
+        ))
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("-n", "--records", "record_counts", type=click.IntRange(min=1), multiple=True,
+              default=(10 ** 4, 10 ** 5), show_default=True,
+              help="The size of a synthetic trace to benchmark, in syscall records. Can be repeated.")
+@click.option("-b", "--bench", "bench_names", type=click.Choice(list(BENCHMARKS)), multiple=True,
+              help="The benchmark to run. Can be repeated [default: all].")
+@click.option("--seed", type=click.INT, default=0, show_default=True,
+              help="The seed of the synthetic trace generator.")
+@click.option("--trace-dir", type=click.Path(file_okay=False),
+              help="Keep the generated traces in this directory, and reuse them in later runs "
+                   "[default: a temporary directory].")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True),
+              help="Save the results to this JSON file [default: stdout].")
+@click.option("--compare", "baseline_json", type=click.File("r"),
+              help="A JSON file saved by an earlier run, to compare the results with.")
+def main(record_counts, bench_names, seed, trace_dir, output, baseline_json):
+    """
+    Benchmark the syscall trace parsers and analyzers on synthetic traces of growing sizes,
+    reporting the throughput, the peak RSS and the time by phase of each one.
+
+    The traces take about 110 bytes per record, and stat-file-usage retains every syscall in memory,
+    so mind the disk space and the memory at 10^7 records and above.
+    """
+    bench_names = bench_names or tuple(BENCHMARKS)
+    tmp_dir = None  # type: Optional[str]
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+    else:
+        trace_dir = tmp_dir = tempfile.mkdtemp(prefix="strace-bench-")
+
+    results = []  # type: List[BenchResult_t]
+    try:
+        for n_records in record_counts:
+            generator = SyntheticTraceGenerator(seed)
+            trace_path = os.path.join(trace_dir, "synthetic-%d-seed%d.trace" % (n_records, seed))
+            if not os.path.isfile(trace_path):
+                print("Generating a trace of %d records..." % n_records, file=sys.stderr)
+                with open(trace_path + ".tmp", "w") as fp:
+                    generator.generate(fp, n_records)
+                os.replace(trace_path + ".tmp", trace_path)
+            for name in bench_names:
+                print("Running %s on %d records..." % (name, n_records), file=sys.stderr)
+                result = OrderedDict(bench=name, n_records=n_records, trace_bytes=os.path.getsize(trace_path))
+                result.update(run_benchmark_isolated(name, trace_path, generator.root))
+                print("  %.2fs, %.0f records/s, %.1f MiB/s, peak RSS %.1f MiB" % (
+                    result["seconds"], result["records_per_sec"], result["bytes_per_sec"] / (1 << 20),
+                    result["peak_rss"] / (1 << 20)
+                ), file=sys.stderr)
+                results.append(result)
+    finally:
+        if tmp_dir:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": seed,
+        },
+        "results": results,
+    }
+    if output:
+        with open(output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if baseline_json:
+        print(format_comparison(results, json.load(baseline_json)["results"]), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, Iterator, Optional
+
+import click
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor
+from riscv_simenv.SyscallAnalysis.libsyscall.syscalls.syscall import Syscall, SyscallArgInteger
+from riscv_simenv.SyscallAnalysis.test.gen_synthetic_strace import SyntheticTraceGenerator
+
+
+def _fields(obj):
+    # type: (object) -> Iterator[object]
+    """
+    Yield the values of the attributes of an object, whether they live in its __dict__ or in its __slots__.
+    """
+    obj_dict = getattr(obj, "__dict__", None)
+    if obj_dict is not None:
+        yield obj_dict
+        yield from obj_dict.values()
+    for cls in type(obj).__mro__:
+        for slot in cls.__dict__.get("__slots__", ()):
+            if slot in ("__dict__", "__weakref__"):
+                continue
+            try:
+                yield object.__getattribute__(obj, slot)
+            except AttributeError:
+                # an unset slot, e.g. the memory value of a lazy string pointer that was never decoded
+                pass
+
+
+def _owned_objects(scall):
+    # type: (Syscall) -> Iterator[object]
+    """
+    Yield the objects that belong to a single syscall record: the syscall itself, its attribute dict,
+    its argument list and arguments, and its fd use/define lists. The strings and integers are left out,
+    they are mostly interned or shared between records, and the same whatever the layout of the classes.
+    """
+    yield scall
+    for value in _fields(scall):
+        if isinstance(value, dict):
+            yield value
+        elif isinstance(value, list):
+            yield value
+            for item in value:
+                if isinstance(item, SyscallArgInteger):
+                    yield item
+                    yield from (v for v in _fields(item) if isinstance(v, dict))
+
+
+def measure_syscall_memory(trace_path, init_cwd):
+    # type: (str, str) -> Dict[str, object]
+    """
+    Build and retain the syscalls of a trace, then measure the memory they take.
+    """
+    tracemalloc.start()
+    begin = time.perf_counter()
+    trace_cntr = SyscallTraceConstructor(init_cwd, retain_syscalls=True)
+    trace_cntr.parse_strace_file(trace_path)
+    seconds = time.perf_counter() - begin
+    traced_bytes, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n_records = len(trace_cntr.syscalls)
+    n_objects = 0
+    n_bytes = 0
+    by_type = Counter()  # type: Dict[str, int]
+    for scall in trace_cntr.syscalls:
+        for obj in _owned_objects(scall):
+            n_objects += 1
+            n_bytes += sys.getsizeof(obj)
+            by_type[type(obj).__name__] += 1
+    return OrderedDict(
+        records=n_records,
+        seconds=seconds,
+        objects_per_record=n_objects / n_records if n_records else 0.0,
+        bytes_per_record=n_bytes / n_records if n_records else 0.0,
+        traced_bytes_per_record=traced_bytes / n_records if n_records else 0.0,
+        traced_peak=traced_peak,
+        objects_by_type=OrderedDict(by_type.most_common()),
+    )
+
+
+def format_comparison(result, baseline):
+    # type: (Dict[str, object], Dict[str, object]) -> str
+    lines = []
+    for key in ("objects_per_record", "bytes_per_record", "traced_bytes_per_record", "seconds"):
+        lines.append("%-24s %10.1f -> %10.1f (%.2fx)" % (
+            key, baseline[key], result[key], result[key] / baseline[key] if baseline[key] else float("inf")
+        ))
+    return "\n".join(lines)
+
+
+@click.command()
+@click.option("-n", "--records", "n_records", type=click.IntRange(min=1), default=10 ** 5, show_default=True,
+              help="The size of the synthetic trace, in syscall records.")
+@click.option("--seed", type=click.INT, default=0, show_default=True,
+              help="The seed of the synthetic trace generator.")
+@click.option("-t", "--trace", "trace_path", type=click.Path(exists=True, dir_okay=False),
+              help="Measure this trace instead of a synthetic one.")
+@click.option("--init-cwd", default="/app", show_default=True,
+              help="The initial working directory of the app that wrote --trace.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True),
+              help="Save the result to this JSON file [default: stdout].")
+@click.option("--compare", "baseline_json", type=click.File("r"),
+              help="A JSON file saved by an earlier run, e.g. on an older revision, to compare the result with.")
+def main(n_records, seed, trace_path, init_cwd, output, baseline_json):
+    """
+    Measure the memory taken by the syscall objects of a trace when they are all retained,
+    as objects and bytes per record.
+
+    The objects and bytes per record count the syscall objects, their arguments and their containers
+    (by sys.getsizeof), while the traced bytes per record, from tracemalloc, cover everything the trace
+    constructor allocated, the strings and the caches included.
+    """
+    tmp_path = None  # type: Optional[str]
+    if not trace_path:
+        generator = SyntheticTraceGenerator(seed)
+        fd, trace_path = tempfile.mkstemp(prefix="strace-mem-", suffix=".trace")
+        tmp_path = trace_path
+        init_cwd = generator.root
+        print("Generating a trace of %d records..." % n_records, file=sys.stderr)
+        with os.fdopen(fd, "w") as fp:
+            generator.generate(fp, n_records)
+    try:
+        result = measure_syscall_memory(trace_path, init_cwd)
+    finally:
+        if tmp_path:
+            os.remove(tmp_path)
+
+    report = OrderedDict(
+        meta=OrderedDict(
+            created=time.strftime("%Y-%m-%dT%H:%M:%S"),
+            python=platform.python_version(),
+            implementation=platform.python_implementation(),
+            trace=None if tmp_path else os.path.abspath(trace_path),
+            seed=seed if tmp_path else None,
+        ),
+        result=result,
+    )
+    if output:
+        with open(output, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    print("%.1f objects, %.0f bytes (%.0f traced) per record" % (
+        result["objects_per_record"], result["bytes_per_record"], result["traced_bytes_per_record"]
+    ), file=sys.stderr)
+    if baseline_json:
+        print(format_comparison(result, json.load(baseline_json)["result"]), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
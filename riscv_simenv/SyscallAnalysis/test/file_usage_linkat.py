@@ -0,0 +1,59 @@
+import io
+import sys
+
+import click
+
+from riscv_simenv.SimEnvControl.user_cmd.spawn import usage_can_elide_content
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.file_usage import FileUsageInfo, stat_file_usage
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor
+from riscv_simenv.SyscallAnalysis.test.gen_synthetic_strace import AT_FDCWD, BUF_ADDR, SyntheticTraceGenerator
+
+CWD = "/work"
+
+
+def gen_linkat_read_trace():
+    # type: () -> str
+    """
+    A trace that hard links data to alias, then reads data through alias.
+    """
+    fmt = SyntheticTraceGenerator.format_record
+    return "".join([
+        fmt(37, "linkat", [("fd_t", "olddirfd", AT_FDCWD), ("path_in_t", "oldpath", "data"),
+                           ("fd_t", "newdirfd", AT_FDCWD), ("path_in_t", "newpath", "alias"),
+                           ("uint64_t", "flags", 0)], 0),
+        fmt(56, "openat", [("fd_t", "dirfd", AT_FDCWD), ("path_in_t", "pathname", "alias"),
+                           ("uint64_t", "flags", 0), ("uint64_t", "mode", 0)], 3),
+        fmt(63, "read", [("fd_t", "fd", 3), ("ptr_out_t", "buf", BUF_ADDR), ("uint64_t", "count", 4096)], 100),
+        fmt(57, "close", [("fd_t", "fd", 3)], 0),
+    ])
+
+
+@click.command()
+def main():
+    """
+    Check that the source of a hard link the app reads through is not taken for a stat-only file,
+    whose content spawn would elide.
+    """
+    trace_cntr = SyscallTraceConstructor(CWD)
+    trace_cntr.parse_strace_stream(io.StringIO(gen_linkat_read_trace()))
+    file_usage = stat_file_usage(trace_cntr.syscalls, True)
+
+    data_usage = file_usage[CWD + "/data"]
+    alias_usage = file_usage[CWD + "/alias"]
+    all_pass = True
+    for desc, ok in (
+            ("data is a link source", data_usage.has_link_src()),
+            ("data is not stat-only", not data_usage.is_stat_only()),
+            ("the content of data is not elided", not usage_can_elide_content(data_usage)),
+            ("alias is created and read", alias_usage.has_create() and alias_usage.has_read_data()),
+            ("the usage of data round-trips", str(FileUsageInfo.build_from_str(str(data_usage))) == str(data_usage)),
+    ):
+        print("%s: %s" % ("PASS" if ok else "FAIL", desc))
+        all_pass &= ok
+
+    if not all_pass:
+        sys.exit(-1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,294 @@
+import base64
+import os
+import random
+import sys
+from typing import Dict, List, Optional, TextIO, Tuple
+
+import click
+
+# the syscall mix of a typical app: mostly I/O on files it has open, with some path lookups
+DEFAULT_SYSCALL_MIX = {
+    "openat": 10,
+    "close": 9,
+    "read": 30,
+    "write": 15,
+    "lseek": 5,
+    "fstat": 8,
+    "fstatat": 8,
+    "fcntl": 3,
+    "chdir": 1,
+    "renameat2": 1,
+}
+
+AT_FDCWD = -100
+O_ACCMODE = 0o3
+O_WRONLY = 0o1
+O_RDWR = 0o2
+O_CREAT = 0o100
+O_TRUNC = 0o1000
+O_APPEND = 0o2000
+F_DUPFD = 0
+ENOENT = 2
+EBADF = 9
+BUF_ADDR = 0x000000007FBED8F0
+STR_ADDR = 0x00000000001BCDC0
+
+
+def _b64(s):
+    # type: (str) -> str
+    return base64.b64encode(s.encode()).decode()
+
+
+class SyntheticTraceGenerator:
+    """
+    Generate a realistic FESVR syscall trace.
+
+    The files live in a directory tree of the given depth and fanout, with files_per_dir files in
+    every directory. The state of the simulated process (open fds with their offsets, cwd, and the
+    files that exist) is tracked, so the syscalls are consistent: an fd is only used while it is open,
+    new fds take the lowest free number, reads past the end of a file return 0, relative paths are
+    relative to the cwd, and the paths renamed away no longer exist.
+    """
+
+    def __init__(self, seed=0, depth=3, fanout=4, files_per_dir=8, max_open=32, mix=None, root="/bench"):
+        # type: (int, int, int, int, int, Optional[Dict[str, int]], str) -> None
+        self.rand = random.Random(seed)
+        self.root = root
+        self.max_open = max_open
+        self.dirs = [root]  # type: List[str]
+        frontier = [root]
+        for _ in range(depth):
+            frontier = [os.path.join(d, "d%d" % i) for d in frontier for i in range(fanout)]
+            self.dirs.extend(frontier)
+        # path -> size
+        self.files = {
+            os.path.join(d, "f%d.dat" % i): self.rand.randint(0, 1 << 20)
+            for d in self.dirs for i in range(files_per_dir)
+        }  # type: Dict[str, int]
+        self.file_list = list(self.files)
+        self.n_created = 0
+        # fd -> [path, flags, offset]
+        self.fds = dict()  # type: Dict[int, List]
+        self.cwd = root
+        mix = mix if mix is not None else DEFAULT_SYSCALL_MIX
+        self.mix_names = list(mix)
+        self.mix_weights = [mix[name] for name in self.mix_names]
+
+    @staticmethod
+    def format_record(syscall_id, name, args, ret):
+        # type: (int, str, List[Tuple[str, str, object]], int) -> str
+        lines = ["[%d] sys_%s (" % (syscall_id, name)]
+        for atype, aname, avalue in args:
+            if atype in ("path_in_t", "str_in_t", "path_out_t", "str_out_t"):
+                lines.append("  %s %s = 0x%016X|%s|" % (atype, aname, STR_ADDR, _b64(avalue)))
+            elif atype.startswith("ptr_"):
+                lines.append("  %s %s = 0x%016X" % (atype, aname, avalue))
+            else:
+                lines.append("  %s %s = %d" % (atype, aname, avalue))
+        lines.append(") -> %d\n\n" % ret)
+        return "\n".join(lines)
+
+    def _pick_path(self):
+        # type: () -> str
+        """
+        Pick a file path, most of the time an existing one, as an absolute path or relative to the cwd.
+        """
+        if self.rand.random() < 0.9:
+            path = self.rand.choice(self.file_list)
+        else:
+            path = os.path.join(self.rand.choice(self.dirs), "missing%d" % self.rand.randint(0, 99))
+        if self.rand.random() < 0.5:
+            return os.path.relpath(path, self.cwd)
+        return path
+
+    def _abspath(self, path):
+        # type: (str) -> str
+        return os.path.normpath(os.path.join(self.cwd, path))
+
+    def _lowest_free_fd(self, minimum=3):
+        # type: (int) -> int
+        fd = minimum
+        while fd in self.fds:
+            fd += 1
+        return fd
+
+    def _random_fd(self):
+        # type: () -> Optional[int]
+        if not self.fds:
+            return None
+        return self.rand.choice(list(self.fds))
+
+    def gen_openat(self):
+        if len(self.fds) >= self.max_open:
+            return self.gen_close()
+        path = self._pick_path()
+        abspath = self._abspath(path)
+        flags = self.rand.choice((0, 0, 0, O_RDWR, O_WRONLY | O_CREAT | O_TRUNC, O_WRONLY | O_CREAT | O_APPEND))
+        if self.rand.random() < 0.05:
+            # a new output file
+            abspath = os.path.join(self.cwd, "new%d.out" % self.n_created)
+            path = os.path.relpath(abspath, self.cwd)
+            flags = O_WRONLY | O_CREAT | O_TRUNC
+            self.n_created += 1
+        args = [("fd_t", "dirfd", AT_FDCWD), ("path_in_t", "pathname", path),
+                ("uint64_t", "flags", flags), ("uint64_t", "mode", 0o644)]
+        if abspath not in self.files:
+            if not flags & O_CREAT:
+                return self.format_record(56, "openat", args, -ENOENT)
+            self.files[abspath] = 0
+            self.file_list.append(abspath)
+        if flags & O_TRUNC:
+            self.files[abspath] = 0
+        fd = self._lowest_free_fd()
+        self.fds[fd] = [abspath, flags, self.files[abspath] if flags & O_APPEND else 0]
+        return self.format_record(56, "openat", args, fd)
+
+    def gen_close(self):
+        fd = self._random_fd()
+        if fd is None:
+            return self.gen_openat()
+        del self.fds[fd]
+        return self.format_record(57, "close", [("fd_t", "fd", fd)], 0)
+
+    def gen_read(self):
+        fd = self._random_fd()
+        if fd is None:
+            return self.gen_openat()
+        path, flags, offset = self.fds[fd]
+        count = self.rand.choice((512, 4096, 4096, 65536))
+        args = [("fd_t", "fd", fd), ("ptr_out_t", "buf", BUF_ADDR), ("uint64_t", "count", count)]
+        if flags & O_ACCMODE == O_WRONLY:
+            return self.format_record(63, "read", args, -EBADF)
+        ret = max(min(count, self.files.get(path, 0) - offset), 0)
+        self.fds[fd][2] += ret
+        return self.format_record(63, "read", args, ret)
+
+    def gen_write(self):
+        fd = self._random_fd()
+        if fd is None:
+            return self.gen_openat()
+        path, flags, offset = self.fds[fd]
+        count = self.rand.choice((16, 128, 4096))
+        args = [("fd_t", "fd", fd), ("ptr_in_t", "buf", BUF_ADDR), ("uint64_t", "count", count)]
+        if flags & O_ACCMODE == 0:
+            return self.format_record(64, "write", args, -EBADF)
+        if flags & O_APPEND:
+            offset = self.files.get(path, 0)
+        self.fds[fd][2] = offset + count
+        if path in self.files:
+            self.files[path] = max(self.files[path], offset + count)
+        return self.format_record(64, "write", args, count)
+
+    def gen_lseek(self):
+        fd = self._random_fd()
+        if fd is None:
+            return self.gen_openat()
+        offset = self.rand.randint(0, max(self.files.get(self.fds[fd][0], 0), 1))
+        self.fds[fd][2] = offset
+        args = [("fd_t", "fd", fd), ("int64_t", "offset", offset), ("uint64_t", "whence", os.SEEK_SET)]
+        return self.format_record(62, "lseek", args, offset)
+
+    def gen_fstat(self):
+        fd = self._random_fd()
+        if fd is None:
+            return self.gen_openat()
+        return self.format_record(80, "fstat", [("fd_t", "fd", fd), ("ptr_out_t", "st", BUF_ADDR)], 0)
+
+    def gen_fstatat(self):
+        path = self._pick_path()
+        args = [("fd_t", "dirfd", AT_FDCWD), ("path_in_t", "pname", path), ("uint64_t", "len", len(path)),
+                ("ptr_out_t", "pbuf", BUF_ADDR), ("uint64_t", "flags", 0)]
+        return self.format_record(79, "fstatat", args, 0 if self._abspath(path) in self.files else -ENOENT)
+
+    def gen_fcntl(self):
+        fd = self._random_fd()
+        if fd is None or len(self.fds) >= self.max_open:
+            return self.gen_close()
+        min_fd = self.rand.choice((0, 10))
+        new_fd = self._lowest_free_fd(max(min_fd, 3))
+        # the duplicate shares the file description, but the generator does not need to model that
+        self.fds[new_fd] = list(self.fds[fd])
+        args = [("fd_t", "fd", fd), ("uint64_t", "cmd", F_DUPFD), ("uint64_t", "arg", min_fd)]
+        return self.format_record(25, "fcntl", args, new_fd)
+
+    def gen_chdir(self):
+        self.cwd = self.rand.choice(self.dirs)
+        return self.format_record(49, "chdir", [("path_in_t", "path", self.cwd)], 0)
+
+    def gen_renameat2(self):
+        old_path = self._pick_path()
+        old_abspath = self._abspath(old_path)
+        new_abspath = os.path.join(os.path.dirname(old_abspath), "renamed%d.dat" % self.n_created)
+        self.n_created += 1
+        new_path = os.path.relpath(new_abspath, self.cwd)
+        args = [("fd_t", "olddirfd", AT_FDCWD), ("path_in_t", "oldpath", old_path),
+                ("fd_t", "newdirfd", AT_FDCWD), ("path_in_t", "newpath", new_path), ("uint64_t", "flags", 0)]
+        if old_abspath not in self.files:
+            return self.format_record(276, "renameat2", args, -ENOENT)
+        self.files[new_abspath] = self.files.pop(old_abspath)
+        self.file_list[self.file_list.index(old_abspath)] = new_abspath
+        for fd_state in self.fds.values():
+            if fd_state[0] == old_abspath:
+                fd_state[0] = new_abspath
+        return self.format_record(276, "renameat2", args, 0)
+
+    def generate(self, fp, n_records, batch=4096):
+        # type: (TextIO, int, int) -> None
+        """
+        Write n_records syscalls to fp, the last one being the exit of the process.
+        """
+        gens = [getattr(self, "gen_" + name) for name in self.mix_names]
+        remaining = n_records - 1
+        while remaining > 0:
+            n = min(batch, remaining)
+            fp.write("".join(gen() for gen in self.rand.choices(gens, self.mix_weights, k=n)))
+            remaining -= n
+        fp.write(self.format_record(93, "exit", [("uint64_t", "status", 0)], 0))
+
+
+def parse_mix(mix_specs):
+    # type: (Tuple[str]) -> Dict[str, int]
+    mix = dict(DEFAULT_SYSCALL_MIX)
+    for spec in mix_specs:
+        name, _, weight = spec.partition("=")
+        if name not in DEFAULT_SYSCALL_MIX or not weight.isdigit():
+            raise ValueError("Invalid syscall mix '%s', expecting NAME=WEIGHT with NAME in %s" % (
+                spec, ", ".join(DEFAULT_SYSCALL_MIX)))
+        mix[name] = int(weight)
+    return mix
+
+
+@click.command()
+@click.option("-n", "--records", type=click.IntRange(min=1), default=10000, show_default=True,
+              help="The number of syscall records to generate.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False, writable=True),
+              help="The output trace file [default: stdout].")
+@click.option("--seed", type=click.INT, default=0, show_default=True)
+@click.option("--depth", type=click.IntRange(min=0), default=3, show_default=True,
+              help="The depth of the directory tree the files are in.")
+@click.option("--fanout", type=click.IntRange(min=1), default=4, show_default=True,
+              help="The number of subdirectories of every directory in the tree.")
+@click.option("--files-per-dir", type=click.IntRange(min=1), default=8, show_default=True)
+@click.option("--max-open", type=click.IntRange(min=1), default=32, show_default=True,
+              help="The maximum number of fds open at the same time.")
+@click.option("--mix", "mix_specs", multiple=True, metavar="NAME=WEIGHT",
+              help="Override the weight of a syscall in the mix (e.g. --mix chdir=0). "
+                   "The syscalls are: %s." % ", ".join(DEFAULT_SYSCALL_MIX))
+def main(records, output, seed, depth, fanout, files_per_dir, max_open, mix_specs):
+    """
+    Generate a synthetic FESVR syscall trace.
+    """
+    try:
+        mix = parse_mix(mix_specs)
+    except ValueError as ve:
+        raise click.BadParameter(str(ve), param_hint="--mix")
+    generator = SyntheticTraceGenerator(seed, depth, fanout, files_per_dir, max_open, mix)
+    if output:
+        with open(output, "w") as fp:
+            generator.generate(fp, records)
+    else:
+        generator.generate(sys.stdout, records)
+
+
+if __name__ == '__main__':
+    main()
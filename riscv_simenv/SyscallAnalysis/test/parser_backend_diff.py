@@ -0,0 +1,104 @@
+import io
+import os
+import sys
+
+import click
+
+from riscv_simenv.SyscallAnalysis.libsyscall.analyzer.syscall_trace_constructor import SyscallTraceConstructor, \
+    STRACE_PARSERS
+from riscv_simenv.SyscallAnalysis.libsyscall.syscalls.syscall import SyscallArgStrPtr
+
+# a skipped record with its arguments and tail on a single line, followed by a kept record
+FILTERED_SAMPLE = (
+    "[93] sys_exit (uint64_t status = 0) -> 0\n"
+    "[57] sys_close (\n"
+    "  uint64_t fd = 3\n"
+    ") -> 0\n"
+    "[64] sys_write (uint64_t fd = 1) -> 0\n"
+)
+FILTERED_SAMPLE_KEEP = frozenset(["sys_close"])
+
+
+def arg_signature(arg):
+    if isinstance(arg, SyscallArgStrPtr):
+        return "str_ptr", arg.atype, arg.aname, arg.avalue, arg.amemval
+    return "integer", arg.atype, arg.aname, arg.avalue
+
+
+def syscall_signature(s):
+    return type(s).__name__, s.name, s.syscall_id, s.ret, s.seq_no, s.at_cwd, tuple(map(arg_signature, s.args))
+
+
+def record_signature(record, start):
+    args = None if record.syscall_args is None else tuple(map(arg_signature, record.syscall_args))
+    return record.syscall_name, record.syscall_id, record.ret_code, start, args
+
+
+def parse_records(parser, fp, keep_syscalls):
+    return [
+        record_signature(record, start) for record, start, _ in STRACE_PARSERS[parser].parse_stream(fp, keep_syscalls)
+    ]
+
+
+def compare_results(results):
+    """
+    Compare the signatures produced by every parser backend with those of the first one.
+    """
+    ref_parser, ref_signatures = next(iter(results.items()))
+    all_match = True
+    for parser, signatures in results.items():
+        if len(signatures) != len(ref_signatures):
+            print("[%s] %d syscalls, but [%s] has %d" % (parser, len(signatures), ref_parser, len(ref_signatures)))
+            all_match = False
+        for i, (a, b) in enumerate(zip(ref_signatures, signatures)):
+            if a != b:
+                print("[%s] and [%s] differ at the %dth syscall:\n  %s\n  %s" % (ref_parser, parser, i, a, b))
+                all_match = False
+                break
+    return all_match
+
+
+@click.command()
+@click.argument("input_file", type=click.Path(exists=True, dir_okay=False))
+def main(input_file):
+    """
+    Parse INPUT_FILE with every parser backend and check they construct identical syscall lists,
+    and yield identical records when only some syscalls are kept.
+    """
+    cwd_path = os.path.abspath(os.path.dirname(input_file))
+
+    results = dict()
+    for parser in STRACE_PARSERS:
+        trace_cntr = SyscallTraceConstructor(cwd_path)
+        with open(input_file, "r") as fp:
+            trace_cntr.parse_strace_stream(fp, parser=parser)
+        results[parser] = list(map(syscall_signature, trace_cntr.syscalls))
+        print("%s: %d syscalls" % (parser, len(results[parser])))
+    all_match = compare_results(results)
+
+    # keep every other syscall name of the trace, so the skipped records are interleaved with the kept ones
+    with open(input_file, "r") as fp:
+        names = sorted(set(record.syscall_name for record, _, _ in STRACE_PARSERS["fast"].parse_stream(fp)))
+    keep_syscalls = frozenset(names[::2])
+    results = dict()
+    for parser in STRACE_PARSERS:
+        with open(input_file, "r") as fp:
+            results[parser] = parse_records(parser, fp, keep_syscalls)
+        print("%s: %d records, keeping %d of %d syscall names" % (
+            parser, len(results[parser]), len(keep_syscalls), len(names)
+        ))
+    all_match &= compare_results(results)
+
+    results = {
+        parser: parse_records(parser, io.StringIO(FILTERED_SAMPLE), FILTERED_SAMPLE_KEEP) for parser in STRACE_PARSERS
+    }
+    print("filtered sample: %d records" % len(results["fast"]))
+    all_match &= compare_results(results)
+
+    if not all_match:
+        sys.exit(-1)
+    print("All parser backends produced identical syscalls.")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,9 +11,7 @@ def main(input_file):
     cwd_path = os.path.abspath(os.path.dirname(input_file.name))
 
     trace_cntr = SyscallTraceConstructor(cwd_path)
-    strace_str = input_file.read()
-
-    trace_cntr.parse_strace_str(strace_str)
+    trace_cntr.parse_strace_stream(input_file)
     for t in trace_cntr.syscalls:
         print(str(t))
 